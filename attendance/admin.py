@@ -0,0 +1,34 @@
+from django.contrib import admin
+
+from .models import Term, StudentTermAttendance, ClassDayAttendance
+
+
+class TermModel(admin.ModelAdmin):
+    # rollups follow the dates of a term only after
+    # `manage.py rebuild_attendance`
+    list_display = ('name', 'starts_on', 'ends_on')
+
+
+class StudentTermAttendanceModel(admin.ModelAdmin):
+    list_display = ('student', 'term', 'sessions', 'present', 'absent',
+                    'late', 'excused')
+    list_filter = ('term', )
+    readonly_fields = list_display
+
+    def has_add_permission(self, request):
+        return False
+
+
+class ClassDayAttendanceModel(admin.ModelAdmin):
+    list_display = ('class_room', 'date', 'sessions', 'present', 'absent',
+                    'late', 'excused')
+    list_filter = ('class_room', )
+    readonly_fields = list_display
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(Term, TermModel)
+admin.site.register(StudentTermAttendance, StudentTermAttendanceModel)
+admin.site.register(ClassDayAttendance, ClassDayAttendanceModel)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class AttendanceConfig(AppConfig):
+    name = 'attendance'
+
+    def ready(self):
+        from people import partitions
+        from .models import Attendance
+
+        partitions.register(Attendance._meta.db_table)
@@ -0,0 +1,38 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from attendance import marking
+from attendance.models import Attendance, Term
+
+
+class Command(BaseCommand):
+    help = ('Recomputes the attendance rollups (per student per term, per '
+            'class per day) from the raw attendance rows, e.g. after the '
+            'dates of a term changed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', type=int,
+                            help='Only the days of this term.')
+        parser.add_argument('--start', help='First day, YYYY-MM-DD.')
+        parser.add_argument('--end', help='Last day, YYYY-MM-DD.')
+
+    def handle(self, *args, **options):
+        if options['term']:
+            term = Term.objects.filter(pk=options['term']).first()
+            if term is None:
+                raise CommandError('No such term')
+            start, end = term.starts_on, term.ends_on
+        else:
+            first = (Attendance.objects.order_by('date')
+                     .values_list('date', flat=True).first())
+            start = parse_date(options['start'] or '') or first
+            end = parse_date(options['end'] or '') or date.today()
+            if start is None:
+                self.stdout.write('No attendance recorded yet')
+                return
+
+        terms = marking.rebuild(start, end)
+        self.stdout.write(f'Rebuilt {start} to {end}, terms: '
+                          f'{", ".join(map(str, terms)) or "none"}')
@@ -0,0 +1,221 @@
+from collections import defaultdict
+
+from django.db import connections, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from people.models import ClassRoom, Student
+from school import tenancy
+
+from .models import (ABSENT, EXCUSED, LATE, PRESENT, SESSIONS, STATUSES,
+                     Attendance, ClassDayAttendance, StudentTermAttendance,
+                     Term)
+
+# Attendance is written a class at a time in one upsert, and the rollups
+# (StudentTermAttendance, ClassDayAttendance) are moved by the difference
+# each marking makes, so reading an attendance rate never scans the raw
+# rows. `manage.py rebuild_attendance` recomputes the rollups from them.
+
+# status -> tally column
+COLUMNS = {
+    PRESENT: 'present',
+    ABSENT: 'absent',
+    LATE: 'late',
+    EXCUSED: 'excused',
+}
+TALLY = ['sessions'] + list(COLUMNS.values())
+
+
+def term_for(day):
+    term = Term.objects.filter(starts_on__lte=day, ends_on__gte=day).first()
+    if term is None:
+        raise ValueError(f'No term covers {day}')
+    return term
+
+
+def _upsert_postgresql(connection, rows):
+    qn = connection.ops.quote_name
+    meta = Attendance._meta
+    fields = ['date', 'session', 'student', 'class_room', 'status',
+              'marked_by', 'marked_at']
+    columns = [meta.get_field(name).column for name in fields]
+    values = ', '.join(['(' + ', '.join(['%s'] * len(fields)) + ')']
+                       * len(rows))
+    updates = ', '.join(f'{qn(column)} = EXCLUDED.{qn(column)}'
+                        for column in columns[3:])
+    sql = (f'INSERT INTO {qn(meta.db_table)} '
+           f'({", ".join(qn(column) for column in columns)}) '
+           f'VALUES {values} '
+           f'ON CONFLICT ({qn("student_id")}, {qn("date")}, '
+           f'{qn("session")}) DO UPDATE SET {updates}')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [getattr(row, meta.get_field(name).attname)
+                             for row in rows for name in fields])
+
+
+def _upsert_portable(rows):
+    # the same rows replaced, inside the caller's transaction
+    first = rows[0]
+    Attendance.objects.filter(
+        date=first.date, session=first.session,
+        student_id__in=[row.student_id for row in rows]).delete()
+    Attendance.objects.bulk_create(rows)
+
+
+def _add_postgresql(connection, model, keys, deltas, now):
+    # INSERT ... ON CONFLICT DO UPDATE SET present = t.present + ...; keys
+    # are the columns of the rollup's unique_together
+    qn = connection.ops.quote_name
+    values = ', '.join(
+        ['(' + ', '.join(['%s'] * (len(keys) + len(TALLY) + 1)) + ')']
+        * len(deltas))
+    updates = ', '.join(f'{qn(name)} = t.{qn(name)} + EXCLUDED.{qn(name)}'
+                        for name in TALLY)
+    sql = (f'INSERT INTO {qn(model._meta.db_table)} AS t '
+           f'({", ".join(qn(name) for name in keys + TALLY)}, '
+           f'{qn("updated_at")}) VALUES {values} '
+           f'ON CONFLICT ({", ".join(qn(name) for name in keys)}) '
+           f'DO UPDATE SET {updates}, '
+           f'{qn("updated_at")} = EXCLUDED.{qn("updated_at")}')
+    params = []
+    for key, delta in deltas.items():
+        params += list(key) + [delta[name] for name in TALLY] + [now]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _add_portable(model, keys, deltas, now):
+    for key, delta in deltas.items():
+        lookup = dict(zip(keys, key))
+        updated = model.objects.filter(**lookup).update(
+            updated_at=now,
+            **{name: F(name) + delta[name] for name in TALLY})
+        if not updated:
+            model.objects.create(**lookup, **delta)
+
+
+def _add(connection, model, keys, deltas, now):
+    deltas = {key: delta for key, delta in deltas.items()
+              if any(delta.values())}
+    if not deltas:
+        return
+    if connection.vendor == 'postgresql':
+        _add_postgresql(connection, model, keys, deltas, now)
+    else:
+        _add_portable(model, keys, deltas, now)
+
+
+def mark_class(class_room_id, day, session, statuses, user=None):
+    # statuses is {student id: status} for the exceptions, every other
+    # active student of the class is PRESENT. Marking the same session
+    # again replaces it. Returns the number of students marked.
+    if session not in dict(SESSIONS):
+        raise ValueError(f'Unknown session "{session}"')
+    unknown_statuses = set(statuses.values()) - set(dict(STATUSES))
+    if unknown_statuses:
+        raise ValueError(f'Unknown status "{unknown_statuses.pop()}"')
+
+    using = tenancy.db_alias()
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        # one marking of a class at a time, so the differences add up
+        if not ClassRoom.objects.select_for_update().filter(
+                pk=class_room_id).exists():
+            raise ValueError('No such class room')
+        term = term_for(day)
+
+        students = list(Student.objects.filter(
+            class_room_id=class_room_id, active=True)
+            .values_list('pk', flat=True))
+        strangers = set(statuses) - set(students)
+        if strangers:
+            raise ValueError(
+                f'Students {", ".join(map(str, sorted(strangers)))} are not '
+                f'active in this class room')
+        if not students:
+            return 0
+
+        previous = {
+            student_id: (status, previous_class_room)
+            for student_id, status, previous_class_room in
+            Attendance.objects.filter(
+                date=day, session=session, student_id__in=students)
+            .values_list('student_id', 'status', 'class_room_id')}
+
+        now = timezone.now()
+        rows = [Attendance(date=day, session=session, student_id=pk,
+                           class_room_id=class_room_id,
+                           status=statuses.get(pk, PRESENT),
+                           marked_by=user.pk if user else None,
+                           marked_at=now)
+                for pk in students]
+        if connection.vendor == 'postgresql':
+            _upsert_postgresql(connection, rows)
+        else:
+            _upsert_portable(rows)
+
+        def zero():
+            return dict.fromkeys(TALLY, 0)
+
+        # the raw rows outlive their class rooms, their rollups don't
+        old_class_rooms = set(ClassRoom.objects.filter(
+            pk__in={pair[1] for pair in previous.values()})
+            .values_list('pk', flat=True))
+
+        by_student = defaultdict(zero)
+        by_class_day = defaultdict(zero)
+        for row in rows:
+            if row.student_id in previous:
+                status, old_class_room = previous[row.student_id]
+                deltas = [by_student[(row.student_id, term.pk)]]
+                if old_class_room in old_class_rooms:
+                    deltas.append(by_class_day[(old_class_room, day)])
+                for delta in deltas:
+                    delta['sessions'] -= 1
+                    delta[COLUMNS[status]] -= 1
+            for delta in (by_student[(row.student_id, term.pk)],
+                          by_class_day[(class_room_id, day)]):
+                delta['sessions'] += 1
+                delta[COLUMNS[row.status]] += 1
+
+        _add(connection, StudentTermAttendance, ['student_id', 'term_id'],
+             by_student, now)
+        _add(connection, ClassDayAttendance, ['class_room_id', 'date'],
+             by_class_day, now)
+
+    return len(rows)
+
+
+def _tallies(qs):
+    return qs.annotate(
+        sessions=Count('id'),
+        **{column: Count('id', filter=Q(status=status))
+           for status, column in COLUMNS.items()})
+
+
+def rebuild(start, end):
+    # recomputes the rollups of the days from start to end (inclusive) and
+    # of the terms overlapping them from the raw rows
+    using = tenancy.db_alias()
+    with transaction.atomic(using=using):
+        terms = list(Term.objects.filter(starts_on__lte=end,
+                                         ends_on__gte=start))
+        ClassDayAttendance.objects.filter(date__range=(start, end)).delete()
+        # rows of deleted class rooms (see Attendance.class_room) still
+        # count in the students' tallies below
+        ClassDayAttendance.objects.bulk_create([
+            ClassDayAttendance(**row) for row in _tallies(
+                Attendance.objects.filter(
+                    date__range=(start, end),
+                    class_room_id__in=ClassRoom.objects.values('pk'))
+                .values('class_room_id', 'date').order_by())])
+
+        StudentTermAttendance.objects.filter(term__in=terms).delete()
+        for term in terms:
+            StudentTermAttendance.objects.bulk_create([
+                StudentTermAttendance(term=term, **row) for row in _tallies(
+                    Attendance.objects.filter(
+                        date__range=(term.starts_on, term.ends_on))
+                    .values('student_id').order_by())])
+
+    return terms
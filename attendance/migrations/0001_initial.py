@@ -0,0 +1,109 @@
+# Generated by Django 2.1.7 on 2026-10-19 18:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from people import partitions
+
+
+def create_table(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    partitions.create_partitioned_table(
+        schema_editor, Attendance, 'date',
+        indexes=[('class_room_id', 'date')],
+        unique=[('student_id', 'date', 'session')])
+
+
+def drop_table(apps, schema_editor):
+    partitions.drop_partitioned_table(
+        schema_editor, apps.get_model('attendance', 'Attendance'))
+
+
+def create_partitions(apps, schema_editor):
+    partitions.ensure_monthly_partitions(
+        'attendance_attendance', using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('people', '0008_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Attendance',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('session', models.CharField(choices=[('MORNING', 'MORNING'), ('AFTERNOON', 'AFTERNOON')], max_length=255)),
+                ('status', models.CharField(choices=[('PRESENT', 'PRESENT'), ('ABSENT', 'ABSENT'), ('LATE', 'LATE'), ('EXCUSED', 'EXCUSED')], max_length=255)),
+                ('marked_by', models.IntegerField(blank=True, null=True)),
+                ('marked_at', models.DateTimeField()),
+                ('student', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='people.Student')),
+                ('class_room', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='people.ClassRoom')),
+            ],
+            options={
+                'db_table': 'attendance_attendance',
+                'managed': False,
+                'unique_together': {('student', 'date', 'session')},
+            },
+        ),
+        migrations.RunPython(create_table, drop_table),
+        migrations.RunPython(create_partitions, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ClassDayAttendance',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sessions', models.IntegerField(default=0)),
+                ('present', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('late', models.IntegerField(default=0)),
+                ('excused', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('class_room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='people.ClassRoom')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentTermAttendance',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sessions', models.IntegerField(default=0)),
+                ('present', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('late', models.IntegerField(default=0)),
+                ('excused', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='people.Student')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Term',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('starts_on', models.DateField()),
+                ('ends_on', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['starts_on'],
+            },
+        ),
+        migrations.AddField(
+            model_name='studenttermattendance',
+            name='term',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='attendance.Term'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='studenttermattendance',
+            unique_together={('student', 'term')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='classdayattendance',
+            unique_together={('class_room', 'date')},
+        ),
+    ]
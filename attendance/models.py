@@ -0,0 +1,104 @@
+from django.db import models
+
+from people.models import ClassRoom, Student
+
+MORNING = 'MORNING'
+AFTERNOON = 'AFTERNOON'
+SESSIONS = (
+    (MORNING, MORNING),
+    (AFTERNOON, AFTERNOON),
+)
+
+PRESENT = 'PRESENT'
+ABSENT = 'ABSENT'
+LATE = 'LATE'
+EXCUSED = 'EXCUSED'
+STATUSES = (
+    (PRESENT, PRESENT),
+    (ABSENT, ABSENT),
+    (LATE, LATE),
+    (EXCUSED, EXCUSED),
+)
+
+
+class Term(models.Model):
+    # term details
+    name = models.CharField(max_length=255)
+    starts_on = models.DateField()
+    ends_on = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['starts_on']
+
+    def __str__(self):
+        return f'{self.name}'
+
+
+class Attendance(models.Model):
+    # one student in one session of one day. Written a class at a time by
+    # attendance.marking; on PostgreSQL the table is partitioned by month
+    # on `date`, see people.partitions.
+    id = models.BigAutoField(primary_key=True)
+    date = models.DateField()
+    session = models.CharField(max_length=255, choices=SESSIONS)
+    # no database constraints, partitioned tables can't be referenced
+    student = models.ForeignKey(Student, on_delete=models.CASCADE,
+                                db_constraint=False)
+    # the class the student was in that day; kept when the class room is
+    # deleted, the history of students promoted out of it stays
+    class_room = models.ForeignKey(ClassRoom, on_delete=models.DO_NOTHING,
+                                   db_constraint=False)
+    status = models.CharField(max_length=255, choices=STATUSES)
+    marked_by = models.IntegerField(null=True, blank=True)
+    marked_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'attendance_attendance'
+        unique_together = ('student', 'date', 'session')
+
+    def __str__(self):
+        return f'{self.student_id} {self.date} {self.session} {self.status}'
+
+
+class Tally(models.Model):
+    # sessions marked and how they went, kept up to date incrementally
+    sessions = models.IntegerField(default=0)
+    present = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    excused = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def attendance_rate(self):
+        # late still counts as attended
+        if not self.sessions:
+            return None
+        return (self.present + self.late) / self.sessions
+
+
+class StudentTermAttendance(Tally):
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    term = models.ForeignKey(Term, on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = ('student', 'term')
+
+    def __str__(self):
+        return f'{self.student_id} {self.term_id}'
+
+
+class ClassDayAttendance(Tally):
+    class_room = models.ForeignKey(ClassRoom, on_delete=models.CASCADE)
+    date = models.DateField()
+
+    class Meta:
+        unique_together = ('class_room', 'date')
+
+    def __str__(self):
+        return f'{self.class_room_id} {self.date}'
@@ -0,0 +1,172 @@
+import graphene
+from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+from graphql_jwt.decorators import login_required
+
+from people import audit
+from people.models import AuditEntry
+
+from . import marking
+from .models import (ABSENT, EXCUSED, LATE, Attendance, ClassDayAttendance,
+                     StudentTermAttendance, Term)
+
+
+# Term
+class TermType(DjangoObjectType):
+    class Meta:
+        model = Term
+
+
+class CreateTerm(graphene.Mutation):
+    term = graphene.Field(TermType)
+
+    class Arguments:
+        name = graphene.String(required=True)
+        starts_on = graphene.Date(required=True)
+        ends_on = graphene.Date(required=True)
+
+    @login_required
+    def mutate(self, info, name, starts_on, ends_on):
+        if ends_on < starts_on:
+            raise GraphQLError("Error! A term can't end before it starts")
+        if Term.objects.filter(starts_on__lte=ends_on,
+                               ends_on__gte=starts_on).exists():
+            raise GraphQLError("Error! Terms can't overlap")
+
+        term = Term(name=name, starts_on=starts_on, ends_on=ends_on)
+        try:
+            term.save()
+        except Exception as err:
+            raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.CREATE, term, after=audit.snapshot(term))
+
+        return CreateTerm(term=term)
+
+
+# Attendance
+class AttendanceType(DjangoObjectType):
+    class Meta:
+        model = Attendance
+
+
+class StudentTermAttendanceType(DjangoObjectType):
+    attendance_rate = graphene.Float()
+
+    class Meta:
+        model = StudentTermAttendance
+
+
+class ClassDayAttendanceType(DjangoObjectType):
+    attendance_rate = graphene.Float()
+
+    class Meta:
+        model = ClassDayAttendance
+
+
+class MarkClassAttendance(graphene.Mutation):
+    marked = graphene.Int()
+    class_day = graphene.Field(ClassDayAttendanceType)
+
+    class Arguments:
+        class_room = graphene.Int(required=True)
+        date = graphene.Date(required=True)
+        session = graphene.String(required=True)
+        # every other active student of the class is present
+        absent = graphene.List(graphene.Int)
+        late = graphene.List(graphene.Int)
+        excused = graphene.List(graphene.Int)
+
+    @login_required
+    def mutate(self,
+               info,
+               class_room,
+               date,
+               session,
+               absent=None,
+               late=None,
+               excused=None):
+        statuses = {}
+        for status, students in ((ABSENT, absent), (LATE, late),
+                                 (EXCUSED, excused)):
+            for pk in students or []:
+                if pk in statuses:
+                    raise GraphQLError(
+                        f"Error! Student {pk} is marked more than once")
+                statuses[pk] = status
+
+        try:
+            marked = marking.mark_class(class_room, date, session, statuses,
+                                        info.context.user)
+        except Exception as err:
+            raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.BULK, None, model='Attendance',
+                     changes={'class_room': class_room,
+                              'date': date.isoformat(),
+                              'session': session,
+                              'absent': absent or [],
+                              'late': late or [],
+                              'excused': excused or [],
+                              'marked': marked})
+
+        return MarkClassAttendance(
+            marked=marked,
+            class_day=ClassDayAttendance.objects.filter(
+                class_room_id=class_room, date=date).first())
+
+
+class Query(graphene.ObjectType):
+    terms = graphene.List(TermType)
+
+    # the raw rows of one class in one session
+    attendance = graphene.List(
+        AttendanceType,
+        class_room=graphene.Int(required=True),
+        date=graphene.Date(required=True),
+        session=graphene.String(),
+    )
+
+    # from the rollups, per term
+    student_attendance = graphene.List(
+        StudentTermAttendanceType,
+        student=graphene.Int(required=True),
+        term=graphene.Int(),
+    )
+
+    # from the rollups, per day
+    class_attendance = graphene.List(
+        ClassDayAttendanceType,
+        class_room=graphene.Int(required=True),
+        start_date=graphene.Date(required=True),
+        end_date=graphene.Date(required=True),
+    )
+
+    @login_required
+    def resolve_terms(self, info, **kwargs):
+        return Term.objects.all()
+
+    @login_required
+    def resolve_attendance(self, info, class_room, date, session=None,
+                           **kwargs):
+        qs = Attendance.objects.filter(class_room_id=class_room, date=date)
+        if session:
+            qs = qs.filter(session=session)
+        return qs.order_by('session', 'student_id')
+
+    @login_required
+    def resolve_student_attendance(self, info, student, term=None, **kwargs):
+        qs = StudentTermAttendance.objects.filter(student_id=student)
+        if term:
+            qs = qs.filter(term_id=term)
+        return qs.order_by('term__starts_on')
+
+    @login_required
+    def resolve_class_attendance(self, info, class_room, start_date,
+                                 end_date, **kwargs):
+        return ClassDayAttendance.objects.filter(
+            class_room_id=class_room,
+            date__range=(start_date, end_date)).order_by('date')
+
+
+class Mutation(graphene.ObjectType):
+    create_term = CreateTerm.Field()
+    mark_class_attendance = MarkClassAttendance.Field()
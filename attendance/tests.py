@@ -0,0 +1,160 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from people.models import ClassRoom, Student, Teacher
+
+from . import marking
+from .models import (ABSENT, AFTERNOON, EXCUSED, LATE, MORNING,
+                     ClassDayAttendance, StudentTermAttendance, Term)
+
+DAY = date(2026, 2, 2)
+TALLY = ('sessions', 'present', 'absent', 'late', 'excused')
+
+
+class MarkingTests(TestCase):
+    def setUp(self):
+        self.term = Term.objects.create(name='Term 1',
+                                        starts_on=date(2026, 1, 5),
+                                        ends_on=date(2026, 4, 3))
+        teacher = Teacher.objects.create(full_name='Teacher')
+        self.class_room = ClassRoom.objects.create(name='1A',
+                                                   class_teacher=teacher)
+        self.other_class_room = ClassRoom.objects.create(
+            name='1B', class_teacher=teacher)
+        self.students = [
+            Student.objects.create(full_name=f'Student {i}',
+                                   class_room=self.class_room)
+            for i in range(3)]
+        self.pks = [student.pk for student in self.students]
+
+    def _student(self, pk):
+        tally = StudentTermAttendance.objects.get(student_id=pk,
+                                                  term=self.term)
+        return tuple(getattr(tally, column) for column in TALLY)
+
+    def _class_day(self, class_room, day=DAY):
+        tally = ClassDayAttendance.objects.filter(
+            class_room=class_room, date=day).first()
+        if tally is None:
+            return None
+        return tuple(getattr(tally, column) for column in TALLY)
+
+    def _tallies(self):
+        return (sorted(StudentTermAttendance.objects.values_list(
+                    'student_id', 'term_id', *TALLY)),
+                sorted(ClassDayAttendance.objects.values_list(
+                    'class_room_id', 'date', *TALLY)))
+
+    def test_marking_adds_to_the_tallies(self):
+        marking.mark_class(self.class_room.pk, DAY, MORNING,
+                           {self.pks[1]: ABSENT})
+
+        self.assertEqual(self._student(self.pks[0]), (1, 1, 0, 0, 0))
+        self.assertEqual(self._student(self.pks[1]), (1, 0, 1, 0, 0))
+        self.assertEqual(self._class_day(self.class_room), (3, 2, 1, 0, 0))
+
+    def test_remarking_moves_the_tallies_by_the_difference(self):
+        marking.mark_class(self.class_room.pk, DAY, MORNING,
+                           {self.pks[1]: ABSENT})
+        marking.mark_class(self.class_room.pk, DAY, MORNING,
+                           {self.pks[0]: LATE, self.pks[2]: EXCUSED})
+
+        # the same session counts once
+        self.assertEqual(self._student(self.pks[0]), (1, 0, 0, 1, 0))
+        self.assertEqual(self._student(self.pks[1]), (1, 1, 0, 0, 0))
+        self.assertEqual(self._student(self.pks[2]), (1, 0, 0, 0, 1))
+        self.assertEqual(self._class_day(self.class_room), (3, 1, 0, 1, 1))
+
+    def test_other_sessions_add_up(self):
+        marking.mark_class(self.class_room.pk, DAY, MORNING, {})
+        marking.mark_class(self.class_room.pk, DAY, AFTERNOON,
+                           {self.pks[0]: ABSENT})
+
+        self.assertEqual(self._student(self.pks[0]), (2, 1, 1, 0, 0))
+        self.assertEqual(self._class_day(self.class_room), (6, 5, 1, 0, 0))
+
+    def test_remarking_after_a_change_of_class(self):
+        marking.mark_class(self.class_room.pk, DAY, MORNING,
+                           {self.pks[0]: ABSENT})
+        Student.objects.filter(pk=self.pks[0]).update(
+            class_room=self.other_class_room)
+        marking.mark_class(self.other_class_room.pk, DAY, MORNING, {})
+
+        # the session moves from the old class's day to the new one's
+        self.assertEqual(self._student(self.pks[0]), (1, 1, 0, 0, 0))
+        self.assertEqual(self._class_day(self.class_room), (2, 2, 0, 0, 0))
+        self.assertEqual(self._class_day(self.other_class_room),
+                         (1, 1, 0, 0, 0))
+
+    def test_rebuild_matches_incremental_marking(self):
+        days = [date(2026, 2, day) for day in (2, 3, 4)]
+        for n, day in enumerate(days):
+            marking.mark_class(self.class_room.pk, day, MORNING,
+                               {self.pks[n]: ABSENT})
+            marking.mark_class(self.class_room.pk, day, AFTERNOON,
+                               {self.pks[0]: LATE})
+        # re-marked, and marked after a change of class
+        marking.mark_class(self.class_room.pk, days[0], MORNING,
+                           {self.pks[2]: EXCUSED})
+        Student.objects.filter(pk=self.pks[1]).update(
+            class_room=self.other_class_room)
+        marking.mark_class(self.other_class_room.pk, days[1], AFTERNOON,
+                           {self.pks[1]: ABSENT})
+        incremental = self._tallies()
+
+        call_command('rebuild_attendance', term=self.term.pk,
+                     stdout=StringIO())
+
+        self.assertEqual(self._tallies(), incremental)
+
+    def test_unknown_student_is_refused(self):
+        stranger = Student.objects.create(full_name='Stranger',
+                                          class_room=self.other_class_room)
+
+        with self.assertRaises(ValueError):
+            marking.mark_class(self.class_room.pk, DAY, MORNING,
+                               {stranger.pk: ABSENT})
+        self.assertIsNone(self._class_day(self.class_room))
+
+    def test_deleted_class_room_is_left_out_of_the_rollups(self):
+        marking.mark_class(self.class_room.pk, DAY, MORNING, {})
+        Student.objects.filter(pk__in=self.pks).update(
+            class_room=self.other_class_room)
+        self.class_room.delete()
+
+        # re-marked in the new class, then rebuilt from the raw rows; the
+        # ones that still name the deleted class room count for the
+        # students only
+        marking.mark_class(self.other_class_room.pk, DAY, MORNING,
+                           {self.pks[0]: ABSENT})
+        incremental = self._tallies()
+        call_command('rebuild_attendance', term=self.term.pk,
+                     stdout=StringIO())
+
+        self.assertEqual(self._tallies(), incremental)
+        self.assertEqual(self._student(self.pks[0]), (1, 0, 1, 0, 0))
+        self.assertEqual(self._class_day(self.other_class_room),
+                         (3, 2, 1, 0, 0))
+        self.assertEqual(
+            list(ClassDayAttendance.objects.values_list('class_room_id',
+                                                        flat=True)),
+            [self.other_class_room.pk])
+
+    def test_rebuild_after_deleting_a_class_room(self):
+        marking.mark_class(self.class_room.pk, DAY, MORNING, {})
+        moved = Student.objects.create(full_name='Moved',
+                                       class_room=self.other_class_room)
+        marking.mark_class(self.other_class_room.pk, DAY, MORNING, {})
+        Student.objects.filter(pk=moved.pk).update(class_room=self.class_room)
+        self.other_class_room.delete()
+
+        call_command('rebuild_attendance', term=self.term.pk,
+                     stdout=StringIO())
+
+        # the moved student's own tally still counts the session
+        self.assertEqual(self._student(moved.pk), (1, 1, 0, 0, 0))
+        self.assertEqual(self._class_day(self.class_room), (3, 3, 0, 0, 0))
+        self.assertEqual(ClassDayAttendance.objects.count(), 1)
@@ -0,0 +1,43 @@
+from django.contrib import admin
+
+from .models import Exam, ExamResult, ReportCard, SubjectMean
+
+
+class ExamModel(admin.ModelAdmin):
+    list_display = ('name', 'term', 'sat_on', 'out_of', 'ranked_at')
+    list_filter = ('term', )
+    readonly_fields = ('ranked_at', )
+
+
+class ExamResultModel(admin.ModelAdmin):
+    list_display = ('exam', 'student', 'subject', 'score')
+    list_filter = ('exam', 'subject')
+    raw_id_fields = ('student', )
+
+
+class ReportCardModel(admin.ModelAdmin):
+    # written by `generate_report_cards` jobs, see exams.ranking
+    list_display = ('exam', 'student', 'class_room', 'total', 'mean',
+                    'class_position', 'stream_position')
+    list_filter = ('exam', 'class_room')
+    readonly_fields = list_display + ('subjects_sat', 'class_size',
+                                      'stream_size', 'subjects',
+                                      'generated_at')
+
+    def has_add_permission(self, request):
+        return False
+
+
+class SubjectMeanModel(admin.ModelAdmin):
+    list_display = ('exam', 'class_room', 'subject', 'mean', 'results')
+    list_filter = ('exam', 'class_room')
+    readonly_fields = list_display
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(Exam, ExamModel)
+admin.site.register(ExamResult, ExamResultModel)
+admin.site.register(ReportCard, ReportCardModel)
+admin.site.register(SubjectMean, SubjectMeanModel)
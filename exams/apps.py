@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class ExamsConfig(AppConfig):
+    name = 'exams'
+
+    def ready(self):
+        # connects the background job handlers
+        from . import tasks  # noqa F401
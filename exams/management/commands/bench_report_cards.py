@@ -0,0 +1,81 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from exams import ranking
+from exams.models import Exam, ExamResult
+from people.models import ClassRoom, Student, Subject, Teacher
+from school import tenancy
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Times generating the report cards of a made up exam '
+            '(exams.ranking) for a school of --levels x --streams class '
+            'rooms. Everything is rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--levels', type=int, default=4)
+        parser.add_argument('--streams', type=int, default=4,
+                            help='Class rooms per level.')
+        parser.add_argument('--students', type=int, default=45,
+                            help='Students per class room.')
+        parser.add_argument('--subjects', type=int, default=12)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic(using=tenancy.db_alias()):
+                exam = self.create(options)
+                self.measure(exam, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create(self, options):
+        random.seed(0)
+        suffix = time.time()
+        teacher = Teacher.objects.create(full_name='Bench Teacher')
+        subjects = [Subject.objects.create(name=f'Bench Subject {i}')
+                    for i in range(options['subjects'])]
+        exam = Exam.objects.create(name=f'Bench {suffix}')
+
+        for level in range(1, options['levels'] + 1):
+            for stream in range(options['streams']):
+                class_room = ClassRoom.objects.create(
+                    name=f'Bench {suffix} {level}{stream}',
+                    class_teacher=teacher, level=level)
+                Student.objects.bulk_create([
+                    Student(full_name=f'Student {i}', class_room=class_room)
+                    for i in range(options['students'])])
+
+        students = Student.objects.filter(
+            class_room__name__startswith=f'Bench {suffix} ')
+        ExamResult.objects.bulk_create([
+            ExamResult(exam=exam, student_id=student, subject=subject,
+                       score=random.randint(0, 100))
+            for student in students.values_list('pk', flat=True)
+            for subject in subjects])
+        return exam
+
+    def measure(self, exam, repeat):
+        results = ExamResult.objects.filter(exam=exam).count()
+        vendor = connections[tenancy.db_alias()].vendor
+        self.stdout.write(f'{results} results, {repeat} runs on {vendor}')
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cards = ranking.generate(exam.pk)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(
+            f'{cards} report cards   median '
+            f'{statistics.median(timings):9.1f} ms   fastest '
+            f'{min(timings):9.1f} ms')
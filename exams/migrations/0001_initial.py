@@ -0,0 +1,93 @@
+# Generated by Django 2.1.7 on 2026-10-19 18:16
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('attendance', '0001_initial'),
+        ('people', '0009_classroom_level'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Exam',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('sat_on', models.DateField(blank=True, null=True)),
+                ('out_of', models.PositiveSmallIntegerField(default=100)),
+                ('ranked_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('term', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='attendance.Term')),
+            ],
+            options={
+                'ordering': ['-sat_on', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExamResult',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.DecimalField(decimal_places=1, max_digits=5)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.Exam')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='people.Student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='people.Subject')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReportCard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.DecimalField(decimal_places=1, max_digits=7)),
+                ('mean', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('subjects_sat', models.PositiveSmallIntegerField()),
+                ('class_position', models.PositiveIntegerField()),
+                ('class_size', models.PositiveIntegerField()),
+                ('stream_position', models.PositiveIntegerField(blank=True, null=True)),
+                ('stream_size', models.PositiveIntegerField(blank=True, null=True)),
+                ('subjects', django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+                ('generated_at', models.DateTimeField()),
+                ('class_room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='people.ClassRoom')),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.Exam')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='people.Student')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SubjectMean',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mean', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('results', models.PositiveIntegerField()),
+                ('class_room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='people.ClassRoom')),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.Exam')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='people.Subject')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='subjectmean',
+            unique_together={('exam', 'class_room', 'subject')},
+        ),
+        migrations.AddIndex(
+            model_name='reportcard',
+            index=models.Index(fields=['exam', 'class_room', 'class_position'], name='exams_repor_exam_id_6e7a84_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='reportcard',
+            unique_together={('exam', 'student')},
+        ),
+        migrations.AddIndex(
+            model_name='examresult',
+            index=models.Index(fields=['exam', 'subject'], name='exams_examr_exam_id_09083b_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='examresult',
+            unique_together={('exam', 'student', 'subject')},
+        ),
+    ]
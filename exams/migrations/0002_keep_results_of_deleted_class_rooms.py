@@ -0,0 +1,24 @@
+# Generated by Django 2.1.7 on 2026-10-19 18:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportcard',
+            name='class_room',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='people.ClassRoom'),
+        ),
+        migrations.AlterField(
+            model_name='subjectmean',
+            name='class_room',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='people.ClassRoom'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+from django.contrib.postgres.fields import JSONField
+from django.db import models
+
+from attendance.models import Term
+from people.models import ClassRoom, Student, Subject
+
+
+class Exam(models.Model):
+    # exam details
+    name = models.CharField(max_length=255)
+    term = models.ForeignKey(Term, on_delete=models.SET_NULL, null=True,
+                             blank=True)
+    sat_on = models.DateField(null=True, blank=True)
+    out_of = models.PositiveSmallIntegerField(default=100)
+    # when the report cards were last generated, see exams.ranking
+    ranked_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-sat_on', '-id']
+
+    def __str__(self):
+        return f'{self.name}'
+
+
+class ExamResult(models.Model):
+    # one student's score in one subject of one exam
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+    score = models.DecimalField(max_digits=5, decimal_places=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('exam', 'student', 'subject')
+        indexes = [
+            # the scores of a subject, as entered and ranked
+            models.Index(fields=['exam', 'subject']),
+        ]
+
+    def __str__(self):
+        return f'{self.exam_id} {self.student_id} {self.subject_id}'
+
+
+class ReportCard(models.Model):
+    # a student's standing in one exam, written in bulk by exams.ranking
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    # the class the student was in when the exam was ranked; emptied, not
+    # deleted, with the class room so past results survive
+    class_room = models.ForeignKey(ClassRoom, on_delete=models.SET_NULL,
+                                   null=True, blank=True)
+    total = models.DecimalField(max_digits=7, decimal_places=1)
+    mean = models.DecimalField(max_digits=5, decimal_places=2)
+    subjects_sat = models.PositiveSmallIntegerField()
+    class_position = models.PositiveIntegerField()
+    class_size = models.PositiveIntegerField()
+    # across the class rooms of the same level, empty without a level
+    stream_position = models.PositiveIntegerField(null=True, blank=True)
+    stream_size = models.PositiveIntegerField(null=True, blank=True)
+    # [{subject, name, score, position, class_mean}]
+    subjects = JSONField(default=list)
+    generated_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('exam', 'student')
+        indexes = [
+            models.Index(fields=['exam', 'class_room', 'class_position']),
+        ]
+
+    def __str__(self):
+        return f'{self.exam_id} {self.student_id}'
+
+
+class SubjectMean(models.Model):
+    # a class room's mean score in one subject of one exam
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE)
+    # see ReportCard.class_room
+    class_room = models.ForeignKey(ClassRoom, on_delete=models.SET_NULL,
+                                   null=True, blank=True)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+    mean = models.DecimalField(max_digits=5, decimal_places=2)
+    results = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('exam', 'class_room', 'subject')
+
+    def __str__(self):
+        return f'{self.exam_id} {self.class_room_id} {self.subject_id}'
@@ -0,0 +1,169 @@
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, Sum, Window
+from django.db.models.functions import Rank
+from django.utils import timezone
+
+from people import jobs
+from people.models import Student, Subject
+from school import tenancy
+
+from .models import Exam, ExamResult, ReportCard, SubjectMean
+
+# Positions come from RANK() OVER (PARTITION BY ...) so the database
+# ranks a whole exam in a couple of queries instead of Python sorting
+# every class and subject. Equal totals share a position (1, 1, 3).
+# Report cards and subject means of an exam are replaced in bulk each
+# time it's ranked.
+
+
+def _places(value, places='0.01'):
+    # averages come back as Decimal on PostgreSQL, float on SQLite
+    return Decimal(str(value)).quantize(Decimal(places))
+
+
+def _totals(exam):
+    # one row per student with their class and stream positions
+    return (ExamResult.objects.filter(exam=exam)
+            .values('student_id',
+                    class_room_id=F('student__class_room_id'),
+                    level=F('student__class_room__level'))
+            .annotate(total=Sum('score'),
+                      mean=Avg('score'),
+                      subjects_sat=Count('id'))
+            .annotate(
+                class_position=Window(
+                    Rank(),
+                    partition_by=[F('student__class_room_id')],
+                    order_by=F('total').desc()),
+                stream_position=Window(
+                    Rank(),
+                    partition_by=[F('student__class_room__level')],
+                    order_by=F('total').desc()))
+            .order_by())
+
+
+def _scores(exam):
+    # one row per result with its position in the subject, in the class
+    return (ExamResult.objects.filter(exam=exam)
+            .values('student_id', 'subject_id', 'score',
+                    class_room_id=F('student__class_room_id'))
+            .annotate(position=Window(
+                Rank(),
+                partition_by=[F('student__class_room_id'), F('subject_id')],
+                order_by=F('score').desc()))
+            .order_by('subject_id'))
+
+
+def _subject_means(exam):
+    return (ExamResult.objects.filter(exam=exam)
+            .values('subject_id', class_room_id=F('student__class_room_id'))
+            .annotate(mean=Avg('score'), results=Count('id'))
+            .order_by())
+
+
+def generate(exam_id, job=None):
+    # (re)writes the report cards and subject means of an exam, returns
+    # the number of report cards
+    using = tenancy.db_alias()
+    with transaction.atomic(using=using):
+        # one ranking of an exam at a time
+        exam = Exam.objects.select_for_update().filter(pk=exam_id).first()
+        if exam is None:
+            raise ValueError('No such exam')
+
+        totals = list(_totals(exam))
+        if job:
+            jobs.set_progress(job, 0, total=len(totals))
+
+        means = list(_subject_means(exam))
+        class_means = {(row['class_room_id'], row['subject_id']):
+                       _places(row['mean']) for row in means}
+        names = dict(Subject.objects.filter(
+            pk__in={row['subject_id'] for row in means})
+            .values_list('pk', 'name'))
+
+        subjects = defaultdict(list)
+        for row in _scores(exam):
+            subjects[row['student_id']].append({
+                'subject': row['subject_id'],
+                'name': names.get(row['subject_id']),
+                'score': float(row['score']),
+                'position': row['position'],
+                'class_mean': float(class_means[
+                    (row['class_room_id'], row['subject_id'])]),
+            })
+
+        class_sizes = Counter(row['class_room_id'] for row in totals)
+        stream_sizes = Counter(row['level'] for row in totals)
+        now = timezone.now()
+        cards = [
+            ReportCard(
+                exam=exam,
+                student_id=row['student_id'],
+                class_room_id=row['class_room_id'],
+                total=_places(row['total'], '0.1'),
+                mean=_places(row['mean']),
+                subjects_sat=row['subjects_sat'],
+                class_position=row['class_position'],
+                class_size=class_sizes[row['class_room_id']],
+                stream_position=(row['stream_position']
+                                 if row['level'] is not None else None),
+                stream_size=(stream_sizes[row['level']]
+                             if row['level'] is not None else None),
+                subjects=subjects[row['student_id']],
+                generated_at=now)
+            for row in totals]
+
+        ReportCard.objects.filter(exam=exam).delete()
+        ReportCard.objects.bulk_create(cards)
+        SubjectMean.objects.filter(exam=exam).delete()
+        SubjectMean.objects.bulk_create([
+            SubjectMean(exam=exam,
+                        class_room_id=row['class_room_id'],
+                        subject_id=row['subject_id'],
+                        mean=class_means[
+                            (row['class_room_id'], row['subject_id'])],
+                        results=row['results'])
+            for row in means])
+
+        Exam.objects.filter(pk=exam.pk).update(ranked_at=now,
+                                               updated_at=now)
+        if job:
+            jobs.set_progress(job, len(cards))
+
+    return len(cards)
+
+
+def record(exam_id, subject_id, scores):
+    # scores is {student id: score}; replaces those students' results in
+    # the subject. Returns the number of results written.
+    using = tenancy.db_alias()
+    with transaction.atomic(using=using):
+        exam = Exam.objects.filter(pk=exam_id).first()
+        if exam is None:
+            raise ValueError('No such exam')
+        if not Subject.objects.filter(pk=subject_id).exists():
+            raise ValueError('No such subject')
+        strangers = set(scores) - set(Student.objects.filter(
+            pk__in=list(scores)).values_list('pk', flat=True))
+        if strangers:
+            raise ValueError(
+                f'Unknown students {", ".join(map(str, sorted(strangers)))}')
+        for student_id, score in scores.items():
+            if not 0 <= score <= exam.out_of:
+                raise ValueError(f'Score {score} of student {student_id} '
+                                 f'is not between 0 and {exam.out_of}')
+
+        ExamResult.objects.filter(
+            exam=exam, subject_id=subject_id,
+            student_id__in=list(scores)).delete()
+        ExamResult.objects.bulk_create([
+            ExamResult(exam=exam, subject_id=subject_id,
+                       student_id=student_id,
+                       score=_places(score, '0.1'))
+            for student_id, score in scores.items()])
+
+    return len(scores)
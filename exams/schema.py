@@ -0,0 +1,236 @@
+import graphene
+from django.db.models import F
+from graphene.types.resolver import dict_resolver
+from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+from graphql_jwt.decorators import login_required
+
+from people import audit, jobs
+from people.models import AuditEntry
+from people.schema import JobType
+
+from . import ranking
+from .models import Exam, ExamResult, ReportCard, SubjectMean
+
+
+# Exam
+class ExamType(DjangoObjectType):
+    class Meta:
+        model = Exam
+
+
+class CreateExam(graphene.Mutation):
+    exam = graphene.Field(ExamType)
+
+    class Arguments:
+        name = graphene.String(required=True)
+        term = graphene.Int()
+        sat_on = graphene.Date()
+        out_of = graphene.Int()
+
+    @login_required
+    def mutate(self, info, name, term=None, sat_on=None, out_of=100):
+        if out_of <= 0:
+            raise GraphQLError("Error! An exam must be out of more than 0")
+
+        exam = Exam(name=name, term_id=term, sat_on=sat_on, out_of=out_of)
+        try:
+            exam.save()
+        except Exception as err:
+            raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.CREATE, exam, after=audit.snapshot(exam))
+
+        return CreateExam(exam=exam)
+
+
+# Results
+class ExamResultType(DjangoObjectType):
+    class Meta:
+        model = ExamResult
+
+
+class ScoreInput(graphene.InputObjectType):
+    student = graphene.Int(required=True)
+    score = graphene.Float(required=True)
+
+
+class RecordExamResults(graphene.Mutation):
+    recorded = graphene.Int()
+
+    class Arguments:
+        exam = graphene.Int(required=True)
+        subject = graphene.Int(required=True)
+        scores = graphene.List(ScoreInput, required=True)
+
+    @login_required
+    def mutate(self, info, exam, subject, scores):
+        by_student = {}
+        for entry in scores:
+            if entry.student in by_student:
+                raise GraphQLError(
+                    f"Error! Student {entry.student} is scored more than "
+                    f"once")
+            by_student[entry.student] = entry.score
+
+        try:
+            recorded = ranking.record(exam, subject, by_student)
+        except Exception as err:
+            raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.BULK, None, model='ExamResult',
+                     changes={'exam': exam,
+                              'subject': subject,
+                              'scores': {str(student): score for
+                                         student, score in by_student.items()},
+                              'recorded': recorded})
+
+        return RecordExamResults(recorded=recorded)
+
+
+# Report cards
+class ReportCardSubjectType(graphene.ObjectType):
+    # the entries of ReportCard.subjects
+    class Meta:
+        default_resolver = dict_resolver
+
+    subject = graphene.Int()
+    name = graphene.String()
+    score = graphene.Float()
+    position = graphene.Int()
+    class_mean = graphene.Float()
+
+
+class ReportCardType(DjangoObjectType):
+    subjects = graphene.List(ReportCardSubjectType)
+
+    class Meta:
+        model = ReportCard
+
+
+class SubjectMeanType(DjangoObjectType):
+    class Meta:
+        model = SubjectMean
+
+
+class GenerateReportCards(graphene.Mutation):
+    # ranking a whole school takes a while, the report cards are written
+    # by a `generate_report_cards` job
+    job = graphene.Field(JobType)
+
+    class Arguments:
+        exam = graphene.Int(required=True)
+
+    @login_required
+    def mutate(self, info, exam):
+        if not Exam.objects.filter(pk=exam).exists():
+            raise GraphQLError(f"Error! No such exam {exam}")
+
+        try:
+            job = jobs.enqueue('generate_report_cards', {'exam': exam},
+                               user=info.context.user)
+        except Exception as err:
+            raise GraphQLError(f"Error! {str(err)}")
+
+        return GenerateReportCards(job=job)
+
+
+class Query(graphene.ObjectType):
+    exams = graphene.List(ExamType, term=graphene.Int())
+
+    exam_results = graphene.List(
+        ExamResultType,
+        exam=graphene.Int(required=True),
+        class_room=graphene.Int(),
+        student=graphene.Int(),
+        subject=graphene.Int(),
+    )
+
+    # as of the exam's last ranking, best first
+    report_cards = graphene.List(
+        ReportCardType,
+        exam=graphene.Int(required=True),
+        class_room=graphene.Int(),
+        level=graphene.Int(),
+        first=graphene.Int(),
+        skip=graphene.Int(),
+    )
+
+    report_card = graphene.Field(
+        ReportCardType,
+        exam=graphene.Int(required=True),
+        student=graphene.Int(required=True),
+    )
+
+    subject_means = graphene.List(
+        SubjectMeanType,
+        exam=graphene.Int(required=True),
+        class_room=graphene.Int(),
+    )
+
+    @login_required
+    def resolve_exams(self, info, term=None, **kwargs):
+        qs = Exam.objects.all()
+        if term:
+            qs = qs.filter(term_id=term)
+        return qs
+
+    @login_required
+    def resolve_exam_results(self,
+                             info,
+                             exam,
+                             class_room=None,
+                             student=None,
+                             subject=None,
+                             **kwargs):
+        qs = ExamResult.objects.filter(exam_id=exam)
+        if class_room:
+            qs = qs.filter(student__class_room_id=class_room)
+        if student:
+            qs = qs.filter(student_id=student)
+        if subject:
+            qs = qs.filter(subject_id=subject)
+        return qs.order_by('subject_id', '-score', 'student_id')
+
+    @login_required
+    def resolve_report_cards(self,
+                             info,
+                             exam,
+                             class_room=None,
+                             level=None,
+                             first=None,
+                             skip=None,
+                             **kwargs):
+        qs = ReportCard.objects.filter(exam_id=exam)
+        if class_room:
+            qs = qs.filter(class_room_id=class_room)
+            qs = qs.order_by('class_position', 'student_id')
+        else:
+            if level:
+                qs = qs.filter(class_room__level=level)
+            qs = qs.order_by(F('stream_position').asc(nulls_last=True),
+                             'class_position', 'student_id')
+
+        if skip:
+            qs = qs[skip:]
+
+        if first:
+            qs = qs[:first]
+
+        return qs
+
+    @login_required
+    def resolve_report_card(self, info, exam, student, **kwargs):
+        return ReportCard.objects.filter(exam_id=exam,
+                                         student_id=student).first()
+
+    @login_required
+    def resolve_subject_means(self, info, exam, class_room=None, **kwargs):
+        qs = SubjectMean.objects.filter(exam_id=exam)
+        if class_room:
+            qs = qs.filter(class_room_id=class_room)
+        return qs.order_by('class_room_id', '-mean')
+
+
+class Mutation(graphene.ObjectType):
+    create_exam = CreateExam.Field()
+    record_exam_results = RecordExamResults.Field()
+    generate_report_cards = GenerateReportCards.Field()
@@ -0,0 +1,8 @@
+from people.jobs import job
+
+from . import ranking
+
+
+@job('generate_report_cards')
+def generate_report_cards(job, exam):
+    return {'report_cards': ranking.generate(exam, job=job)}
@@ -0,0 +1,37 @@
+# gunicorn settings, see the Procfile
+import os
+import shutil
+import tempfile
+
+# workers write their metrics here and /metrics adds them up, see
+# school.metrics. Has to be set before the app (and prometheus_client)
+# is imported; samples of a previous run are thrown away.
+multiproc_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(tempfile.gettempdir(), 'school-metrics'))
+shutil.rmtree(multiproc_dir, ignore_errors=True)
+os.makedirs(multiproc_dir)
+
+# import the app (and run school.warmup) once in the master, so workers
+# fork ready to serve instead of each paying the cold start
+preload_app = True
+
+
+def post_fork(server, worker):
+    # the warm-up shouldn't touch the database, but a connection opened
+    # in the master must never be shared between workers
+    from django.db import connections
+    connections.close_all()
+
+
+def worker_exit(server, worker):
+    # write out audit entries still waiting in the buffer
+    from people import audit
+    audit.flush()
+
+
+def child_exit(server, worker):
+    # a dead worker's gauges must no longer count towards /metrics
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
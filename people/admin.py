@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from .models import Guardian, Teacher, Student, Subject, ClassRoom
+from .models import (Guardian, Teacher, Student, Subject, ClassRoom,
+                     CascadeDelete, Job, AuditEntry, SlowQuery,
+                     DuplicateGuardian)
 
 
 class GuardianModel(admin.ModelAdmin):
@@ -100,8 +102,104 @@ class ClassModel(admin.ModelAdmin):
     pass
 
 
+class CascadeDeleteModel(admin.ModelAdmin):
+    list_display = (
+        'target_name',
+        'target',
+        'status',
+        'students',
+        'deleted_students',
+        'created_at',
+    )
+
+    list_filter = ('target', 'status')
+
+
+class JobModel(admin.ModelAdmin):
+    list_display = (
+        'kind',
+        'status',
+        'progress',
+        'total',
+        'attempts',
+        'worker',
+        'created_at',
+    )
+
+    list_filter = ('kind', 'status')
+
+
+class AuditEntryModel(admin.ModelAdmin):
+    list_display = (
+        'occurred_at',
+        'username',
+        'operation',
+        'model',
+        'object_id',
+        'action',
+    )
+
+    list_filter = ('action', 'model')
+    search_fields = ('username', 'operation')
+
+    # the table is append-only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class SlowQueryModel(admin.ModelAdmin):
+    list_display = (
+        'recorded_at',
+        'duration_ms',
+        'operation',
+        'path',
+        'explained',
+    )
+
+    list_filter = ('operation', )
+    search_fields = ('sql', 'path')
+    readonly_fields = ('recorded_at', 'duration_ms', 'operation', 'path',
+                       'sql', 'params', 'plan')
+
+    def explained(self, obj):
+        return bool(obj.plan)
+    explained.boolean = True
+
+    def has_add_permission(self, request):
+        return False
+
+
+class DuplicateGuardianModel(admin.ModelAdmin):
+    # found by people.dedup, merged through the mergeGuardians mutation
+    list_display = (
+        'guardian',
+        'other',
+        'score',
+        'reasons',
+        'status',
+        'found_at',
+    )
+
+    list_filter = ('status', )
+    readonly_fields = ('guardian', 'other', 'score', 'reasons', 'found_at')
+
+    def has_add_permission(self, request):
+        return False
+
+
 admin.site.register(Guardian, GuardianModel)
 admin.site.register(Teacher, TeacherModel)
 admin.site.register(Student, StudentModel)
 admin.site.register(Subject, SubjectModel)
 admin.site.register(ClassRoom, ClassModel)
+admin.site.register(CascadeDelete, CascadeDeleteModel)
+admin.site.register(Job, JobModel)
+admin.site.register(AuditEntry, AuditEntryModel)
+admin.site.register(SlowQuery, SlowQueryModel)
+admin.site.register(DuplicateGuardian, DuplicateGuardianModel)
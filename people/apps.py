@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class PeopleConfig(AppConfig):
     name = 'people'
+
+    def ready(self):
+        # connects the signal receivers, background job handlers and the
+        # slow query log
+        from . import signals, slow_queries, tasks  # noqa F401
+        from . import partitions
+        from .models import AuditEntry
+
+        partitions.register(AuditEntry._meta.db_table)
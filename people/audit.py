@@ -0,0 +1,182 @@
+import atexit
+import datetime
+import decimal
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from school import tenancy
+
+from .cursors import decode_cursor, encode_cursor
+from .models import AuditEntry
+
+logger = logging.getLogger(__name__)
+
+# never written to the log, only whether they changed
+SECRET = {'password'}
+# changes on every write or only follows other columns (lookup keys, see
+# people.normalize), not worth an entry of its own
+IGNORED = {'updated_at', 'last_login', 'phone_key', 'id_number_key'}
+
+
+def _json(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def snapshot(instance, m2m=()):
+    # json friendly field values, foreign keys as ids
+    data = {}
+    for field in instance._meta.concrete_fields:
+        if field.name in IGNORED:
+            continue
+        data[field.name] = _json(field.value_from_object(instance))
+    for name in m2m:
+        data[name] = sorted(
+            getattr(instance, name).values_list('pk', flat=True))
+    return data
+
+
+def diff(before, after):
+    before, after = before or {}, after or {}
+    changes = {}
+    for name in sorted(set(before) | set(after)):
+        old, new = before.get(name), after.get(name)
+        if old == new:
+            continue
+        if name in SECRET:
+            old, new = '***' if old else None, '***' if new else None
+        changes[name] = [old, new]
+    return changes
+
+
+class AuditBuffer:
+    # entries are kept in memory and written with one bulk insert once
+    # AUDIT_FLUSH_SIZE of them are waiting or AUDIT_FLUSH_INTERVAL seconds
+    # after the first one came in, whichever is sooner. Each entry goes to
+    # the database (school) it was recorded in.
+    def __init__(self):
+        self.entries = []
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def add(self, entry, using):
+        with self.lock:
+            self.entries.append((using, entry))
+            full = len(self.entries) >= settings.AUDIT_FLUSH_SIZE
+            if not full and self.timer is None:
+                self.timer = threading.Timer(settings.AUDIT_FLUSH_INTERVAL,
+                                             self._flush_from_timer)
+                self.timer.daemon = True
+                self.timer.start()
+
+        if full:
+            self.flush()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # the timer thread has connections of its own
+            connections.close_all()
+
+    def flush(self):
+        using = tenancy.db_alias()
+        if connections[using].in_atomic_block:
+            # don't let a rollback of the current request take the whole
+            # batch with it
+            transaction.on_commit(self.flush, using=using)
+            return
+
+        with self.lock:
+            entries, self.entries = self.entries, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+        by_database = {}
+        for using, entry in entries:
+            by_database.setdefault(using, []).append(entry)
+
+        for using, batch in by_database.items():
+            try:
+                AuditEntry.objects.using(using).bulk_create(
+                    batch, batch_size=500)
+            except Exception:
+                logger.exception('Lost %s audit entries', len(batch))
+
+
+buffer = AuditBuffer()
+# gunicorn.conf.py flushes on worker exit too, this covers everything else
+atexit.register(buffer.flush)
+
+
+def flush():
+    buffer.flush()
+
+
+def record(info, action, instance, before=None, after=None, model=None,
+           changes=None):
+    if changes is None:
+        changes = diff(before, after)
+        if action == AuditEntry.UPDATE and not changes:
+            return
+
+    object_id = None
+    if instance is not None:
+        # a deleted instance has lost its pk already
+        object_id = instance.pk or (before or {}).get('id')
+
+    user = getattr(info.context, 'user', None)
+    if user is not None and not user.is_authenticated:
+        user = None
+
+    buffer.add(AuditEntry(
+        occurred_at=timezone.now(),
+        user_id=user.pk if user else None,
+        username=user.get_username() if user else None,
+        operation=info.field_name,
+        model=model or type(instance).__name__,
+        object_id=object_id,
+        action=action,
+        changes=changes), tenancy.db_alias())
+
+
+def history(model=None, object_id=None, user_id=None, operation=None,
+            cursor=None, first=None):
+    # newest first, keyset paged on (occurred_at, id) so deep pages stay
+    # as cheap as the first one
+    first = min(first or settings.AUDIT_PAGE_SIZE,
+                settings.AUDIT_MAX_PAGE_SIZE)
+    qs = AuditEntry.objects.all()
+    if model:
+        qs = qs.filter(model=model)
+    if object_id is not None:
+        qs = qs.filter(object_id=object_id)
+    if user_id is not None:
+        qs = qs.filter(user_id=user_id)
+    if operation:
+        qs = qs.filter(operation=operation)
+
+    if cursor:
+        position = decode_cursor(cursor)
+        occurred_at = parse_datetime(position[0])
+        qs = qs.filter(Q(occurred_at__lt=occurred_at)
+                       | Q(occurred_at=occurred_at, pk__lt=position[1]))
+
+    entries = list(qs.order_by('-occurred_at', '-pk')[:first + 1])
+    has_more = len(entries) > first
+    entries = entries[:first]
+    if entries:
+        last = entries[-1]
+        cursor = encode_cursor([last.occurred_at.isoformat(), last.pk])
+
+    return entries, cursor, has_more
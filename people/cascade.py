@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CASCADE, F
+from django.utils import timezone
+
+from school import tenancy
+
+from . import jobs
+from .models import CascadeDelete, ClassRoom, Student, Teacher
+
+# counted on their own by blast_radius
+COUNTED = (ClassRoom, Student, Student.guardians.through)
+
+
+def _class_rooms(target, target_id):
+    if target == CascadeDelete.TEACHER:
+        return ClassRoom.objects.filter(class_teacher_id=target_id)
+    return ClassRoom.objects.filter(pk=target_id)
+
+
+def _other_rows(model, queryset):
+    # rows of other models (attendance, exam results, lessons...) that
+    # on_delete=CASCADE takes along with `queryset`. A row referencing
+    # two deleted rows, e.g. a lesson of the teacher and the class room,
+    # is counted twice.
+    total = 0
+    for relation in model._meta.related_objects:
+        if (relation.on_delete is not CASCADE
+                or relation.related_model in COUNTED):
+            continue
+        total += relation.related_model._base_manager.filter(**{
+            f'{relation.field.name}__in': queryset.values('pk')}).count()
+    return total
+
+
+def blast_radius(target, target_id):
+    # count what deleting the teacher/class room would take with it
+    class_rooms = _class_rooms(target, target_id)
+    students = Student.objects.filter(
+        class_room_id__in=class_rooms.values('pk'))
+    guardian_links = Student.guardians.through.objects.filter(
+        student_id__in=students.values('pk'))
+
+    other_rows = (_other_rows(ClassRoom, class_rooms)
+                  + _other_rows(Student, students))
+    if target == CascadeDelete.TEACHER:
+        other_rows += _other_rows(
+            Teacher, Teacher.objects.filter(pk=target_id))
+
+    return {
+        'class_rooms': class_rooms.count(),
+        'students': students.count(),
+        'guardian_links': guardian_links.count(),
+        'other_rows': other_rows,
+    }
+
+
+def is_large(radius):
+    return sum(radius.values()) > settings.CASCADE_DELETE_THRESHOLD
+
+
+def schedule(target, instance, radius, user=None):
+    with transaction.atomic(using=tenancy.db_alias()):
+        cascade_delete = CascadeDelete.objects.create(
+            target=target,
+            target_id=instance.pk,
+            target_name=str(instance),
+            batch_size=settings.CASCADE_DELETE_BATCH_SIZE,
+            **radius)
+        cascade_delete.job = jobs.enqueue(
+            'cascade_delete', {'cascade_delete': cascade_delete.pk},
+            user=user)
+        cascade_delete.save(update_fields=['job'])
+
+    return cascade_delete
+
+
+def run(pk, job=None):
+    cascade_delete = CascadeDelete.objects.get(pk=pk)
+    cascade_delete.status = CascadeDelete.RUNNING
+    cascade_delete.save(update_fields=['status'])
+
+    try:
+        class_rooms = _class_rooms(cascade_delete.target,
+                                   cascade_delete.target_id)
+        class_room_ids = list(class_rooms.values_list('pk', flat=True))
+
+        # each batch is its own short transaction so other writers
+        # are never blocked for longer than one batch
+        while True:
+            with transaction.atomic(using=tenancy.db_alias()):
+                batch = list(
+                    Student.objects.filter(class_room_id__in=class_room_ids)
+                    .values_list('pk', flat=True)[:cascade_delete.batch_size])
+                if not batch:
+                    break
+
+                Student.guardians.through.objects.filter(
+                    student_id__in=batch).delete()
+                Student.objects.filter(pk__in=batch).delete()
+
+            CascadeDelete.objects.filter(pk=pk).update(
+                deleted_students=F('deleted_students') + len(batch))
+            if job:
+                cascade_delete.deleted_students += len(batch)
+                jobs.set_progress(job, cascade_delete.deleted_students,
+                                  cascade_delete.students)
+
+        # what is left is small: the class rooms and the teacher itself
+        with transaction.atomic(using=tenancy.db_alias()):
+            if cascade_delete.target == CascadeDelete.TEACHER:
+                Teacher.objects.filter(pk=cascade_delete.target_id).delete()
+            else:
+                ClassRoom.objects.filter(pk=cascade_delete.target_id).delete()
+
+        CascadeDelete.objects.filter(pk=pk).update(
+            status=CascadeDelete.DONE, finished_at=timezone.now())
+    except Exception as err:
+        CascadeDelete.objects.filter(pk=pk).update(
+            status=CascadeDelete.FAILED,
+            error=str(err),
+            finished_at=timezone.now())
+        raise
@@ -0,0 +1,49 @@
+import json
+
+from django.conf import settings
+from django.db import connections
+
+# Row counts for the *Count queries. An exact count is a COUNT(*) over the
+# filtered queryset; with `approximate` PostgreSQL's planner statistics
+# answer instead (pg_class.reltuples for a whole table, the row estimate
+# of EXPLAIN for a filtered one), which costs the same at any table size.
+# Estimates below COUNT_ESTIMATE_THRESHOLD are replaced by an exact count,
+# which is cheap there and where the estimate is least accurate.
+
+
+def _table_estimate(connection, model):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class '
+                       'WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    # -1 (or 0 before PostgreSQL 14) until the table is first analyzed
+    return row[0] if row and row[0] > 0 else None
+
+
+def _plan_estimate(connection, qs):
+    sql, params = qs.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimate(qs):
+    connection = connections[qs.db]
+    if connection.vendor != 'postgresql':
+        return None
+    if not qs.query.where:
+        return _table_estimate(connection, qs.model)
+    return _plan_estimate(connection, qs)
+
+
+def count(qs, approximate=False):
+    # (count, is_estimate)
+    if approximate:
+        estimated = estimate(qs)
+        if (estimated is not None
+                and estimated >= settings.COUNT_ESTIMATE_THRESHOLD):
+            return estimated, True
+    return qs.count(), False
@@ -0,0 +1,16 @@
+import base64
+import json
+
+
+# opaque pagination cursors handed to clients: urlsafe base64 json
+
+def encode_cursor(data):
+    return base64.urlsafe_b64encode(
+        json.dumps(data, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise ValueError('Invalid cursor')
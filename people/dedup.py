@@ -0,0 +1,251 @@
+from difflib import SequenceMatcher
+from itertools import combinations, groupby
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from school import tenancy
+
+from . import entities, normalize
+from .models import DuplicateGuardian, Guardian, GuardianKey, Student
+
+# Guardians typed in again for every child of a family are found without
+# comparing every guardian with every other one: each guardian gets a few
+# blocking keys (GuardianKey: normalized phone, soundex of the name, local
+# part of the email) and only guardians sharing a key are compared.
+# Blocks bigger than DEDUP_MAX_BLOCK (a shared office number, a common
+# name) are skipped. Pairs scoring DEDUP_THRESHOLD or more are kept as
+# DuplicateGuardian for someone to merge or dismiss. `find_duplicates`
+# does every guardian at once, `check` the ones just saved.
+
+FIELDS = ['full_name', 'phone', 'email', 'id_number']
+
+
+def _record(row):
+    # the normalized values a guardian is compared by
+    return {
+        'name': normalize.name(row['full_name']),
+        'phone': normalize.phone(row['phone']),
+        'email': normalize.email(row['email']),
+        'email_local': normalize.email_local(row['email']),
+        'id_number': normalize.id_number(row['id_number']),
+        'name_code': normalize.name_code(row['full_name']),
+    }
+
+
+def _keys(pk, record):
+    keys = [(GuardianKey.PHONE, record['phone']),
+            (GuardianKey.NAME, record['name_code']),
+            (GuardianKey.EMAIL, record['email_local'])]
+    return [GuardianKey(guardian_id=pk, kind=kind, value=value)
+            for kind, value in keys if value]
+
+
+def score(a, b):
+    # (score from 0 to 1, reasons); a name alone is never enough
+    if a['id_number'] and b['id_number']:
+        if a['id_number'] != b['id_number']:
+            return 0, []
+    reasons, total = [], 0
+    if a['id_number'] and a['id_number'] == b['id_number']:
+        total += 0.6
+        reasons.append('same id number')
+    if a['phone'] and a['phone'] == b['phone']:
+        total += 0.3
+        reasons.append('same phone')
+    if a['email'] and a['email'] == b['email']:
+        total += 0.3
+        reasons.append('same email')
+    elif a['email_local'] and a['email_local'] == b['email_local']:
+        total += 0.15
+        reasons.append('similar email')
+    if a['name'] and b['name']:
+        ratio = SequenceMatcher(None, a['name'], b['name']).ratio()
+        total += 0.5 * ratio
+        if ratio >= 0.8:
+            reasons.append('same name' if ratio == 1 else 'similar name')
+    return min(total, 1), reasons
+
+
+def _records(pks):
+    return {row['id']: _record(row) for row in
+            Guardian.objects.filter(pk__in=list(pks))
+            .values('id', *FIELDS).iterator()}
+
+
+def _save_pairs(pairs, records, replace=None):
+    # scores candidate pairs (lower id first) and stores the duplicates.
+    # Open pairs matching `replace` (a Q) are dropped first, dismissed
+    # ones are never brought back.
+    dismissed = DuplicateGuardian.objects.filter(
+        status=DuplicateGuardian.DISMISSED)
+    if replace is not None:
+        # the candidates all involve the guardians being checked
+        dismissed = dismissed.filter(replace)
+    dismissed = set(dismissed.values_list('guardian_id', 'other_id'))
+    found = []
+    for pair in pairs:
+        if pair in dismissed:
+            continue
+        value, reasons = score(records[pair[0]], records[pair[1]])
+        if value >= settings.DEDUP_THRESHOLD:
+            found.append(DuplicateGuardian(
+                guardian_id=pair[0], other_id=pair[1], score=value,
+                reasons=', '.join(reasons), found_at=timezone.now()))
+
+    open_pairs = DuplicateGuardian.objects.filter(
+        status=DuplicateGuardian.OPEN)
+    if replace is not None:
+        open_pairs = open_pairs.filter(replace)
+    open_pairs.delete()
+    using = tenancy.db_alias()
+    try:
+        with transaction.atomic(using=using):
+            DuplicateGuardian.objects.bulk_create(found)
+    except IntegrityError:
+        # a check of a guardian in the same block stored some of the
+        # pairs meanwhile; those are kept
+        for duplicate in found:
+            try:
+                with transaction.atomic(using=using):
+                    duplicate.save()
+            except IntegrityError:
+                pass
+    return len(found)
+
+
+def find_duplicates():
+    # rebuilds every blocking key and compares every block, returns the
+    # number of duplicate pairs found
+    using = tenancy.db_alias()
+    with transaction.atomic(using=using):
+        GuardianKey.objects.all().delete()
+        records, keys = {}, []
+        for row in Guardian.objects.values('id', *FIELDS).iterator():
+            records[row['id']] = _record(row)
+            keys += _keys(row['id'], records[row['id']])
+            if len(keys) >= 5000:
+                GuardianKey.objects.bulk_create(keys)
+                keys = []
+        GuardianKey.objects.bulk_create(keys)
+
+        pairs = set()
+        blocks = (GuardianKey.objects.order_by('kind', 'value', 'guardian')
+                  .values_list('kind', 'value', 'guardian_id').iterator())
+        for _, block in groupby(blocks, key=lambda key: key[:2]):
+            members = sorted({key[2] for key in block})
+            if len(members) <= settings.DEDUP_MAX_BLOCK:
+                pairs.update(combinations(members, 2))
+
+        return _save_pairs(pairs, records)
+
+
+def check(pks):
+    # refreshes the keys of guardians that were just saved and compares
+    # them with the guardians sharing a key
+    pks = list(pks)
+    using = tenancy.db_alias()
+    with transaction.atomic(using=using):
+        records = _records(pks)
+        GuardianKey.objects.filter(guardian_id__in=pks).delete()
+        keys = [key for pk, record in records.items()
+                for key in _keys(pk, record)]
+        GuardianKey.objects.bulk_create(keys)
+
+        # members of the blocks that are small enough
+        shared = Q()
+        for key in keys:
+            shared |= Q(kind=key.kind, value=key.value)
+        small = Q()
+        if keys:
+            for block in (GuardianKey.objects.filter(shared)
+                          .values('kind', 'value')
+                          .annotate(size=Count('id'))
+                          .filter(size__lte=settings.DEDUP_MAX_BLOCK)
+                          .order_by()):
+                small |= Q(kind=block['kind'], value=block['value'])
+        blocks = {}
+        if small:
+            for kind, value, pk in (GuardianKey.objects.filter(small)
+                                    .values_list('kind', 'value',
+                                                 'guardian_id')):
+                blocks.setdefault((kind, value), set()).add(pk)
+
+        pairs = set()
+        for key in keys:
+            for other in blocks.get((key.kind, key.value), ()):
+                if other != key.guardian_id:
+                    pairs.add(tuple(sorted((key.guardian_id, other))))
+        records.update(_records({pk for pair in pairs for pk in pair}
+                                - set(records)))
+
+        return _save_pairs(pairs, records,
+                           Q(guardian_id__in=pks) | Q(other_id__in=pks))
+
+
+def schedule(pks):
+    # checks the guardians once the transaction saving them commits
+    if not settings.DEDUP_ON_SAVE:
+        return
+    pks = list(pks)
+    transaction.on_commit(lambda: check(pks), using=tenancy.db_alias())
+
+
+# the fields a merge fills in on the kept guardian when it has none
+FILL = ['phone', 'email', 'id_number', 'religion', 'DOB', 'gender',
+        'profession', 'user_id']
+
+
+def merge(keep, merged):
+    # moves the students of the `merged` guardians to `keep`, fills in
+    # what `keep` is missing from them and deletes them. Returns the kept
+    # guardian and the number of students moved.
+    merged = [pk for pk in merged if pk != keep]
+    if not merged:
+        raise ValueError('Nothing to merge')
+
+    using = tenancy.db_alias()
+    with transaction.atomic(using=using):
+        guardians = {guardian.pk: guardian for guardian in
+                     Guardian.objects.select_for_update()
+                     .filter(pk__in=[keep] + merged)}
+        missing = set([keep] + merged) - set(guardians)
+        if missing:
+            raise ValueError(
+                f'Unknown guardians {", ".join(map(str, sorted(missing)))}')
+        kept = guardians[keep]
+        others = [guardians[pk] for pk in merged]
+
+        Through = Student.guardians.through
+        students = set(Through.objects.filter(guardian_id__in=merged)
+                       .values_list('student_id', flat=True))
+        students -= set(Through.objects.filter(guardian_id=keep)
+                        .values_list('student_id', flat=True))
+        Through.objects.filter(guardian_id__in=merged).delete()
+        Through.objects.bulk_create([
+            Through(student_id=student, guardian_id=keep)
+            for student in sorted(students)])
+
+        # unique values move over only once the merged rows are gone
+        filled = {}
+        for field in FILL:
+            if getattr(kept, field) in (None, ''):
+                for other in others:
+                    if getattr(other, field) not in (None, ''):
+                        filled[field] = getattr(other, field)
+                        break
+        for other in others:
+            other.delete()
+        for field, value in filled.items():
+            setattr(kept, field, value)
+        kept.save()
+
+        # links added with bulk_create send no m2m_changed
+        if students:
+            Student.objects.filter(pk__in=students).update(
+                updated_at=timezone.now())
+            entities.bump(Student, students)
+
+    return kept, len(students)
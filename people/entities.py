@@ -0,0 +1,181 @@
+import threading
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import Http404
+from promise import Promise
+from promise.dataloader import DataLoader
+
+from school import metrics, tenancy
+
+# Read-through cache of single rows, keyed by model and primary key. Every
+# row has a version and every model a generation in the cache; the row
+# itself is stored under a key containing both, so bumping either makes
+# the old copy unreachable instead of having to delete it. Versions are
+# bumped by people.signals on save, delete and m2m changes, generations by
+# code that changes many rows with .update() or raw SQL (see bump_model).
+# Keys are per school through the cache's KEY_FUNCTION.
+
+# hits and misses since the worker started, by model; also exported as
+# school_cache_requests_total{cache="entity"}, see school.metrics
+hits = Counter()
+misses = Counter()
+_lock = threading.Lock()
+
+
+def enabled():
+    return settings.ENTITY_CACHE_ENABLED
+
+
+def _cache():
+    return caches[settings.ENTITY_CACHE]
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def _version_key(model, pk):
+    return f'entity:v:{_label(model)}:{pk}'
+
+
+def _generation_key(model):
+    return f'entity:g:{_label(model)}'
+
+
+def _fresh():
+    # a new version is never one used before, even after the old one
+    # was evicted, so a stale copy can't come back
+    return uuid.uuid4().hex[:12]
+
+
+def _versions(cache, model, pks):
+    # {pk: version} plus the generation, in one round trip
+    keys = {_version_key(model, pk): pk for pk in pks}
+    generation_key = _generation_key(model)
+    found = cache.get_many(list(keys) + [generation_key])
+
+    missing = {key: _fresh() for key in keys if key not in found}
+    if generation_key not in found:
+        missing[generation_key] = _fresh()
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+
+    versions = {pk: found[key] for key, pk in keys.items()}
+    return versions, found[generation_key]
+
+
+def _count(model, hit, count):
+    if not count:
+        return
+    with _lock:
+        (hits if hit else misses)[_label(model)] += count
+    metrics.count_cache('entity', hit, count)
+
+
+def get_many(model, pks):
+    # {pk: instance} of the rows that exist; cached ones come from one
+    # cache round trip and the rest from one query
+    pks = list({int(pk) for pk in pks})
+    if not enabled():
+        return model.objects.in_bulk(pks)
+
+    cache = _cache()
+    versions, generation = _versions(cache, model, pks)
+    keys = {f'entity:{_label(model)}:{pk}:{generation}:{versions[pk]}': pk
+            for pk in pks}
+    found = cache.get_many(list(keys))
+    result = {keys[key]: instance for key, instance in found.items()}
+    _count(model, True, len(result))
+
+    missing = [pk for pk in pks if pk not in result]
+    _count(model, False, len(missing))
+    if missing:
+        loaded = model.objects.in_bulk(missing)
+        cache.set_many({key: loaded[pk] for key, pk in keys.items()
+                        if pk in loaded}, settings.ENTITY_CACHE_TIMEOUT)
+        result.update(loaded)
+    return result
+
+
+def get(model, pk):
+    return get_many(model, [pk]).get(int(pk))
+
+
+def get_or_404(model, pk):
+    instance = get(model, pk)
+    if instance is None:
+        raise Http404(
+            f'No {model._meta.object_name} matches the given query.')
+    return instance
+
+
+class _Loader(DataLoader):
+    # the rows of one model asked for while a list resolves, fetched with
+    # one get_many once the list is done
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def batch_load_fn(self, pks):
+        found = get_many(self.model, pks)
+        return Promise.resolve([found.get(int(pk)) for pk in pks])
+
+
+def load(context, model, pk):
+    # get() for resolvers of list items: a promise of the row, batched
+    # with the other rows of `model` in the same request (`context`)
+    if context is None:
+        return get(model, pk)
+    loaders = getattr(context, 'entity_loaders', None)
+    if loaders is None:
+        loaders = context.entity_loaders = {}
+    if model not in loaders:
+        loaders[model] = _Loader(model)
+    return loaders[model].load(pk)
+
+
+def _bump(model, pks):
+    cache = _cache()
+    cache.set_many({_version_key(model, pk): _fresh() for pk in pks}, None)
+
+
+def _bump_model(model):
+    _cache().set(_generation_key(model), _fresh(), None)
+
+
+def _now_and_on_commit(func, *args):
+    # again after the commit: a read in between would cache the rows as
+    # they were before the transaction under the new version
+    func(*args)
+    connection = transaction.get_connection(tenancy.db_alias())
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: func(*args), using=tenancy.db_alias())
+
+
+def bump(model, pks):
+    pks = [int(pk) for pk in pks]
+    if enabled() and pks:
+        _now_and_on_commit(_bump, model, pks)
+
+
+def bump_model(model):
+    # for changes to many rows at once, e.g. a promotion
+    if enabled():
+        _now_and_on_commit(_bump_model, model)
+
+
+def stats():
+    with _lock:
+        labels = sorted(set(hits) | set(misses))
+        return [{
+            'model': label,
+            'hits': hits[label],
+            'misses': misses[label],
+            'hit_rate': (hits[label] / (hits[label] + misses[label])
+                         if hits[label] + misses[label] else 0),
+        } for label in labels]
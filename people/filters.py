@@ -0,0 +1,90 @@
+from .models import Guardian, Student, Teacher
+
+# The typed `filter` and `orderBy` arguments of the list queries. Filters
+# combine with AND and map onto indexed columns (see the Meta.indexes of
+# the models), unlike `search`, which ORs icontains over many of them.
+
+# filter input field -> lookup. Dates take a {gte, lte} range.
+FILTERS = {
+    Student: {
+        'class_room': 'class_room_id',
+        'active': 'active',
+        'gender': 'gender',
+        'joined_at': 'joined_at',
+        'DOB': 'DOB',
+        'guardian': 'guardians',
+    },
+    Teacher: {
+        'active': 'active',
+        'gender': 'gender',
+        'joined_at': 'joined_at',
+        'DOB': 'DOB',
+        'subject': 'subjects',
+    },
+    Guardian: {
+        'active': 'active',
+        'gender': 'gender',
+        'DOB': 'DOB',
+        'student': 'student',
+    },
+}
+
+# orderBy value -> field; prefix with "-" for descending
+ORDERINGS = {
+    Student: {
+        'id': 'id',
+        'fullName': 'full_name',
+        'registrationNumber': 'registration_number',
+        'joinedAt': 'joined_at',
+        'DOB': 'DOB',
+        'updatedAt': 'updated_at',
+    },
+    Teacher: {
+        'id': 'id',
+        'fullName': 'full_name',
+        'joinedAt': 'joined_at',
+        'DOB': 'DOB',
+        'updatedAt': 'updated_at',
+    },
+    Guardian: {
+        'id': 'id',
+        'fullName': 'full_name',
+        'DOB': 'DOB',
+        'updatedAt': 'updated_at',
+    },
+}
+
+
+def apply(qs, filter):
+    lookups = FILTERS[qs.model]
+    conditions = {}
+    for name, value in (filter or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, dict):
+            for bound in ('gte', 'lte'):
+                if value.get(bound) is not None:
+                    conditions[f'{lookups[name]}__{bound}'] = value[bound]
+        else:
+            conditions[lookups[name]] = value
+    return qs.filter(**conditions)
+
+
+def order(qs, order_by):
+    if not order_by:
+        return qs
+
+    fields = ORDERINGS[qs.model]
+    ordering = []
+    for value in order_by:
+        descending = value.startswith('-')
+        name = value[1:] if descending else value
+        if name not in fields:
+            raise ValueError(f'Cannot order by "{name}", use one of '
+                             f'{", ".join(fields)}')
+        ordering.append(('-' if descending else '') + fields[name])
+
+    # the id makes the order total, so skip/first pages don't overlap
+    if not {'id', '-id'} & set(ordering):
+        ordering.append('id')
+    return qs.order_by(*ordering)
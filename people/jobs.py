@@ -0,0 +1,148 @@
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from school import tenancy
+
+from .models import CascadeDelete, Job
+
+logger = logging.getLogger(__name__)
+
+# kind -> (function, public)
+_registry = {}
+
+
+def job(kind, public=False):
+    # registers `func(job, **payload)` as the handler for `kind`. Public
+    # jobs can be enqueued by any user through the enqueueJob mutation,
+    # the rest only by staff or from code.
+    def register(func):
+        _registry[kind] = (func, public)
+        return func
+
+    return register
+
+
+def is_registered(kind):
+    return kind in _registry
+
+
+def is_public(kind):
+    return kind in _registry and _registry[kind][1]
+
+
+def enqueue(kind, payload=None, user=None, run_at=None, max_attempts=1):
+    if kind not in _registry:
+        raise ValueError(f'Unknown job kind "{kind}"')
+
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        created_by=user if user and user.is_authenticated else None,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts)
+
+
+def set_progress(job, progress, total=None):
+    job.progress = progress
+    fields = {'progress': progress, 'heartbeat_at': timezone.now()}
+    if total is not None:
+        job.total = fields['total'] = total
+    Job.objects.filter(pk=job.pk).update(**fields)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker):
+    # SKIP LOCKED lets any number of workers poll the same table without
+    # queueing up behind each other's row locks
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOB_STALE_AFTER)
+    with transaction.atomic(using=tenancy.db_alias()):
+        # a stale job may still be running somewhere; it is only run again
+        # while it has attempts left, the others are given up
+        given_up = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.RUNNING, heartbeat_at__lt=stale,
+                    attempts__gte=F('max_attempts'))
+            .values_list('pk', flat=True))
+        if given_up:
+            error = f'No heartbeat for {settings.JOB_STALE_AFTER}s'
+            Job.objects.filter(pk__in=given_up).update(
+                status=Job.FAILED, finished_at=now, error=error)
+            # nothing will finish the deletes they were running
+            CascadeDelete.objects.filter(
+                job_id__in=given_up,
+                status__in=[CascadeDelete.PENDING, CascadeDelete.RUNNING],
+            ).update(status=CascadeDelete.FAILED, finished_at=now,
+                     error=error)
+        job = (Job.objects.select_for_update(skip_locked=True)
+               .filter(Q(status=Job.QUEUED, run_at__lte=now)
+                       | Q(status=Job.RUNNING, heartbeat_at__lt=stale,
+                           attempts__lt=F('max_attempts')))
+               .order_by('run_at', 'id')
+               .first())
+        if job is None:
+            return None
+
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.worker = worker
+        job.started_at = job.heartbeat_at = now
+        job.save(update_fields=[
+            'status', 'attempts', 'worker', 'started_at', 'heartbeat_at'])
+
+    return job
+
+
+def run(job):
+    func, public = _registry[job.kind]
+    try:
+        result = func(job, **job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.error('Job %s failed:\n%s', job, error)
+        if job.attempts < job.max_attempts:
+            # back off a little more after every failed attempt
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.QUEUED,
+                error=error,
+                run_at=timezone.now() + timedelta(seconds=30 * job.attempts))
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.FAILED, error=error, finished_at=timezone.now())
+        return
+
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.SUCCEEDED, result=result, finished_at=timezone.now())
+
+
+def _work_once(worker):
+    # runs one job of the school in use, if there is one waiting
+    job = claim(worker)
+    if job is not None:
+        run(job)
+    return job is not None
+
+
+def work(stop, poll_interval):
+    # loop of a single worker process, until `stop` (an Event) is set.
+    # With several schools every pass polls each of them in turn.
+    worker = worker_name()
+    while not stop.is_set():
+        close_old_connections()
+        busy = False
+        for slug in tenancy.tenants() or [tenancy.current()]:
+            with tenancy.use(slug):
+                busy = _work_once(worker) or busy
+        if not busy:
+            stop.wait(poll_interval)
@@ -0,0 +1,76 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from people import normalize
+from people.models import Guardian
+from school import tenancy
+
+BATCH = 5000
+
+
+class Rollback(Exception):
+    pass
+
+
+def _phone(i):
+    return f'07{i:08d}'
+
+
+class Command(BaseCommand):
+    help = ('Compares finding a guardian by phone through the indexed '
+            'phone_key column (guardianByPhone) with the icontains search '
+            'of the guardians query, on made up guardians rolled back '
+            'afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000,
+                            help='Made up guardians.')
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic(using=tenancy.db_alias()):
+                self.create(options['rows'])
+                self.measure(options['rows'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create(self, rows):
+        # bulk_create sends no pre_save, the keys are set here
+        for offset in range(0, rows, BATCH):
+            Guardian.objects.bulk_create([
+                Guardian(full_name=f'Guardian {i}', phone=_phone(i),
+                         phone_key=normalize.phone(_phone(i)))
+                for i in range(offset, min(offset + BATCH, rows))])
+        connection = connections[tenancy.db_alias()]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE people_guardian')
+
+    def measure(self, rows, repeat):
+        rng = random.Random(0)
+        wanted = [rng.randrange(rows) for _ in range(repeat)]
+
+        def median_ms(find):
+            timings = []
+            for i in wanted:
+                start = time.perf_counter()
+                found = find(i)
+                timings.append((time.perf_counter() - start) * 1000)
+                assert found, f'guardian {i} not found'
+            return statistics.median(timings)
+
+        vendor = connections[tenancy.db_alias()].vendor
+        self.stdout.write(f'{rows} guardians on {vendor}, {repeat} lookups '
+                          f'each (median ms)')
+        for label, find in [
+                ('phone_key =', lambda i: list(Guardian.objects.filter(
+                    phone_key=normalize.phone(f'+254 {_phone(i)}')))),
+                ('phone icontains', lambda i: list(Guardian.objects.filter(
+                    phone__icontains=_phone(i))))]:
+            self.stdout.write(f'{label:<16} {median_ms(find):10.3f}')
@@ -0,0 +1,102 @@
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.test import RequestFactory
+
+from people.models import ClassRoom, Student, Teacher
+from school import tenancy
+
+STUDENTS_QUERY = '''
+query Students($first: Int) {
+  students(first: $first) {
+    id fullName registrationNumber phone email DOB joinedAt gender
+    religion active
+  }
+}
+'''
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Compares resolving a large students list from values() rows '
+            '(people.projections) with model instances: median time and '
+            'peak Python memory (tracemalloc). Without --existing the '
+            'students are made up and rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--existing', action='store_true',
+                            help='Read the students already in the '
+                                 'database.')
+
+    def handle(self, *args, **options):
+        if options['existing']:
+            self.measure(options['students'], options['repeat'])
+            return
+
+        try:
+            with transaction.atomic(using=tenancy.db_alias()):
+                self.create(options['students'])
+                self.measure(options['students'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create(self, students):
+        teacher = Teacher.objects.create(full_name='Bench Teacher')
+        class_room = ClassRoom.objects.create(
+            name=f'Bench {time.time()}', class_teacher=teacher)
+        Student.objects.bulk_create([
+            Student(full_name=f'Student {i}', phone=f'07{i:08d}',
+                    email=f'student{i}@example.com', gender='FEMALE',
+                    religion='Christian', class_room=class_room)
+            for i in range(students)])
+
+    def measure(self, students, repeat):
+        from school.schema import schema
+
+        request = RequestFactory().post('/graphql/')
+        request.user = get_user_model()(is_superuser=True, is_staff=True)
+
+        def run():
+            result = schema.execute(STUDENTS_QUERY,
+                                    variables={'first': students},
+                                    context_value=request)
+            if result.errors:
+                raise result.errors[0]
+            return len(result.data['students'])
+
+        vendor = connections[tenancy.db_alias()].vendor
+        self.stdout.write(f'{repeat} runs each on {vendor}')
+        enabled = settings.GRAPHQL_PROJECTIONS
+        try:
+            for label, projections in [('model instances', False),
+                                       ('values() projection', True)]:
+                settings.GRAPHQL_PROJECTIONS = projections
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    count = run()
+                    timings.append((time.perf_counter() - start) * 1000)
+
+                # separately, tracing slows everything down
+                tracemalloc.start()
+                run()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                self.stdout.write(
+                    f'{label:<22} {count} students   median '
+                    f'{statistics.median(timings):9.1f} ms   peak '
+                    f'{peak / 2 ** 20:7.1f} MiB')
+        finally:
+            settings.GRAPHQL_PROJECTIONS = enabled
@@ -0,0 +1,130 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test import RequestFactory
+
+from people import roster
+from people.models import ClassRoom, Guardian, Student, Teacher
+from school import tenancy
+from school.encoders import get_encoder
+
+NESTED_QUERY = '''
+query Roster($id: Int!) {
+  classRoom(id: $id) {
+    id name
+    classTeacher { id fullName phone email }
+    studentSet {
+      id fullName registrationNumber phone email DOB joinedAt gender
+      religion active
+      guardians { id fullName phone email }
+    }
+  }
+}
+'''
+
+ROSTER_QUERY = '''
+query Roster($id: Int!) {
+  classRoster(id: $id)
+}
+'''
+
+
+def _median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Compares the nested classRoom query with classRoster and the '
+            'roster.json export, on an existing class room or on one made '
+            'up for the run and rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--class-room', type=int,
+                            help='An existing class room to read.')
+        parser.add_argument('--students', type=int, default=1000,
+                            help='Students in the made up class room.')
+        parser.add_argument('--guardians', type=int, default=2,
+                            help='Guardians per made up student.')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options['class_room']:
+            if not ClassRoom.objects.filter(pk=options['class_room']).exists():
+                raise CommandError('No such class room')
+            self.measure(options['class_room'], options['repeat'])
+            return
+
+        try:
+            with transaction.atomic(using=tenancy.db_alias()):
+                class_room = self.create(options['students'],
+                                         options['guardians'])
+                self.measure(class_room.pk, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create(self, students, guardians):
+        teacher = Teacher.objects.create(full_name='Bench Teacher')
+        class_room = ClassRoom.objects.create(
+            name=f'Bench {time.time()}', class_teacher=teacher)
+        Student.objects.bulk_create([
+            Student(full_name=f'Student {i}', phone=f'07{i:08d}',
+                    class_room=class_room)
+            for i in range(students)])
+        parents = Guardian.objects.bulk_create([
+            Guardian(full_name=f'Guardian {i}', phone=f'07{i:08d}')
+            for i in range(students * guardians)])
+        if not parents or parents[0].pk is None:
+            # only PostgreSQL returns the ids of bulk inserts
+            parents = Guardian.objects.order_by('-id')[:len(parents)]
+        parent_ids = [guardian.pk for guardian in parents]
+        student_ids = Student.objects.filter(
+            class_room=class_room).values_list('pk', flat=True)
+        Student.guardians.through.objects.bulk_create([
+            Student.guardians.through(
+                student_id=pk,
+                guardian_id=parent_ids[i * guardians + n])
+            for i, pk in enumerate(student_ids) for n in range(guardians)
+        ])
+        return class_room
+
+    def measure(self, class_room_id, repeat):
+        from school.schema import schema
+
+        request = RequestFactory().post('/graphql/')
+        request.user = get_user_model()(is_superuser=True, is_staff=True)
+        encode = get_encoder()
+
+        def execute(query):
+            def run():
+                result = schema.execute(query,
+                                        variables={'id': class_room_id},
+                                        context_value=request)
+                if result.errors:
+                    raise result.errors[0]
+                return encode({'data': result.data})
+            return run
+
+        students = Student.objects.filter(class_room_id=class_room_id).count()
+        vendor = connections[tenancy.db_alias()].vendor
+        self.stdout.write(f'{students} students on {vendor}, '
+                          f'{repeat} runs each (median ms, encoded)')
+        for label, func in [
+                ('nested classRoom query', execute(NESTED_QUERY)),
+                ('classRoster field', execute(ROSTER_QUERY)),
+                ('roster.json export', lambda: roster.roster_json(
+                    class_room_id))]:
+            self.stdout.write(
+                f'{label:<24} {_median_ms(func, repeat):10.2f}')
@@ -0,0 +1,123 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from school import encoders
+
+NAMES = ['Wanjiru', 'Otieno', 'Achieng', 'Kamau', 'Njeri', 'Mwangi',
+         'Chebet', 'Kiprono', 'Zoë', 'Renée', 'Nyambura', 'Ochieng']
+
+STUDENTS_QUERY = '''
+query Students($first: Int) {
+  students(first: $first) {
+    id fullName registrationNumber phone email DOB joinedAt gender
+    religion active
+    classRoom { id name }
+    guardians { id fullName phone }
+  }
+}
+'''
+
+
+def _fake_response(count):
+    # shaped like the STUDENTS_QUERY result, without needing a database
+    rng = random.Random(count)
+    start = date(2005, 1, 1)
+
+    def name():
+        return f'{rng.choice(NAMES)} {rng.choice(NAMES)}'
+
+    students = []
+    for pk in range(1, count + 1):
+        students.append({
+            'id': str(pk),
+            'fullName': name(),
+            'registrationNumber': str(100000 + pk),
+            'phone': f'07{rng.randrange(10 ** 8):08d}',
+            'email': f'student{pk}@example.com',
+            'DOB': (start + timedelta(days=rng.randrange(3000))).isoformat(),
+            'joinedAt': '2019-01-07',
+            'gender': rng.choice(['MALE', 'FEMALE']),
+            'religion': 'Christian',
+            'active': True,
+            'classRoom': {'id': str(pk % 40), 'name': f'Form {pk % 4 + 1}'},
+            'guardians': [{
+                'id': str(pk * 2 + i),
+                'fullName': name(),
+                'phone': f'07{rng.randrange(10 ** 8):08d}',
+            } for i in range(2)],
+        })
+    return {'data': {'students': students}}
+
+
+def _time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, timings
+
+
+class Command(BaseCommand):
+    help = ('Measures the time and size of encoding a large students '
+            'response with each of the JSON encoders in school.encoders.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--execute', action='store_true',
+            help='Also run the students query against the database, to '
+                 'compare encoding with the graphene result walk.')
+
+    def report(self, label, timings, size=None):
+        line = (f'{label:<28} median {statistics.median(timings):8.2f} ms'
+                f'   min {min(timings):8.2f} ms')
+        if size is not None:
+            line += f'   {size / 1024:9.1f} KiB'
+        self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        response = _fake_response(options['students'])
+        if options['execute']:
+            response = self.run_query(options)
+
+        self.stdout.write(f'{len(response["data"]["students"])} students, '
+                          f'{options["repeat"]} runs each')
+
+        candidates = [('json (graphene default)', encoders.default),
+                      ('json, utf-8 compact', encoders.compact)]
+        if encoders.orjson is not None:
+            candidates.append(('orjson', encoders.fast))
+        else:
+            self.stdout.write('orjson is not installed, skipping it')
+
+        for label, encode in candidates:
+            body, timings = _time(lambda: encode(response), options['repeat'])
+            if isinstance(body, str):
+                body = body.encode('utf-8')
+            self.report(label, timings, len(body))
+
+    def run_query(self, options):
+        from school.schema import schema
+
+        request = RequestFactory().post('/graphql/')
+        request.user = get_user_model()(is_superuser=True, is_staff=True)
+
+        def run():
+            return schema.execute(STUDENTS_QUERY,
+                                  variables={'first': options['students']},
+                                  context_value=request)
+
+        result, timings = _time(run, max(1, options['repeat'] // 4))
+        if result.errors:
+            raise result.errors[0]
+        self.report('graphene execution', timings)
+
+        return {'data': result.data}
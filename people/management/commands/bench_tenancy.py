@@ -0,0 +1,126 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import RequestFactory
+
+from people.models import ClassRoom, Guardian, Student, Teacher
+from school import tenancy
+
+STUDENTS_QUERY = '''
+query Students {
+  students(first: 50) {
+    id fullName classRoom { name } guardians { fullName }
+  }
+}
+'''
+
+
+def _median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = ('Measures whether the cost of one school\'s queries grows with '
+            'the number of schools in the database. Creates bench<n> '
+            'schemas on PostgreSQL and drops them again unless --keep.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenants', default='1,10,50',
+                            help='Comma separated numbers of schools.')
+        parser.add_argument('--students', type=int, default=1000,
+                            help='Students per school.')
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--keep', action='store_true')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'postgresql':
+            raise CommandError('Schools are PostgreSQL schemas, this needs '
+                               'a PostgreSQL database')
+
+        counts = sorted(int(n) for n in options['tenants'].split(','))
+        created = []
+        try:
+            self.stdout.write(f'{"schools":>8} {"resolve":>10} '
+                              f'{"by id":>10} {"count":>10} '
+                              f'{"students":>10}   (median ms)')
+            for count in counts:
+                while len(created) < count:
+                    slug = f'bench{len(created)}'
+                    self.create(slug, options['students'])
+                    created.append(slug)
+                self.measure(count, options['repeat'])
+        finally:
+            if not options['keep']:
+                for slug in created:
+                    self.drop(slug)
+
+    def create(self, slug, students):
+        tenancy.add_tenant(slug, [f'{slug}.bench.local'])
+        alias = tenancy.alias_for(slug)
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE SCHEMA IF NOT EXISTS ' +
+                           connection.ops.quote_name(tenancy.schema_for(slug)))
+        call_command('migrate', database=alias, verbosity=0,
+                     interactive=False)
+
+        with tenancy.use(slug):
+            teacher = Teacher.objects.create(
+                full_name=f'Teacher {slug}', id_number=1, phone=1)
+            class_rooms = [ClassRoom.objects.create(
+                name=f'Form {i}', class_teacher=teacher) for i in range(10)]
+            guardian = Guardian.objects.create(
+                full_name=f'Guardian {slug}', id_number=1, phone=1)
+            Student.objects.bulk_create([
+                Student(full_name=f'Student {i}', phone=i,
+                        class_room=class_rooms[i % len(class_rooms)])
+                for i in range(students)], batch_size=1000)
+            Student.guardians.through.objects.bulk_create([
+                Student.guardians.through(student_id=pk,
+                                          guardian_id=guardian.pk)
+                for pk in Student.objects.values_list('pk', flat=True)
+            ], batch_size=1000)
+
+    def drop(self, slug):
+        alias = tenancy.alias_for(slug)
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            cursor.execute('DROP SCHEMA IF EXISTS ' +
+                           connection.ops.quote_name(tenancy.schema_for(slug))
+                           + ' CASCADE')
+        tenancy.remove_tenant(slug)
+
+    def measure(self, count, repeat):
+        from school.schema import schema
+
+        factory = RequestFactory()
+        # always the first school, so only the number of schools changes
+        request = factory.post('/graphql/', HTTP_HOST='bench0.bench.local')
+        request.user = get_user_model()(is_superuser=True, is_staff=True)
+
+        def query():
+            result = schema.execute(STUDENTS_QUERY, context_value=request)
+            if result.errors:
+                raise result.errors[0]
+
+        def count_class():
+            return Student.objects.filter(class_room__name='Form 3').count()
+
+        with tenancy.use(tenancy.resolve(request)):
+            pk = Student.objects.values_list('pk', flat=True).first()
+            by_id = _median_ms(lambda: Student.objects.get(pk=pk), repeat)
+            counted = _median_ms(count_class, repeat)
+            students = _median_ms(query, repeat)
+
+        resolve = _median_ms(lambda: tenancy.resolve(request), repeat)
+        self.stdout.write(f'{count:>8} {resolve:>10.3f} {by_id:>10.3f} '
+                          f'{counted:>10.3f} {students:>10.3f}')
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from people import partitions
+from school import tenancy
+
+
+class Command(BaseCommand):
+    help = ('Creates the monthly partitions of the partitioned tables ahead '
+            'of time. Run it at least monthly, e.g. from a scheduler: a '
+            'month whose rows already went to the default partition can '
+            'no longer get its own.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=3,
+                            help='Months ahead to create.')
+        parser.add_argument(
+            '--database',
+            help='Only this database; by default the one of every school.')
+
+    def handle(self, *args, **options):
+        databases = [options['database']] if options['database'] else [
+            tenancy.alias_for(slug) for slug in tenancy.tenants()
+        ] or [tenancy.db_alias()]
+
+        for database in databases:
+            for table in partitions.registered():
+                created = partitions.ensure_monthly_partitions(
+                    table, options['months'], using=database)
+                for partition in created:
+                    self.stdout.write(f'Created {partition} in {database}')
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from people import dedup
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds the blocking keys of every guardian and lists the '
+            'likely duplicates (see people.dedup), e.g. after importing '
+            'guardians or changing DEDUP_THRESHOLD. New and changed '
+            'guardians are checked as they are saved.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        found = dedup.find_duplicates()
+        self.stdout.write(f'Found {found} likely duplicate pairs in '
+                          f'{time.perf_counter() - start:.1f}s')
@@ -0,0 +1,47 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from school.introspection import print_sdl
+
+
+class Command(BaseCommand):
+    help = ('Writes the GraphQL schema in SDL, for codegen and for '
+            '/schema.graphql to serve without printing it (see '
+            'GRAPHQL_SCHEMA_FILE). Run it at build time.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--out', default=settings.GRAPHQL_SCHEMA_FILE,
+            help='File to write, stdout when neither this nor '
+                 'GRAPHQL_SCHEMA_FILE is set.')
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Fail if the file is not up to date instead of writing.')
+
+    def handle(self, *args, **options):
+        schema = print_sdl()
+        path = options['out']
+
+        if options['check']:
+            if not path:
+                raise CommandError('--check needs --out')
+            try:
+                with open(path) as f:
+                    current = f.read()
+            except FileNotFoundError:
+                current = None
+            if current != schema:
+                raise CommandError(f'{path} is out of date, run '
+                                   f'`manage.py graphql_sdl --out {path}`')
+            self.stdout.write(f'{path} is up to date.')
+            return
+
+        if not path:
+            sys.stdout.write(schema)
+            return
+
+        with open(path, 'w') as f:
+            f.write(schema)
+        self.stdout.write(f'Wrote {path}')
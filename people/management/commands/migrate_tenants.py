@@ -0,0 +1,36 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from school import tenancy
+
+
+class Command(BaseCommand):
+    help = ('Creates the PostgreSQL schema of every school in TENANTS (or '
+            'of the ones given) and migrates it.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('tenants', nargs='*', metavar='school')
+
+    def handle(self, *args, **options):
+        slugs = options['tenants'] or tenancy.tenants()
+        if not slugs:
+            raise CommandError('No schools configured, see TENANTS')
+
+        for slug in slugs:
+            if slug not in tenancy.tenants():
+                raise CommandError(f'Unknown school {slug}')
+
+            alias = tenancy.alias_for(slug)
+            connection = connections[alias]
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('CREATE SCHEMA IF NOT EXISTS ' +
+                                   connection.ops.quote_name(
+                                       tenancy.schema_for(slug)))
+
+            self.stdout.write(f'Migrating {slug}...')
+            with tenancy.use(slug):
+                call_command('migrate', database=alias,
+                             verbosity=options['verbosity'],
+                             interactive=False)
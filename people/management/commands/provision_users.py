@@ -0,0 +1,54 @@
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from people import provisioning
+
+
+class Command(BaseCommand):
+    help = ('Creates users from a CSV file with a header row of username, '
+            'email, password and optionally id_number. Passwords are hashed '
+            'by a pool of processes (PASSWORD_HASH_WORKERS), users are '
+            'inserted in bulk and can be linked to the teachers and '
+            'guardians with the same email or id_number.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='The CSV file, - for stdin.')
+        parser.add_argument('--link-by', choices=provisioning.LINK_BY)
+        parser.add_argument('--workers', type=int,
+                            help='Processes hashing passwords.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Users created per transaction.')
+
+    def handle(self, *args, **options):
+        if options['file'] == '-':
+            rows = list(csv.DictReader(sys.stdin))
+        else:
+            with open(options['file'], newline='') as f:
+                rows = list(csv.DictReader(f))
+        if not rows:
+            raise CommandError('No users in the file')
+
+        start = time.perf_counter()
+        created = teachers = guardians = 0
+        size = options['batch_size']
+        for offset in range(0, len(rows), size):
+            batch = rows[offset:offset + size]
+            try:
+                users, linked_teachers, linked_guardians = (
+                    provisioning.provision(batch, options['link_by'],
+                                           options['workers']))
+            except ValueError as err:
+                raise CommandError(
+                    f'{err} (rows {offset + 1} to {offset + len(batch)}, '
+                    f'{created} users created before)')
+            created += len(users)
+            teachers += linked_teachers
+            guardians += linked_guardians
+            self.stdout.write(f'{created} of {len(rows)} users created')
+
+        self.stdout.write(
+            f'Created {created} users in {time.perf_counter() - start:.1f}s'
+            f', linked {teachers} teachers and {guardians} guardians')
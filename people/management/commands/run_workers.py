@@ -0,0 +1,64 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from people import jobs
+
+
+def _work(stop, poll_interval):
+    # the parent handles ctrl-c and tells us to stop through the event,
+    # so a job that is running is always allowed to finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    jobs.work(stop, poll_interval)
+
+
+class Command(BaseCommand):
+    help = 'Runs a pool of processes that work through the job queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.JOB_WORKERS,
+            help='Number of worker processes.')
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help='Seconds an idle worker waits before polling again.')
+
+    def handle(self, *args, **options):
+        # forked children must not share the parent's database socket
+        connections.close_all()
+
+        stop = multiprocessing.Event()
+
+        def shutdown(signum, frame):
+            self.stdout.write('Stopping workers once their jobs finish...')
+            stop.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        def spawn():
+            process = multiprocessing.Process(
+                target=_work, args=(stop, options['poll_interval']))
+            process.start()
+            return process
+
+        processes = [spawn() for _ in range(options['processes'])]
+        self.stdout.write(f'Started {len(processes)} workers.')
+
+        while not stop.is_set():
+            for i, process in enumerate(processes):
+                if not process.is_alive():
+                    self.stderr.write(
+                        f'Worker {process.pid} exited with code '
+                        f'{process.exitcode}, restarting it.')
+                    processes[i] = spawn()
+            time.sleep(1)
+
+        for process in processes:
+            process.join()
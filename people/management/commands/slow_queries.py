@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from people.models import SlowQuery
+
+
+class Command(BaseCommand):
+    help = ('Lists the slow SQL statements recorded by '
+            'people.slow_queries, newest first.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--min-ms', type=float,
+                            help='Only statements at least this slow.')
+        parser.add_argument('--operation',
+                            help='Only those of this GraphQL operation.')
+        parser.add_argument('--slowest', action='store_true',
+                            help='Order by duration instead of time.')
+        parser.add_argument('--show', type=int, metavar='ID',
+                            help='Print one entry in full, with its plan.')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete every recorded entry.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(f'Deleted {deleted} slow queries.')
+            return
+
+        if options['show']:
+            return self.show(options['show'])
+
+        qs = SlowQuery.objects.order_by(
+            '-duration_ms' if options['slowest'] else '-pk')
+        if options['min_ms']:
+            qs = qs.filter(duration_ms__gte=options['min_ms'])
+        if options['operation']:
+            qs = qs.filter(operation=options['operation'])
+
+        for entry in qs[:options['limit']]:
+            sql = ' '.join(entry.sql.split())
+            self.stdout.write(
+                f'#{entry.pk:<6} {entry.recorded_at:%Y-%m-%d %H:%M:%S} '
+                f'{entry.duration_ms:9.1f} ms  '
+                f'{entry.operation or "-"} {entry.path or "-"}'
+                f'{"  [plan]" if entry.plan else ""}')
+            self.stdout.write(f'        {sql[:160]}')
+
+    def show(self, pk):
+        try:
+            entry = SlowQuery.objects.get(pk=pk)
+        except SlowQuery.DoesNotExist:
+            raise CommandError(f'No slow query #{pk}')
+
+        self.stdout.write(f'{entry.duration_ms:.1f} ms at {entry.recorded_at}')
+        self.stdout.write(f'operation: {entry.operation or "-"}')
+        self.stdout.write(f'resolver:  {entry.path or "-"}')
+        self.stdout.write(f'\n{entry.sql}\n\nparams: {entry.params}')
+        if entry.plan:
+            self.stdout.write(f'\n{entry.plan}')
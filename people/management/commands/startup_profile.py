@@ -0,0 +1,92 @@
+import json
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _parse(stderr):
+    # lines look like "import time:   self [us] | cumulative | package"
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        rows.append({
+            'module': fields[2].strip(),
+            'self_ms': int(fields[0]) / 1000,
+            'cumulative_ms': int(fields[1]) / 1000,
+        })
+    return rows
+
+
+class Command(BaseCommand):
+    help = ('Imports the web worker entry point in a fresh interpreter and '
+            'reports the import time by module.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module', default='school.wsgi',
+            help='Module to import, school.wsgi by default.')
+        parser.add_argument(
+            '--top', type=int, default=25,
+            help='Number of modules to list.')
+        parser.add_argument(
+            '--sort', choices=('self', 'cumulative'), default='cumulative')
+        parser.add_argument(
+            '--by-package', action='store_true',
+            help='Add up the time per top level package.')
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Print the rows as JSON, e.g. to diff between builds.')
+        parser.add_argument(
+            '--fail-over', type=float,
+            help='Exit with an error when imports take longer (ms).')
+
+    def handle(self, *args, **options):
+        # -X importtime only covers the first import of each module, hence
+        # the fresh interpreter
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             f'import {options["module"]}'],
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            universal_newlines=True)
+        rows = _parse(process.stderr)
+        if process.returncode:
+            errors = [line for line in process.stderr.splitlines()
+                      if not line.startswith('import time:')]
+            raise CommandError('\n'.join(errors[-20:]))
+
+        if options['by_package']:
+            packages = defaultdict(float)
+            for row in rows:
+                packages[row['module'].split('.')[0]] += row['self_ms']
+            rows = [{'module': name, 'self_ms': ms, 'cumulative_ms': ms}
+                    for name, ms in packages.items()]
+
+        total = sum(row['self_ms'] for row in rows)
+        key = f'{options["sort"]}_ms'
+        top = sorted(rows, key=lambda row: row[key], reverse=True)
+        top = top[:options['top']]
+
+        if options['json']:
+            self.stdout.write(json.dumps({'total_ms': total, 'modules': top},
+                                         indent=2))
+        else:
+            self.stdout.write(f'{"self ms":>10} {"cumul ms":>10}  module')
+            for row in top:
+                self.stdout.write(f'{row["self_ms"]:>10.1f} '
+                                  f'{row["cumulative_ms"]:>10.1f}  '
+                                  f'{row["module"]}')
+            self.stdout.write(f'\nTotal import time: {total:.1f} ms '
+                              f'over {len(rows)} modules')
+
+        if options['fail_over'] and total > options['fail_over']:
+            raise CommandError(f'Imports took {total:.1f} ms, more than '
+                               f'{options["fail_over"]:.1f} ms')
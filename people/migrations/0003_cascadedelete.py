@@ -0,0 +1,31 @@
+# Generated by Django 2.1.7 on 2026-10-19 17:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0002_auto_20190301_1246'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CascadeDelete',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('TEACHER', 'TEACHER'), ('CLASS_ROOM', 'CLASS_ROOM')], max_length=255)),
+                ('target_id', models.IntegerField()),
+                ('target_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('PENDING', 'PENDING'), ('RUNNING', 'RUNNING'), ('DONE', 'DONE'), ('FAILED', 'FAILED')], default='PENDING', max_length=255)),
+                ('class_rooms', models.IntegerField(default=0)),
+                ('students', models.IntegerField(default=0)),
+                ('guardian_links', models.IntegerField(default=0)),
+                ('deleted_students', models.IntegerField(default=0)),
+                ('batch_size', models.IntegerField()),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 2.1.7 on 2026-10-19 17:46
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+
+from people import partitions
+
+
+def create_table(apps, schema_editor):
+    AuditEntry = apps.get_model('people', 'AuditEntry')
+    partitions.create_partitioned_table(
+        schema_editor, AuditEntry, 'occurred_at',
+        indexes=[('model', 'object_id', 'occurred_at'),
+                 ('user_id', 'occurred_at')],
+        append_only=True)
+
+
+def drop_table(apps, schema_editor):
+    partitions.drop_partitioned_table(
+        schema_editor, apps.get_model('people', 'AuditEntry'))
+
+
+def create_partitions(apps, schema_editor):
+    partitions.ensure_monthly_partitions(
+        'people_auditentry', using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0005_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('occurred_at', models.DateTimeField()),
+                ('user_id', models.IntegerField(blank=True, null=True)),
+                ('username', models.CharField(blank=True, max_length=255, null=True)),
+                ('operation', models.CharField(max_length=255)),
+                ('model', models.CharField(max_length=255)),
+                ('object_id', models.IntegerField(blank=True, null=True)),
+                ('action', models.CharField(choices=[('CREATE', 'CREATE'), ('UPDATE', 'UPDATE'), ('DELETE', 'DELETE'), ('BULK', 'BULK')], max_length=255)),
+                ('changes', django.contrib.postgres.fields.jsonb.JSONField(default=dict)),
+            ],
+            options={
+                'db_table': 'people_auditentry',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_table, drop_table),
+        migrations.RunPython(create_partitions, migrations.RunPython.noop),
+    ]
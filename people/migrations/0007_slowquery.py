@@ -0,0 +1,26 @@
+# Generated by Django 2.1.7 on 2026-10-19 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0006_auditentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('duration_ms', models.FloatField()),
+                ('sql', models.TextField()),
+                ('params', models.TextField(blank=True, null=True)),
+                ('operation', models.CharField(blank=True, max_length=255, null=True)),
+                ('path', models.CharField(blank=True, max_length=255, null=True)),
+                ('plan', models.TextField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.1.7 on 2026-10-19 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0007_slowquery'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='guardian',
+            index=models.Index(fields=['active', 'full_name'], name='people_guar_active_4863b4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['class_room', 'active', 'full_name'], name='people_stud_class_r_ff9bd6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['active', 'full_name'], name='people_stud_active_8e4e4d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['joined_at'], name='people_stud_joined__907846_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['active', 'full_name'], name='people_teac_active_788b1f_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.7 on 2026-10-19 18:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0008_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classroom',
+            name='level',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.1.7 on 2026-10-19 18:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('people', '0009_classroom_level'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guardian',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='guardian', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='teacher', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
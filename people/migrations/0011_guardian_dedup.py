@@ -0,0 +1,47 @@
+# Generated by Django 2.1.7 on 2026-10-19 18:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0010_user_links'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateGuardian',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('reasons', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('OPEN', 'OPEN'), ('DISMISSED', 'DISMISSED')], default='OPEN', max_length=255)),
+                ('found_at', models.DateTimeField(auto_now=True)),
+                ('guardian', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='people.Guardian')),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='people.Guardian')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GuardianKey',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('PHONE', 'PHONE'), ('NAME', 'NAME'), ('EMAIL', 'EMAIL')], max_length=255)),
+                ('value', models.CharField(max_length=255)),
+                ('guardian', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='people.Guardian')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='guardiankey',
+            index=models.Index(fields=['kind', 'value'], name='people_guar_kind_de0cd4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='duplicateguardian',
+            index=models.Index(fields=['status', 'score'], name='people_dupl_status_4bd051_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='duplicateguardian',
+            unique_together={('guardian', 'other')},
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 2.1.7 on 2026-10-19 18:28
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, CharField, Value, When
+
+BATCH = 2000
+
+
+# frozen copies of people.normalize.phone and id_number as they were
+# when the columns were added; later changes to the rules must not change
+# what this migration writes
+
+
+def _phone(value):
+    digits = re.sub(r'\D', '', str(value or ''))
+    if digits.startswith('00'):
+        digits = digits[2:]
+    # the setting may be renamed or dropped later
+    code = getattr(settings, 'PHONE_COUNTRY_CODE', '254')
+    if code and digits.startswith(code) and len(digits) - len(code) >= 9:
+        digits = digits[len(code):]
+    digits = digits.lstrip('0')
+    return digits if len(digits) >= 6 else None
+
+
+def _id_number(value):
+    value = re.sub(r'[^0-9A-Z]', '', str(value or '').upper()).lstrip('0')
+    return value or None
+
+
+def backfill(apps, schema_editor):
+    # one UPDATE per batch of rows with a phone or an id number
+    using = schema_editor.connection.alias
+    for name in ('Guardian', 'Teacher'):
+        model = apps.get_model('people', name)
+        rows = (model.objects.using(using)
+                .exclude(phone__isnull=True, id_number__isnull=True)
+                .order_by('pk').values('pk', 'phone', 'id_number'))
+        last = 0
+        while True:
+            batch = list(rows.filter(pk__gt=last)[:BATCH])
+            if not batch:
+                break
+            last = batch[-1]['pk']
+            keys = {row['pk']: {'phone_key': _phone(row['phone']),
+                                'id_number_key': _id_number(row['id_number'])}
+                    for row in batch}
+            model.objects.using(using).filter(pk__in=list(keys)).update(**{
+                key: Case(*[When(pk=pk, then=Value(values[key]))
+                            for pk, values in keys.items()],
+                          output_field=CharField())
+                for key in ('phone_key', 'id_number_key')})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0011_guardian_dedup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guardian',
+            name='id_number_key',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='guardian',
+            name='phone_key',
+            field=models.CharField(editable=False, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='id_number_key',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='phone_key',
+            field=models.CharField(editable=False, max_length=32, null=True),
+        ),
+        # indexes are built once the columns are filled in
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='guardian',
+            index=models.Index(fields=['phone_key'], name='people_guar_phone_k_9e43c0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guardian',
+            index=models.Index(fields=['id_number_key'], name='people_guar_id_numb_3a31dd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['phone_key'], name='people_teac_phone_k_e005a0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['id_number_key'], name='people_teac_id_numb_dfe3a5_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.7 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0012_lookup_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cascadedelete',
+            name='other_rows',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.7 on 2026-10-19 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0013_cascadedelete_other_rows'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cascadedelete',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'PENDING'), ('RUNNING', 'RUNNING'), ('DONE', 'DONE'), ('FAILED', 'FAILED'), ('CANCELLED', 'CANCELLED')], default='PENDING', max_length=255),
+        ),
+    ]
@@ -1,4 +1,7 @@
+from django.conf import settings
+from django.contrib.postgres.fields import JSONField
 from django.db import models
+from django.utils import timezone
 
 GENDER = (
     ('MALE', 'MALE'),
@@ -18,6 +21,27 @@ class Guardian(models.Model):
     gender = models.CharField(max_length=255, choices=GENDER, null=True, blank=True)  # noqa E501
     profession = models.CharField(max_length=255, null=True, blank=True)
     active = models.BooleanField(default=True)
+    # the guardian's login, see people.provisioning
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, null=True,
+                                blank=True, on_delete=models.SET_NULL,
+                                related_name='guardian')
+    # phone and id_number as people.normalize has them, for exact lookups;
+    # kept in step by people.signals and the update mutations
+    phone_key = models.CharField(max_length=32, null=True, editable=False)
+    id_number_key = models.CharField(max_length=255, null=True,
+                                     editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # keyset scans of the sync api, see people.sync
+            models.Index(fields=['updated_at', 'id']),
+            # filter/orderBy of the guardians query, see people.filters
+            models.Index(fields=['active', 'full_name']),
+            # guardianByPhone and personByIdNumber
+            models.Index(fields=['phone_key']),
+            models.Index(fields=['id_number_key']),
+        ]
 
     def __str__(self):
         return f'{self.full_name}'
@@ -26,6 +50,13 @@ class Guardian(models.Model):
 class Subject(models.Model):
     # subject details
     name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # keyset scans of the sync api, see people.sync
+            models.Index(fields=['updated_at', 'id']),
+        ]
 
     def __str__(self):
         return f'{self.name}'
@@ -43,6 +74,26 @@ class Teacher(models.Model):
     joined_at = models.DateField(null=True, blank=True)
     subjects = models.ManyToManyField(Subject, blank=True)
     active = models.BooleanField(default=True)
+    # the teacher's login, see people.provisioning
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, null=True,
+                                blank=True, on_delete=models.SET_NULL,
+                                related_name='teacher')
+    # see Guardian.phone_key
+    phone_key = models.CharField(max_length=32, null=True, editable=False)
+    id_number_key = models.CharField(max_length=255, null=True,
+                                     editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # keyset scans of the sync api, see people.sync
+            models.Index(fields=['updated_at', 'id']),
+            # filter/orderBy of the teachers query, see people.filters
+            models.Index(fields=['active', 'full_name']),
+            # teacherByPhone and personByIdNumber
+            models.Index(fields=['phone_key']),
+            models.Index(fields=['id_number_key']),
+        ]
 
     # the underscore is for differentiating it with the subjects column
     def subjects_(self):
@@ -56,6 +107,16 @@ class ClassRoom(models.Model):
     # class details
     name = models.CharField(max_length=255, unique=True)
     class_teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
+    # year group, e.g. 1 for every Form 1 stream; exams rank students
+    # across the class rooms of a level
+    level = models.PositiveSmallIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # keyset scans of the sync api, see people.sync
+            models.Index(fields=['updated_at', 'id']),
+        ]
 
     def __str__(self):
         return f'{self.name}'
@@ -74,6 +135,234 @@ class Student(models.Model):
     religion = models.CharField(max_length=255, null=True, blank=True)
     guardians = models.ManyToManyField(Guardian, blank=True)
     active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # keyset scans of the sync api, see people.sync
+            models.Index(fields=['updated_at', 'id']),
+            # filter/orderBy of the students query, see people.filters
+            models.Index(fields=['class_room', 'active', 'full_name']),
+            models.Index(fields=['active', 'full_name']),
+            models.Index(fields=['joined_at']),
+        ]
 
     def __str__(self):
         return f'{self.full_name}'
+
+
+class GuardianKey(models.Model):
+    # a blocking key of a guardian: guardians are only compared with the
+    # ones sharing a key, see people.dedup
+    PHONE = 'PHONE'
+    NAME = 'NAME'
+    EMAIL = 'EMAIL'
+    KINDS = (
+        (PHONE, PHONE),
+        (NAME, NAME),
+        (EMAIL, EMAIL),
+    )
+
+    guardian = models.ForeignKey(Guardian, on_delete=models.CASCADE,
+                                 related_name='+')
+    kind = models.CharField(max_length=255, choices=KINDS)
+    value = models.CharField(max_length=255)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'value']),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.value}'
+
+
+class DuplicateGuardian(models.Model):
+    # two guardians that are probably the same person, found by
+    # people.dedup. `guardian` is the one with the lower id. Merged pairs
+    # go with the guardian deleted by the merge.
+    OPEN = 'OPEN'
+    DISMISSED = 'DISMISSED'
+    STATUS = (
+        (OPEN, OPEN),
+        (DISMISSED, DISMISSED),
+    )
+
+    guardian = models.ForeignKey(Guardian, on_delete=models.CASCADE,
+                                 related_name='+')
+    other = models.ForeignKey(Guardian, on_delete=models.CASCADE,
+                              related_name='+')
+    score = models.FloatField()
+    reasons = models.CharField(max_length=255)
+    status = models.CharField(max_length=255, choices=STATUS, default=OPEN)
+    found_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('guardian', 'other')
+        indexes = [
+            models.Index(fields=['status', 'score']),
+        ]
+
+    def __str__(self):
+        return f'{self.guardian_id} {self.other_id} {self.score:.2f}'
+
+
+class Tombstone(models.Model):
+    # left behind by a deleted guardian/subject/teacher/class room/student
+    # so that sync clients find out about the delete
+    model = models.CharField(max_length=255)
+    object_id = models.IntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}'
+
+
+class AuditEntry(models.Model):
+    # one change made through a mutation, written in batches by
+    # people.audit. On PostgreSQL the table is partitioned by month and
+    # refuses updates and deletes, see people.partitions.
+    CREATE = 'CREATE'
+    UPDATE = 'UPDATE'
+    DELETE = 'DELETE'
+    BULK = 'BULK'
+    ACTIONS = (
+        (CREATE, CREATE),
+        (UPDATE, UPDATE),
+        (DELETE, DELETE),
+        (BULK, BULK),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    occurred_at = models.DateTimeField()
+    # no foreign key, entries outlive the users they mention
+    user_id = models.IntegerField(null=True, blank=True)
+    username = models.CharField(max_length=255, null=True, blank=True)
+    operation = models.CharField(max_length=255)
+    model = models.CharField(max_length=255)
+    object_id = models.IntegerField(null=True, blank=True)
+    action = models.CharField(max_length=255, choices=ACTIONS)
+    # {field: [before, after]}
+    changes = JSONField(default=dict)
+
+    class Meta:
+        managed = False
+        db_table = 'people_auditentry'
+
+    def __str__(self):
+        return f'{self.action} {self.model} {self.object_id}'
+
+
+class SlowQuery(models.Model):
+    # an SQL statement slower than SLOW_QUERY_MS, recorded by
+    # people.slow_queries. Only the newest SLOW_QUERY_KEEP are kept.
+    recorded_at = models.DateTimeField(auto_now_add=True)
+    duration_ms = models.FloatField()
+    sql = models.TextField()
+    params = models.TextField(null=True, blank=True)
+    # the GraphQL operation and the resolver that was running
+    operation = models.CharField(max_length=255, null=True, blank=True)
+    path = models.CharField(max_length=255, null=True, blank=True)
+    # EXPLAIN (ANALYZE, BUFFERS), for a sample of the SELECTs
+    plan = models.TextField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.duration_ms:.0f} ms {self.operation or ""} {self.path or ""}'  # noqa E501
+
+
+class Job(models.Model):
+    # a unit of background work, picked up by `manage.py run_workers`
+    QUEUED = 'QUEUED'
+    RUNNING = 'RUNNING'
+    SUCCEEDED = 'SUCCEEDED'
+    FAILED = 'FAILED'
+    CANCELLED = 'CANCELLED'
+    STATUS = (
+        (QUEUED, QUEUED),
+        (RUNNING, RUNNING),
+        (SUCCEEDED, SUCCEEDED),
+        (FAILED, FAILED),
+        (CANCELLED, CANCELLED),
+    )
+
+    kind = models.CharField(max_length=255)
+    payload = JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=255, choices=STATUS, default=QUEUED)  # noqa E501
+
+    # progress is reported by the job itself, as `progress` out of `total`
+    progress = models.IntegerField(default=0)
+    total = models.IntegerField(null=True, blank=True)
+    result = JSONField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=1)
+    worker = models.CharField(max_length=255, null=True, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)  # noqa E501
+
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # the queue scan in people.jobs.claim
+            models.Index(fields=['status', 'run_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk} ({self.status})'
+
+
+class CascadeDelete(models.Model):
+    # a teacher or class room whose cascade is too big to delete inline
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    CANCELLED = 'CANCELLED'
+    STATUS = (
+        (PENDING, PENDING),
+        (RUNNING, RUNNING),
+        (DONE, DONE),
+        (FAILED, FAILED),
+        (CANCELLED, CANCELLED),
+    )
+
+    TEACHER = 'TEACHER'
+    CLASS_ROOM = 'CLASS_ROOM'
+    TARGETS = (
+        (TEACHER, TEACHER),
+        (CLASS_ROOM, CLASS_ROOM),
+    )
+
+    target = models.CharField(max_length=255, choices=TARGETS)
+    target_id = models.IntegerField()
+    target_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=255, choices=STATUS, default=PENDING)  # noqa E501
+
+    # blast radius, counted when the delete was requested
+    class_rooms = models.IntegerField(default=0)
+    students = models.IntegerField(default=0)
+    guardian_links = models.IntegerField(default=0)
+    # attendance, results, lessons... deleted along, see people.cascade
+    other_rows = models.IntegerField(default=0)
+
+    # progress
+    deleted_students = models.IntegerField(default=0)
+    batch_size = models.IntegerField()
+    error = models.TextField(null=True, blank=True)
+    job = models.ForeignKey(Job, null=True, blank=True, on_delete=models.SET_NULL)  # noqa E501
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.target} {self.target_name} ({self.status})'
@@ -0,0 +1,99 @@
+import re
+import unicodedata
+
+from django.conf import settings
+
+# Canonical forms of the free text people type in for the same thing,
+# used to match guardians (people.dedup) and to look people up by the
+# indexed phone_key and id_number_key columns.
+
+_SOUNDEX = {letter: str(digit)
+            for digit, letters in enumerate(
+                ['aeiouyhw', 'bfpv', 'cgjkqsxz', 'dt', 'l', 'mn', 'r'])
+            for letter in letters}
+
+
+def _ascii(value):
+    return (unicodedata.normalize('NFKD', value)
+            .encode('ascii', 'ignore').decode().lower())
+
+
+def phone(value):
+    # the national number without its leading zeros, so "0712 345 678",
+    # "+254712345678" and 712345678 (phones used to be sent as integers)
+    # are all "712345678"
+    digits = re.sub(r'\D', '', str(value or ''))
+    if digits.startswith('00'):
+        digits = digits[2:]
+    code = settings.PHONE_COUNTRY_CODE
+    if code and digits.startswith(code) and len(digits) - len(code) >= 9:
+        digits = digits[len(code):]
+    digits = digits.lstrip('0')
+    return digits if len(digits) >= 6 else None
+
+
+def id_number(value):
+    # letters and digits only, upper case, without leading zeros
+    value = re.sub(r'[^0-9A-Z]', '', str(value or '').upper()).lstrip('0')
+    return value or None
+
+
+def name(value):
+    # lower case ASCII words in alphabetical order, so "KAMAU, Mary" and
+    # "Mary Kamau" are the same
+    words = re.findall(r'[a-z]+', _ascii(value or ''))
+    return ' '.join(sorted(words)) or None
+
+
+def soundex(word):
+    word = re.sub(r'[^a-z]', '', _ascii(word))
+    if not word:
+        return None
+    code, last = word[0].upper(), _SOUNDEX[word[0]]
+    for letter in word[1:]:
+        digit = _SOUNDEX[letter]
+        if digit != '0' and digit != last:
+            code += digit
+        # h and w don't separate letters of the same sound
+        if letter not in 'hw':
+            last = digit
+    return (code + '000')[:4]
+
+
+def name_code(value):
+    # soundex of the first and last names in alphabetical order, so
+    # middle names, order and most misspellings don't matter
+    words = re.findall(r'[a-z]+', _ascii(value or ''))
+    words = [word for word in words if len(word) > 1]
+    if not words:
+        return None
+    return ' '.join(sorted({soundex(words[0]), soundex(words[-1])}))
+
+
+def email(value):
+    value = (value or '').strip().lower()
+    return value if '@' in value else None
+
+
+def email_local(value):
+    # the part before the @, without dots and +tags
+    value = email(value)
+    if value is None:
+        return None
+    local = value.split('@')[0].split('+')[0].replace('.', '')
+    return local or None
+
+
+# lookup columns of Guardian and Teacher: (column it is made from, how)
+LOOKUP_KEYS = {
+    'phone_key': ('phone', phone),
+    'id_number_key': ('id_number', id_number),
+}
+
+
+def lookup_keys(values):
+    # the lookup columns of the fields among `values`, e.g. the kwargs of
+    # an .update()
+    return {key: make(values[field])
+            for key, (field, make) in LOOKUP_KEYS.items()
+            if field in values}
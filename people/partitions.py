@@ -0,0 +1,117 @@
+from datetime import date
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# tables partitioned by month on a date/timestamp column; apps add theirs
+# with register() and `manage.py create_partitions` keeps them stocked
+_tables = []
+
+
+def register(table):
+    if table not in _tables:
+        _tables.append(table)
+
+
+def registered():
+    return list(_tables)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_partitioned_table(schema_editor, model, partition_key, indexes=(),
+                             unique=(), append_only=False):
+    # model is managed=False. PostgreSQL gets a table partitioned by month
+    # on `partition_key` (which has to be part of the primary key and of
+    # every `unique` index), with a default partition catching rows no
+    # monthly partition covers yet; other databases get a plain table,
+    # with the model's unique_together.
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(model)
+        return
+
+    quote = schema_editor.quote_name
+    table = model._meta.db_table
+    columns = []
+    for field in model._meta.local_fields:
+        if field.primary_key:
+            definition = 'bigserial NOT NULL'
+        else:
+            definition, _ = schema_editor.column_sql(
+                model, field, include_default=False)
+        columns.append(f'{quote(field.column)} {definition}')
+
+    pk = model._meta.pk.column
+    schema_editor.execute(
+        f'CREATE TABLE {quote(table)} ({", ".join(columns)}, '
+        f'PRIMARY KEY ({quote(pk)}, {quote(partition_key)})) '
+        f'PARTITION BY RANGE ({quote(partition_key)})')
+    schema_editor.execute(
+        f'CREATE TABLE {quote(table + "_default")} '
+        f'PARTITION OF {quote(table)} DEFAULT')
+
+    for fields in indexes:
+        name = f'{table}_{"_".join(fields)}'[:60]
+        schema_editor.execute(
+            f'CREATE INDEX {quote(name)} ON {quote(table)} '
+            f'({", ".join(quote(f) for f in fields)})')
+
+    for fields in unique:
+        name = f'{table}_{"_".join(fields)}_uniq'[:60]
+        schema_editor.execute(
+            f'CREATE UNIQUE INDEX {quote(name)} ON {quote(table)} '
+            f'({", ".join(quote(f) for f in fields)})')
+
+    if append_only:
+        # statement level, as older PostgreSQL versions have no row
+        # triggers on partitioned tables. Dropping a whole month of old
+        # partitions is still possible.
+        function = quote(f'{table}_append_only')
+        schema_editor.execute(
+            f'CREATE FUNCTION {function}() RETURNS trigger AS $$ BEGIN '
+            f"RAISE EXCEPTION '{table} is append-only'; END $$ "
+            f'LANGUAGE plpgsql')
+        schema_editor.execute(
+            f'CREATE TRIGGER {function} BEFORE UPDATE OR DELETE OR TRUNCATE '
+            f'ON {quote(table)} FOR EACH STATEMENT '
+            f'EXECUTE PROCEDURE {function}()')
+
+
+def drop_partitioned_table(schema_editor, model):
+    table = model._meta.db_table
+    schema_editor.execute(
+        f'DROP TABLE IF EXISTS {schema_editor.quote_name(table)} CASCADE')
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'DROP FUNCTION IF EXISTS '
+            f'{schema_editor.quote_name(table + "_append_only")}()')
+
+
+def ensure_monthly_partitions(table, months=3, start=None,
+                              using=DEFAULT_DB_ALIAS):
+    # creates the partitions for this month and the next `months`
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return []
+
+    first = (start or date.today()).replace(day=1)
+    created = []
+    with connection.cursor() as cursor:
+        for i in range(months + 1):
+            month = _add_months(first, i)
+            partition = f'{table}_{month:%Y_%m}'
+            cursor.execute('SELECT to_regclass(%s)', [partition])
+            if cursor.fetchone()[0]:
+                continue
+
+            # bounds have to be plain literals on PostgreSQL < 12
+            end = _add_months(month, 1)
+            cursor.execute(
+                f'CREATE TABLE {connection.ops.quote_name(partition)} '
+                f'PARTITION OF {connection.ops.quote_name(table)} '
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')")
+            created.append(partition)
+
+    return created
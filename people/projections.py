@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from graphene.utils.str_converters import to_camel_case
+from graphql.language import ast
+
+# Big lists of students, teachers or guardians resolve from values() rows
+# instead of model instances when every selected field can be read off a
+# column: only those columns are fetched, rows are streamed with
+# .iterator() and each becomes a bare instance of the graphene type, whose
+# fields the default resolver reads straight from the row. Selecting
+# anything else (guardians, subjects, a field with its own resolver) falls
+# back to model instances.
+
+
+def _selections(selection_set, fragments):
+    # fields of a selection set, with fragments inlined
+    for selection in selection_set.selections:
+        if isinstance(selection, ast.Field):
+            yield selection
+        elif isinstance(selection, ast.InlineFragment):
+            yield from _selections(selection.selection_set, fragments)
+        elif isinstance(selection, ast.FragmentSpread):
+            fragment = fragments.get(selection.name.value)
+            if fragment is not None:
+                yield from _selections(fragment.selection_set, fragments)
+
+
+def _columns_by_field(graphene_type):
+    # GraphQL field name -> column, for the fields that can be projected
+    model = graphene_type._meta.model
+    columns = {}
+    for name in graphene_type._meta.fields:
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if not field.concrete or field.many_to_many:
+            continue
+        if field.primary_key:
+            # DjangoObjectType.resolve_id reads .pk, see _row
+            pass
+        elif field.is_relation:
+            # foreign and one to one keys, which the type resolves from
+            # the id, e.g. through people.entities
+            if not hasattr(graphene_type, f'resolve_{name}'):
+                continue
+        elif hasattr(graphene_type, f'resolve_{name}'):
+            continue
+        columns[to_camel_case(name)] = field.attname
+    return columns
+
+
+_projectable = {}
+
+
+def columns(info, graphene_type):
+    # the columns the selection needs, or None when it can't be projected
+    if graphene_type not in _projectable:
+        _projectable[graphene_type] = _columns_by_field(graphene_type)
+    projectable = _projectable[graphene_type]
+
+    needed = {'id'}
+    for field_ast in info.field_asts:
+        for selection in _selections(field_ast.selection_set, info.fragments):
+            name = selection.name.value
+            if name == '__typename':
+                continue
+            if name not in projectable:
+                return None
+            needed.add(projectable[name])
+    return sorted(needed)
+
+
+def _row(graphene_type, values):
+    instance = graphene_type.__new__(graphene_type)
+    values['pk'] = values['id']
+    instance.__dict__ = values
+    return instance
+
+
+def resolve(qs, info, graphene_type):
+    # qs itself when the selection needs model instances
+    if not settings.GRAPHQL_PROJECTIONS:
+        return qs
+    needed = columns(info, graphene_type)
+    if needed is None:
+        return qs
+
+    rows = qs.values(*needed).iterator(
+        chunk_size=settings.GRAPHQL_PROJECTION_CHUNK_SIZE)
+    return (_row(graphene_type, values) for values in rows)
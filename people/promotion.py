@@ -0,0 +1,116 @@
+from django.db import connections, transaction
+from django.db.models import Case, Count, IntegerField, When
+from django.utils import timezone
+
+from school import tenancy
+
+from . import entities
+from .models import ClassRoom, Student
+
+
+def validate(mapping, graduating, graduate_to=None):
+    # mapping is a list of (from class room id, to class room id)
+    sources = [source for source, target in mapping]
+    if len(sources) != len(set(sources)):
+        raise ValueError('A class room can only be promoted once')
+
+    if set(sources) & set(graduating):
+        raise ValueError('A graduating class room cannot also be promoted')
+
+    wanted = set(sources) | {target for source, target in mapping}
+    wanted |= set(graduating)
+    if graduate_to:
+        wanted.add(graduate_to)
+
+    found = set(
+        ClassRoom.objects.filter(pk__in=wanted).values_list('pk', flat=True))
+    missing = wanted - found
+    if missing:
+        raise ValueError(
+            f'Unknown class rooms {", ".join(map(str, sorted(missing)))}')
+
+
+def _students(only_active):
+    qs = Student.objects.all()
+    if only_active:
+        qs = qs.filter(active=True)
+    return qs
+
+
+def preview(mapping, graduating, only_active=True):
+    # students per class room that a promotion would touch
+    class_rooms = [source for source, target in mapping] + list(graduating)
+    return dict(
+        _students(only_active).filter(class_room_id__in=class_rooms)
+        .values_list('class_room_id').annotate(Count('id')))
+
+
+def _promote_postgresql(mapping, only_active):
+    # a single UPDATE ... FROM (VALUES ...) reads every row's class room
+    # before writing any, so Form 1 -> 2 and Form 2 -> 3 in the same
+    # mapping don't chain into each other
+    connection = connections[tenancy.db_alias()]
+    table = connection.ops.quote_name(Student._meta.db_table)
+    column = connection.ops.quote_name(
+        Student._meta.get_field('class_room').column)
+    active = connection.ops.quote_name(
+        Student._meta.get_field('active').column)
+    updated_at = connection.ops.quote_name(
+        Student._meta.get_field('updated_at').column)
+
+    values = ', '.join(['(%s, %s)'] * len(mapping))
+    params = [timezone.now()] + [pk for pair in mapping for pk in pair]
+    sql = (f'UPDATE {table} AS s SET {column} = m.to_id, {updated_at} = %s '
+           f'FROM (VALUES {values}) AS m (from_id, to_id) '
+           f'WHERE s.{column} = m.from_id')
+    if only_active:
+        sql += f' AND s.{active}'
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def _promote_portable(mapping, only_active):
+    # same single statement as a CASE expression for other databases
+    sources = [source for source, target in mapping]
+    return _students(only_active).filter(class_room_id__in=sources).update(
+        updated_at=timezone.now(),
+        class_room_id=Case(*[
+            When(class_room_id=source, then=target)
+            for source, target in mapping
+        ], output_field=IntegerField()))
+
+
+def promote(mapping,
+            graduating,
+            graduate_to=None,
+            deactivate_graduates=True,
+            only_active=True):
+    using = tenancy.db_alias()
+    with transaction.atomic(using=using):
+        # graduates go first, otherwise the class promoted into the
+        # graduating class room would graduate with them
+        graduated = 0
+        if graduating:
+            changes = {'updated_at': timezone.now()}
+            if deactivate_graduates:
+                changes['active'] = False
+            if graduate_to:
+                changes['class_room_id'] = graduate_to
+            if len(changes) > 1:
+                graduated = _students(only_active).filter(
+                    class_room_id__in=graduating).update(**changes)
+
+        promoted = 0
+        if mapping:
+            if connections[using].vendor == 'postgresql':
+                promoted = _promote_postgresql(mapping, only_active)
+            else:
+                promoted = _promote_portable(mapping, only_active)
+
+        # rows changed by .update() and raw SQL send no signals
+        if graduated or promoted:
+            entities.bump_model(Student)
+
+    return promoted, graduated
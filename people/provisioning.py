@@ -0,0 +1,130 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Case, IntegerField, When
+from django.utils import timezone
+
+from school import tenancy
+
+from . import entities
+from .models import Guardian, Teacher
+
+# Accounts are created in bulk: every password hash (PBKDF2 by default)
+# costs tens of milliseconds of CPU, so they are made in a pool of
+# processes before anything is written, then the users go in with one
+# bulk_create. New accounts can be linked to the teachers and guardians
+# without one whose email or id_number matches.
+
+LINK_BY = ('email', 'id_number')
+
+
+def _setup():
+    # workers started with spawn rather than fork import Django afresh
+    import django
+    django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    workers = workers or settings.PASSWORD_HASH_WORKERS or os.cpu_count()
+    passwords = list(passwords)
+    if workers <= 1 or len(passwords) < settings.PASSWORD_HASH_POOL_MIN:
+        return [make_password(password) for password in passwords]
+
+    workers = min(workers, len(passwords))
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_setup) as pool:
+        return list(pool.map(make_password, passwords,
+                             chunksize=max(1, len(passwords) //
+                                           (workers * 4))))
+
+
+def validate(rows, link_by=None):
+    # rows are dicts with username, email, password and optionally
+    # id_number (only used for linking)
+    if link_by and link_by not in LINK_BY:
+        raise ValueError(f'Can only link by {" or ".join(LINK_BY)}')
+
+    for row in rows:
+        if not row.get('username') or not row.get('password'):
+            raise ValueError('Every user needs a username and a password')
+    usernames = [row['username'] for row in rows]
+    repeated = {name for name, count in Counter(usernames).items()
+                if count > 1}
+    if repeated:
+        raise ValueError(
+            f'Usernames given more than once: {", ".join(sorted(repeated))}')
+
+    taken = set(get_user_model().objects.filter(username__in=usernames)
+                .values_list('username', flat=True))
+    if taken:
+        raise ValueError(
+            f'Usernames already taken: {", ".join(sorted(taken))}')
+
+
+def _key(value):
+    return (value or '').strip().lower() or None
+
+
+def _link(model, users, link_by):
+    # links unlinked rows of `model` whose email or id_number matches
+    # exactly one new user, returns the number linked
+    wanted = {}
+    for row, pk in users:
+        if _key(row.get(link_by)):
+            wanted.setdefault(_key(row[link_by]), []).append(pk)
+    if not wanted:
+        return 0
+
+    matches = {}
+    for pk, value in (model.objects.filter(user__isnull=True)
+                      .exclude(**{f'{link_by}__isnull': True})
+                      .values_list('pk', link_by)):
+        if _key(value) in wanted:
+            matches.setdefault(_key(value), []).append(pk)
+    # two teachers (or two new users) sharing an email can't tell whose
+    # account it is
+    links = {pks[0]: wanted[value][0] for value, pks in matches.items()
+             if len(pks) == 1 and len(wanted[value]) == 1}
+    if not links:
+        return 0
+
+    model.objects.filter(pk__in=list(links)).update(
+        updated_at=timezone.now(),
+        user_id=Case(*[When(pk=pk, then=user) for pk, user in links.items()],
+                     output_field=IntegerField()))
+    # rows changed by .update() send no signals
+    entities.bump(model, list(links))
+    return len(links)
+
+
+def provision(rows, link_by=None, workers=None):
+    # creates the users of `rows`, returns (users, teachers linked,
+    # guardians linked)
+    validate(rows, link_by)
+    passwords = hash_passwords([row['password'] for row in rows], workers)
+
+    User = get_user_model()
+    using = tenancy.db_alias()
+    with transaction.atomic(using=using):
+        User.objects.bulk_create([
+            User(username=row['username'], email=row.get('email') or '',
+                 password=password)
+            for row, password in zip(rows, passwords)])
+        # bulk_create only sets primary keys on PostgreSQL
+        users = User.objects.filter(
+            username__in=[row['username'] for row in rows])
+        by_username = {user.username: user for user in users}
+        users = [by_username[row['username']] for row in rows]
+
+        teachers = guardians = 0
+        if link_by:
+            pairs = [(row, user.pk) for row, user in zip(rows, users)]
+            teachers = _link(Teacher, pairs, link_by)
+            guardians = _link(Guardian, pairs, link_by)
+
+    return users, teachers, guardians
@@ -0,0 +1,156 @@
+import json
+from collections import defaultdict
+
+from django.db import connections
+
+from school import tenancy
+
+from .models import ClassRoom, Guardian, Student, Teacher
+
+# A class room with its class teacher, students and their guardians as one
+# JSON document, shaped like the equivalent nested GraphQL query. On
+# PostgreSQL the database builds the document with json_build_object and
+# json_agg, elsewhere it's put together from values() rows; either way no
+# model instances are made. Ids are strings, like GraphQL's ID.
+
+# model -> (key in the document, field name)
+FIELDS = {
+    Teacher: [
+        ('id', 'id'),
+        ('fullName', 'full_name'),
+        ('phone', 'phone'),
+        ('email', 'email'),
+    ],
+    Student: [
+        ('id', 'id'),
+        ('fullName', 'full_name'),
+        ('registrationNumber', 'registration_number'),
+        ('phone', 'phone'),
+        ('email', 'email'),
+        ('DOB', 'DOB'),
+        ('joinedAt', 'joined_at'),
+        ('gender', 'gender'),
+        ('religion', 'religion'),
+        ('active', 'active'),
+    ],
+    Guardian: [
+        ('id', 'id'),
+        ('fullName', 'full_name'),
+        ('phone', 'phone'),
+        ('email', 'email'),
+    ],
+}
+
+
+def _object(connection, model, alias, extra=''):
+    # json_build_object('id', s."id"::text, 'fullName', s."full_name", ...)
+    qn = connection.ops.quote_name
+    pairs = [f"'{key}', {alias}.{qn(model._meta.get_field(name).column)}"
+             + ('::text' if key == 'id' else '')
+             for key, name in FIELDS[model]]
+    return f'json_build_object({", ".join(pairs)}{extra})'
+
+
+def _roster_sql(connection):
+    qn = connection.ops.quote_name
+    through = Student.guardians.through._meta
+    guardians = (
+        f'SELECT json_agg({_object(connection, Guardian, "g")} '
+        f'ORDER BY g.{qn("id")}) '
+        f'FROM {qn(Guardian._meta.db_table)} g '
+        f'JOIN {qn(through.db_table)} sg '
+        f'ON sg.{qn(through.get_field("guardian").column)} = g.{qn("id")} '
+        f'WHERE sg.{qn(through.get_field("student").column)} = s.{qn("id")}')
+    student = _object(connection, Student, 's',
+                      f", 'guardians', COALESCE(({guardians}), '[]'::json)")
+    students = (
+        f'SELECT json_agg({student} '
+        f'ORDER BY s.{qn("full_name")}, s.{qn("id")}) '
+        f'FROM {qn(Student._meta.db_table)} s '
+        f'WHERE s.{qn(Student._meta.get_field("class_room").column)} '
+        f'= c.{qn("id")}')
+    return (
+        f"SELECT json_build_object('id', c.{qn('id')}::text, "
+        f"'name', c.{qn('name')}, "
+        f"'classTeacher', {_object(connection, Teacher, 't')}, "
+        f"'students', COALESCE(({students}), '[]'::json))::text "
+        f'FROM {qn(ClassRoom._meta.db_table)} c '
+        f'JOIN {qn(Teacher._meta.db_table)} t ON t.{qn("id")} = '
+        f'c.{qn(ClassRoom._meta.get_field("class_teacher").column)} '
+        f'WHERE c.{qn("id")} = %s')
+
+
+def _rows(queryset, model):
+    # values() rows renamed to the document's keys, dates as ISO strings
+    names = [name for key, name in FIELDS[model]]
+    rows = []
+    for values in queryset.values_list(*names):
+        row = {}
+        for (key, name), value in zip(FIELDS[model], values):
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            elif key == 'id':
+                value = str(value)
+            row[key] = value
+        rows.append(row)
+    return rows
+
+
+def _roster_portable(class_room_id):
+    class_room = (ClassRoom.objects.filter(pk=class_room_id)
+                  .values('id', 'name', 'class_teacher_id').first())
+    if class_room is None:
+        return None
+
+    teacher = _rows(Teacher.objects.filter(pk=class_room['class_teacher_id']),
+                    Teacher)
+    students = _rows(Student.objects.filter(class_room_id=class_room_id)
+                     .order_by('full_name', 'id'), Student)
+
+    through = Student.guardians.through.objects.filter(
+        student__class_room_id=class_room_id)
+    links = list(through.values_list('student_id', 'guardian_id'))
+    guardians = {row['id']: row for row in _rows(
+        Guardian.objects.filter(pk__in={pk for _, pk in links}), Guardian)}
+    by_student = defaultdict(list)
+    for student_id, guardian_id in sorted(links, key=lambda link: link[1]):
+        by_student[str(student_id)].append(guardians[str(guardian_id)])
+    for student in students:
+        student['guardians'] = by_student[student['id']]
+
+    return {
+        'id': str(class_room['id']),
+        'name': class_room['name'],
+        'classTeacher': teacher[0],
+        'students': students,
+    }
+
+
+def _roster_postgresql(connection, class_room_id):
+    with connection.cursor() as cursor:
+        cursor.execute(_roster_sql(connection), [class_room_id])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def roster_json(class_room_id):
+    # the document as JSON text, or None when there's no such class room.
+    # On PostgreSQL the text goes out as the database wrote it.
+    connection = connections[tenancy.db_alias()]
+    if connection.vendor == 'postgresql':
+        return _roster_postgresql(connection, class_room_id)
+
+    document = _roster_portable(class_room_id)
+    if document is None:
+        return None
+    return json.dumps(document, ensure_ascii=False, separators=(',', ':'))
+
+
+def roster(class_room_id):
+    # the document as dicts and lists, for the classRoster field
+    connection = connections[tenancy.db_alias()]
+    if connection.vendor != 'postgresql':
+        return _roster_portable(class_room_id)
+
+    text = _roster_postgresql(connection, class_room_id)
+    return None if text is None else json.loads(text)
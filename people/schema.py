@@ -2,14 +2,21 @@ from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from django.conf import settings
+from django.utils import timezone
 
 from graphql_jwt.utils import jwt_decode
 import graphene
+from graphene.types.generic import GenericScalar
 from graphene_django import DjangoObjectType
 from graphql import GraphQLError
 from graphql_jwt.decorators import login_required
 
-from .models import Guardian, Teacher, Student, Subject, ClassRoom
+from . import (audit, cascade, counts, dedup, entities, filters, jobs,
+               normalize, projections, promotion, provisioning, roster,
+               sync)
+from .models import (Guardian, Teacher, Student, Subject, ClassRoom,
+                     CascadeDelete, Job, Tombstone, AuditEntry,
+                     DuplicateGuardian)
 
 
 # User
@@ -34,10 +41,58 @@ class CreateUser(graphene.Mutation):
         )
         user.set_password(password)
         user.save()
+        audit.record(info, AuditEntry.CREATE, user,
+                     after=audit.snapshot(user))
 
         return CreateUser(user=user)
 
 
+class UserInput(graphene.InputObjectType):
+    username = graphene.String(required=True)
+    email = graphene.String()
+    password = graphene.String(required=True)
+    # only used to find the teacher or guardian to link to
+    id_number = graphene.String()
+
+
+class BulkCreateUsers(graphene.Mutation):
+    # passwords are hashed in parallel, see people.provisioning
+    users = graphene.List(UserType)
+    linked_teachers = graphene.Int()
+    linked_guardians = graphene.Int()
+
+    class Arguments:
+        users = graphene.List(UserInput, required=True)
+        # email or id_number
+        link_by = graphene.String()
+
+    @login_required
+    def mutate(self, info, users, link_by=None):
+        if not info.context.user.is_staff:
+            raise GraphQLError("Error! Only staff can create users in bulk")
+        if len(users) > settings.BULK_CREATE_USERS_MAX:
+            raise GraphQLError(
+                f"Error! At most {settings.BULK_CREATE_USERS_MAX} users at "
+                f"a time, see manage.py provision_users")
+
+        try:
+            created, teachers, guardians = provisioning.provision(
+                [dict(user) for user in users], link_by)
+        except Exception as err:
+            raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.BULK, None,
+                     model=get_user_model().__name__,
+                     changes={'usernames': [user.username
+                                            for user in created],
+                              'link_by': link_by,
+                              'linked_teachers': teachers,
+                              'linked_guardians': guardians})
+
+        return BulkCreateUsers(users=created,
+                               linked_teachers=teachers,
+                               linked_guardians=guardians)
+
+
 class UpdateUser(graphene.Mutation):
     user = graphene.Field(UserType)
 
@@ -50,6 +105,7 @@ class UpdateUser(graphene.Mutation):
     @login_required
     def mutate(self, info, id, username=None, email=None, password=None):
         user = get_user_model().objects.get(pk=id)
+        before = audit.snapshot(user)
         if username and username != user.username:
             user.username = username
         if email and email != user.email:
@@ -58,6 +114,8 @@ class UpdateUser(graphene.Mutation):
             user.set_password(password)
 
         user.save()
+        audit.record(info, AuditEntry.UPDATE, user, before,
+                     audit.snapshot(user))
 
         return UpdateUser(user=user)
 
@@ -71,10 +129,12 @@ class DeleteUser(graphene.Mutation):
     @login_required
     def mutate(self, info, id):
         user = get_user_model().objects.get(pk=id)
+        before = audit.snapshot(user)
         try:
             user.delete()
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.DELETE, user, before)
 
         return DeleteUser(user=user)
 
@@ -83,6 +143,7 @@ class DeleteUser(graphene.Mutation):
 class GuardianType(DjangoObjectType):
     class Meta:
         model = Guardian
+        exclude_fields = ('phone_key', 'id_number_key')
 
 
 class CreateGuardian(graphene.Mutation):
@@ -125,6 +186,8 @@ class CreateGuardian(graphene.Mutation):
                 active=active)
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.CREATE, guardian,
+                     after=audit.snapshot(guardian))
 
         return CreateGuardian(guardian=guardian)
 
@@ -147,10 +210,17 @@ class UpdateGuardian(graphene.Mutation):
     @login_required
     def mutate(self, info, id, **kwargs):
         try:
-            Guardian.objects.filter(pk=id).update(**kwargs)
+            before = audit.snapshot(Guardian.objects.get(pk=id))
+            kwargs.update(normalize.lookup_keys(kwargs))
+            Guardian.objects.filter(pk=id).update(
+                updated_at=timezone.now(), **kwargs)
+            entities.bump(Guardian, [id])
+            dedup.schedule([id])
             guardian = Guardian.objects.get(pk=id)
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.UPDATE, guardian, before,
+                     audit.snapshot(guardian))
 
         return UpdateGuardian(guardian=guardian)
 
@@ -164,18 +234,148 @@ class DeleteGuardian(graphene.Mutation):
     @login_required
     def mutate(self, info, id):
         guardian = Guardian.objects.get(pk=id)
+        before = audit.snapshot(guardian)
         try:
             guardian.delete()
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.DELETE, guardian, before)
 
         return DeleteGuardian(guardian=guardian)
 
 
+class DuplicateGuardianType(DjangoObjectType):
+    class Meta:
+        model = DuplicateGuardian
+
+
+class MergeGuardians(graphene.Mutation):
+    # see people.dedup.merge
+    guardian = graphene.Field(GuardianType)
+    students_moved = graphene.Int()
+
+    class Arguments:
+        keep = graphene.Int(required=True)
+        merge = graphene.List(graphene.Int, required=True)
+
+    @login_required
+    def mutate(self, info, keep, merge):
+        kept = Guardian.objects.filter(pk=keep).first()
+        if kept is None:
+            raise GraphQLError(f"Error! No such guardian {keep}")
+        before = audit.snapshot(kept)
+        merged = list(Guardian.objects.filter(pk__in=merge).exclude(pk=keep))
+        try:
+            guardian, moved = dedup.merge(keep, merge)
+        except Exception as err:
+            raise GraphQLError(f"Error! {str(err)}")
+        for other in merged:
+            audit.record(info, AuditEntry.DELETE, other,
+                         audit.snapshot(other))
+        audit.record(info, AuditEntry.UPDATE, guardian, before,
+                     audit.snapshot(guardian))
+
+        return MergeGuardians(guardian=guardian, students_moved=moved)
+
+
+class DismissDuplicateGuardian(graphene.Mutation):
+    # the two guardians are different people, they won't be offered again
+    duplicate = graphene.Field(DuplicateGuardianType)
+
+    class Arguments:
+        id = graphene.Int(required=True)
+
+    @login_required
+    def mutate(self, info, id):
+        duplicate = get_object_or_404(DuplicateGuardian, pk=id)
+        before = audit.snapshot(duplicate)
+        duplicate.status = DuplicateGuardian.DISMISSED
+        duplicate.save(update_fields=['status'])
+        audit.record(info, AuditEntry.UPDATE, duplicate, before,
+                     audit.snapshot(duplicate))
+
+        return DismissDuplicateGuardian(duplicate=duplicate)
+
+
+# Job
+class JobType(DjangoObjectType):
+    class Meta:
+        model = Job
+
+
+def _jobs_for(user):
+    # staff see every job, everybody else only the jobs they started
+    if user.is_staff:
+        return Job.objects.all()
+    return Job.objects.filter(created_by=user)
+
+
+class EnqueueJob(graphene.Mutation):
+    job = graphene.Field(JobType)
+
+    class Arguments:
+        kind = graphene.String(required=True)
+        payload = graphene.JSONString()
+
+    @login_required
+    def mutate(self, info, kind, payload=None):
+        user = info.context.user
+        if not jobs.is_registered(kind):
+            raise GraphQLError(f"Error! Unknown job kind {kind}")
+        if not (jobs.is_public(kind) or user.is_staff):
+            raise GraphQLError(f"Error! Only staff can start {kind} jobs")
+
+        try:
+            job = jobs.enqueue(kind, payload, user=user)
+        except Exception as err:
+            raise GraphQLError(f"Error! {str(err)}")
+
+        return EnqueueJob(job=job)
+
+
+class CancelJob(graphene.Mutation):
+    job = graphene.Field(JobType)
+
+    class Arguments:
+        id = graphene.Int(required=True)
+
+    @login_required
+    def mutate(self, info, id):
+        job = get_object_or_404(_jobs_for(info.context.user), pk=id)
+        # a job that already started can't be stopped from here
+        cancelled = Job.objects.filter(pk=id, status=Job.QUEUED).update(
+            status=Job.CANCELLED)
+        if not cancelled:
+            raise GraphQLError(f"Error! Job {id} is already {job.status}")
+        # nothing will run the delete the job was for
+        CascadeDelete.objects.filter(
+            job_id=id, status=CascadeDelete.PENDING).update(
+                status=CascadeDelete.CANCELLED, finished_at=timezone.now())
+        job.refresh_from_db()
+
+        return CancelJob(job=job)
+
+
+# Cascades
+class BlastRadiusType(graphene.ObjectType):
+    # rows a delete takes with it through on_delete=CASCADE
+    class_rooms = graphene.Int()
+    students = graphene.Int()
+    guardian_links = graphene.Int()
+    # rows of other apps: attendance, exam results, lessons...
+    other_rows = graphene.Int()
+
+
+class CascadeDeleteType(DjangoObjectType):
+    class Meta:
+        model = CascadeDelete
+
+
 # Teacher
 class TeacherType(DjangoObjectType):
     class Meta:
         model = Teacher
+        exclude_fields = ('phone_key', 'id_number_key')
 
 
 class CreateTeacher(graphene.Mutation):
@@ -225,6 +425,8 @@ class CreateTeacher(graphene.Mutation):
                     teacher.subjects.add(subject)
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.CREATE, teacher,
+                     after=audit.snapshot(teacher, ['subjects']))
 
         return CreateTeacher(teacher=teacher)
 
@@ -250,7 +452,11 @@ class UpdateTeacher(graphene.Mutation):
         try:
             subjects = kwargs.pop('subjects')
 
-            Teacher.objects.filter(pk=id).update(**kwargs)
+            before = audit.snapshot(Teacher.objects.get(pk=id), ['subjects'])
+            kwargs.update(normalize.lookup_keys(kwargs))
+            Teacher.objects.filter(pk=id).update(
+                updated_at=timezone.now(), **kwargs)
+            entities.bump(Teacher, [id])
             teacher = Teacher.objects.get(pk=id)
 
             if subjects:
@@ -260,25 +466,47 @@ class UpdateTeacher(graphene.Mutation):
 
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.UPDATE, teacher, before,
+                     audit.snapshot(teacher, ['subjects']))
 
         return UpdateTeacher(teacher=teacher)
 
 
 class DeleteTeacher(graphene.Mutation):
     teacher = graphene.Field(TeacherType)
+    blast_radius = graphene.Field(BlastRadiusType)
+    cascade_delete = graphene.Field(CascadeDeleteType)
 
     class Arguments:
         id = graphene.Int(required=True)
+        dry_run = graphene.Boolean()
 
     @login_required
-    def mutate(self, info, id):
+    def mutate(self, info, id, dry_run=False):
         teacher = Teacher.objects.get(pk=id)
+        radius = cascade.blast_radius(CascadeDelete.TEACHER, teacher.pk)
+        if dry_run:
+            return DeleteTeacher(teacher=teacher,
+                                 blast_radius=BlastRadiusType(**radius))
+
+        before = audit.snapshot(teacher, ['subjects'])
+        if cascade.is_large(radius):
+            cascade_delete = cascade.schedule(CascadeDelete.TEACHER, teacher,
+                                              radius, info.context.user)
+            # logged when scheduled, the job runs without a request
+            audit.record(info, AuditEntry.DELETE, teacher, before)
+            return DeleteTeacher(teacher=teacher,
+                                 blast_radius=BlastRadiusType(**radius),
+                                 cascade_delete=cascade_delete)
+
         try:
             teacher.delete()
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.DELETE, teacher, before)
 
-        return DeleteTeacher(teacher=teacher)
+        return DeleteTeacher(teacher=teacher,
+                             blast_radius=BlastRadiusType(**radius))
 
 
 # Student
@@ -286,6 +514,9 @@ class StudentType(DjangoObjectType):
     class Meta:
         model = Student
 
+    def resolve_class_room(self, info, **kwargs):
+        return entities.load(info.context, ClassRoom, self.class_room_id)
+
 
 class CreateStudent(graphene.Mutation):
     student = graphene.Field(StudentType)
@@ -339,6 +570,8 @@ class CreateStudent(graphene.Mutation):
 
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.CREATE, student,
+                     after=audit.snapshot(student, ['guardians']))
 
         return CreateStudent(student=student)
 
@@ -369,7 +602,10 @@ class UpdateStudent(graphene.Mutation):
 
             guardians = kwargs.pop('guardians')
 
-            Student.objects.filter(pk=id).update(**kwargs)
+            before = audit.snapshot(Student.objects.get(pk=id), ['guardians'])
+            Student.objects.filter(pk=id).update(
+                updated_at=timezone.now(), **kwargs)
+            entities.bump(Student, [id])
             student = Student.objects.get(pk=id)
 
             if guardians:
@@ -379,6 +615,8 @@ class UpdateStudent(graphene.Mutation):
 
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.UPDATE, student, before,
+                     audit.snapshot(student, ['guardians']))
 
         return UpdateStudent(student=student)
 
@@ -392,10 +630,12 @@ class DeleteStudent(graphene.Mutation):
     @login_required
     def mutate(self, info, id):
         student = Student.objects.get(pk=id)
+        before = audit.snapshot(student, ['guardians'])
         try:
             student.delete()
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.DELETE, student, before)
 
         return DeleteStudent(student=student)
 
@@ -419,6 +659,8 @@ class CreateSubject(graphene.Mutation):
             subject = Subject.objects.create(name=name)
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.CREATE, subject,
+                     after=audit.snapshot(subject))
 
         return CreateSubject(subject=subject)
 
@@ -433,10 +675,15 @@ class UpdateSubject(graphene.Mutation):
     @login_required
     def mutate(self, info, id, **kwargs):
         try:
-            Subject.objects.filter(pk=id).update(**kwargs)
+            before = audit.snapshot(Subject.objects.get(pk=id))
+            Subject.objects.filter(pk=id).update(
+                updated_at=timezone.now(), **kwargs)
+            entities.bump(Subject, [id])
             subject = Subject.objects.get(pk=id)
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.UPDATE, subject, before,
+                     audit.snapshot(subject))
 
         return UpdateSubject(subject=subject)
 
@@ -450,10 +697,12 @@ class DeleteSubject(graphene.Mutation):
     @login_required
     def mutate(self, info, id):
         subject = Subject.objects.get(pk=id)
+        before = audit.snapshot(subject)
         try:
             subject.delete()
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.DELETE, subject, before)
 
         return DeleteSubject(subject=subject)
 
@@ -463,6 +712,9 @@ class ClassRoomType(DjangoObjectType):
     class Meta:
         model = ClassRoom
 
+    def resolve_class_teacher(self, info, **kwargs):
+        return entities.load(info.context, Teacher, self.class_teacher_id)
+
 
 class CreateClassRoom(graphene.Mutation):
     class_room = graphene.Field(ClassRoomType)
@@ -470,16 +722,19 @@ class CreateClassRoom(graphene.Mutation):
     class Arguments:
         name = graphene.String(required=True)
         class_teacher = graphene.Int(required=True)
+        level = graphene.Int()
 
     @login_required
-    def mutate(self, info, name, class_teacher):
+    def mutate(self, info, name, class_teacher, level=None):
 
         try:
             class_teacher = Teacher.objects.get(pk=class_teacher)
             class_room = ClassRoom.objects.create(
-                name=name, class_teacher=class_teacher)
+                name=name, class_teacher=class_teacher, level=level)
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.CREATE, class_room,
+                     after=audit.snapshot(class_room))
 
         return CreateClassRoom(class_room=class_room)
 
@@ -491,33 +746,290 @@ class UpdateClassRoom(graphene.Mutation):
         id = graphene.Int(required=True)
         name = graphene.String()
         class_teacher = graphene.Int()
+        level = graphene.Int()
 
     @login_required
     def mutate(self, info, id, **kwargs):
         try:
-            ClassRoom.objects.filter(pk=id).update(**kwargs)
+            before = audit.snapshot(ClassRoom.objects.get(pk=id))
+            ClassRoom.objects.filter(pk=id).update(
+                updated_at=timezone.now(), **kwargs)
+            entities.bump(ClassRoom, [id])
             class_room = ClassRoom.objects.get(pk=id)
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.UPDATE, class_room, before,
+                     audit.snapshot(class_room))
 
         return UpdateClassRoom(class_room=class_room)
 
 
 class DeleteClassRoom(graphene.Mutation):
     class_room = graphene.Field(ClassRoomType)
+    blast_radius = graphene.Field(BlastRadiusType)
+    cascade_delete = graphene.Field(CascadeDeleteType)
 
     class Arguments:
         id = graphene.Int(required=True)
+        dry_run = graphene.Boolean()
 
     @login_required
-    def mutate(self, info, id):
+    def mutate(self, info, id, dry_run=False):
         class_room = ClassRoom.objects.get(pk=id)
+        radius = cascade.blast_radius(CascadeDelete.CLASS_ROOM, class_room.pk)
+        if dry_run:
+            return DeleteClassRoom(class_room=class_room,
+                                   blast_radius=BlastRadiusType(**radius))
+
+        before = audit.snapshot(class_room)
+        if cascade.is_large(radius):
+            cascade_delete = cascade.schedule(CascadeDelete.CLASS_ROOM,
+                                              class_room, radius,
+                                              info.context.user)
+            audit.record(info, AuditEntry.DELETE, class_room, before)
+            return DeleteClassRoom(class_room=class_room,
+                                   blast_radius=BlastRadiusType(**radius),
+                                   cascade_delete=cascade_delete)
+
         try:
             class_room.delete()
         except Exception as err:
             raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.DELETE, class_room, before)
+
+        return DeleteClassRoom(class_room=class_room,
+                               blast_radius=BlastRadiusType(**radius))
+
+
+# Promotion
+class ClassPromotionInput(graphene.InputObjectType):
+    from_class_room = graphene.Int(required=True)
+    to_class_room = graphene.Int(required=True)
+
+
+class ClassPromotionType(graphene.ObjectType):
+    from_class_room = graphene.Field(ClassRoomType)
+    to_class_room = graphene.Field(ClassRoomType)
+    students = graphene.Int()
+
+
+class PromoteClasses(graphene.Mutation):
+    promotions = graphene.List(ClassPromotionType)
+    graduating_class_rooms = graphene.List(ClassRoomType)
+    promoted = graphene.Int()
+    graduated = graphene.Int()
+    dry_run = graphene.Boolean()
+
+    class Arguments:
+        promotions = graphene.List(ClassPromotionInput, required=True)
+        # what happens to the last class: its students are deactivated
+        # and/or moved to graduate_class_room
+        graduating_class_rooms = graphene.List(graphene.Int)
+        graduate_class_room = graphene.Int()
+        deactivate_graduates = graphene.Boolean()
+        # inactive students (left school) stay where they are by default
+        only_active = graphene.Boolean()
+        dry_run = graphene.Boolean()
+
+    @login_required
+    def mutate(self,
+               info,
+               promotions,
+               graduating_class_rooms=None,
+               graduate_class_room=None,
+               deactivate_graduates=True,
+               only_active=True,
+               dry_run=False):
+        mapping = [(p.from_class_room, p.to_class_room) for p in promotions]
+        graduating = graduating_class_rooms or []
+
+        try:
+            promotion.validate(mapping, graduating, graduate_class_room)
+            per_class = promotion.preview(mapping, graduating, only_active)
+            if not dry_run:
+                promoted, graduated = promotion.promote(
+                    mapping, graduating, graduate_class_room,
+                    deactivate_graduates, only_active)
+        except Exception as err:
+            raise GraphQLError(f"Error! {str(err)}")
+
+        if not dry_run:
+            audit.record(info, AuditEntry.BULK, None, model='Student',
+                         changes={'promotions': mapping,
+                                  'graduating_class_rooms': graduating,
+                                  'graduate_class_room': graduate_class_room,
+                                  'deactivate_graduates': deactivate_graduates,
+                                  'promoted': promoted,
+                                  'graduated': graduated})
+        else:
+            promoted = sum(per_class.get(source, 0) for source, _ in mapping)
+            graduated = sum(per_class.get(pk, 0) for pk in graduating)
+
+        class_rooms = ClassRoom.objects.in_bulk(
+            [pk for pair in mapping for pk in pair] + graduating)
+
+        return PromoteClasses(
+            promotions=[
+                ClassPromotionType(from_class_room=class_rooms[source],
+                                   to_class_room=class_rooms[target],
+                                   students=per_class.get(source, 0))
+                for source, target in mapping
+            ],
+            graduating_class_rooms=[class_rooms[pk] for pk in graduating],
+            promoted=promoted,
+            graduated=graduated,
+            dry_run=dry_run)
+
+
+# Sync
+class TombstoneType(DjangoObjectType):
+    class Meta:
+        model = Tombstone
+
+
+class ChangeSetType(graphene.ObjectType):
+    guardians = graphene.List(GuardianType)
+    subjects = graphene.List(SubjectType)
+    teachers = graphene.List(TeacherType)
+    class_rooms = graphene.List(ClassRoomType)
+    students = graphene.List(StudentType)
+    deleted = graphene.List(TombstoneType)
+    # pass this back as changesSince(cursor: ...) for the next page
+    cursor = graphene.String()
+    has_more = graphene.Boolean()
+
+
+# Audit
+class AuditEntryType(DjangoObjectType):
+    class Meta:
+        model = AuditEntry
+
+
+class EntityCacheStatsType(graphene.ObjectType):
+    model = graphene.String()
+    hits = graphene.Int()
+    misses = graphene.Int()
+    hit_rate = graphene.Float()
+
+
+class AuditLogType(graphene.ObjectType):
+    entries = graphene.List(AuditEntryType)
+    # pass this back as auditLog(cursor: ...) for older entries
+    cursor = graphene.String()
+    has_more = graphene.Boolean()
+
+
+class DateRangeInput(graphene.InputObjectType):
+    gte = graphene.Date()
+    lte = graphene.Date()
+
+
+class StudentFilterInput(graphene.InputObjectType):
+    class_room = graphene.Int()
+    active = graphene.Boolean()
+    gender = graphene.String()
+    joined_at = graphene.Field(DateRangeInput)
+    DOB = graphene.Field(DateRangeInput)
+    guardian = graphene.Int()
+
+
+class TeacherFilterInput(graphene.InputObjectType):
+    active = graphene.Boolean()
+    gender = graphene.String()
+    joined_at = graphene.Field(DateRangeInput)
+    DOB = graphene.Field(DateRangeInput)
+    subject = graphene.Int()
+
+
+class GuardianFilterInput(graphene.InputObjectType):
+    active = graphene.Boolean()
+    gender = graphene.String()
+    DOB = graphene.Field(DateRangeInput)
+    student = graphene.Int()
+
+
+class CountType(graphene.ObjectType):
+    total_count = graphene.Int()
+    # from planner statistics, see people.counts
+    is_estimate = graphene.Boolean()
+
+
+class PersonType(graphene.ObjectType):
+    # whoever has the id number, a guardian, a teacher or both
+    guardian = graphene.Field(GuardianType)
+    teacher = graphene.Field(TeacherType)
 
-        return DeleteClassRoom(class_room=class_room)
+
+def _guardians(search=None, filter=None, order_by=None):
+    # the queryset of the guardians and guardiansCount queries
+    try:
+        qs = filters.order(
+            filters.apply(Guardian.objects.all(), filter), order_by)
+    except Exception as err:
+        raise GraphQLError(f"Error! {str(err)}")
+
+    if search:
+        filter = (Q(full_name__icontains=search)
+                  | Q(phone__icontains=search)
+                  | Q(email__icontains=search)
+                  | Q(gender__icontains=search)
+                  | Q(id_number__icontains=search)
+                  | Q(profession__icontains=search)
+                  | Q(DOB__icontains=search))
+
+        qs = qs.filter(filter)
+
+    return qs
+
+
+def _teachers(search=None, filter=None, order_by=None):
+    # the queryset of the teachers and teachersCount queries
+    try:
+        qs = filters.order(
+            filters.apply(Teacher.objects.all(), filter), order_by)
+    except Exception as err:
+        raise GraphQLError(f"Error! {str(err)}")
+
+    if search:
+        filter = (Q(full_name__icontains=search)
+                  | Q(phone__icontains=search)
+                  | Q(email__icontains=search)
+                  | Q(gender__icontains=search)
+                  | Q(id_number__icontains=search)
+                  | Q(subjects__name__icontains=search)
+                  | Q(joined_at__icontains=search)
+                  | Q(DOB__icontains=search))
+
+        # the subjects join repeats rows
+        qs = qs.filter(filter).distinct()
+
+    return qs
+
+
+def _students(search=None, filter=None, order_by=None):
+    # the queryset of the students and studentsCount queries
+    try:
+        qs = filters.order(
+            filters.apply(Student.objects.all(), filter), order_by)
+    except Exception as err:
+        raise GraphQLError(f"Error! {str(err)}")
+
+    if search:
+        filter = (Q(full_name__icontains=search)
+                  | Q(phone__icontains=search)
+                  | Q(email__icontains=search)
+                  | Q(registration_number__icontains=search)
+                  | Q(class_room__name__icontains=search)
+                  | Q(gender__icontains=search)
+                  | Q(guardians__full_name__icontains=search)
+                  | Q(guardians__id_number__icontains=search)
+                  | Q(joined_at__icontains=search)
+                  | Q(DOB__icontains=search))
+
+        # the guardians join repeats rows
+        qs = qs.filter(filter).distinct()
+
+    return qs
 
 
 class Query(graphene.ObjectType):
@@ -544,10 +1056,44 @@ class Query(graphene.ObjectType):
     guardians = graphene.List(
         GuardianType,
         search=graphene.String(),
+        filter=GuardianFilterInput(),
+        order_by=graphene.List(graphene.String),
         first=graphene.Int(),
         skip=graphene.Int(),
     )
 
+    # likely duplicates to merge, most likely first
+    duplicate_guardians = graphene.List(
+        DuplicateGuardianType,
+        guardian=graphene.Int(),
+        first=graphene.Int(),
+        skip=graphene.Int(),
+    )
+
+    # approximate counts of big tables cost the same at any size
+    guardians_count = graphene.Field(
+        CountType,
+        search=graphene.String(),
+        filter=GuardianFilterInput(),
+        approximate=graphene.Boolean(),
+    )
+
+    # exact lookups however the phone or id number is written, e.g.
+    # "0712 345 678" or "+254712345678", on indexed columns rather than
+    # the search argument's scans; see people.normalize
+    guardian_by_phone = graphene.List(
+        GuardianType,
+        phone=graphene.String(required=True),
+    )
+    teacher_by_phone = graphene.List(
+        TeacherType,
+        phone=graphene.String(required=True),
+    )
+    person_by_id_number = graphene.Field(
+        PersonType,
+        id_number=graphene.String(required=True),
+    )
+
     teacher = graphene.Field(
         TeacherType,
         id=graphene.Int(required=True),
@@ -556,10 +1102,20 @@ class Query(graphene.ObjectType):
     teachers = graphene.List(
         TeacherType,
         search=graphene.String(),
+        filter=TeacherFilterInput(),
+        order_by=graphene.List(graphene.String),
         first=graphene.Int(),
         skip=graphene.Int(),
     )
 
+    # approximate counts of big tables cost the same at any size
+    teachers_count = graphene.Field(
+        CountType,
+        search=graphene.String(),
+        filter=TeacherFilterInput(),
+        approximate=graphene.Boolean(),
+    )
+
     student = graphene.Field(
         StudentType,
         id=graphene.Int(required=True),
@@ -568,10 +1124,20 @@ class Query(graphene.ObjectType):
     students = graphene.List(
         StudentType,
         search=graphene.String(),
+        filter=StudentFilterInput(),
+        order_by=graphene.List(graphene.String),
         first=graphene.Int(),
         skip=graphene.Int(),
     )
 
+    # approximate counts of big tables cost the same at any size
+    students_count = graphene.Field(
+        CountType,
+        search=graphene.String(),
+        filter=StudentFilterInput(),
+        approximate=graphene.Boolean(),
+    )
+
     subject = graphene.Field(
         SubjectType,
         id=graphene.Int(required=True),
@@ -596,6 +1162,52 @@ class Query(graphene.ObjectType):
         skip=graphene.Int(),
     )
 
+    # a class room, its class teacher, students and their guardians as
+    # one JSON document built by the database, see people.roster
+    class_roster = GenericScalar(
+        id=graphene.Int(required=True),
+    )
+
+    # poll this to follow a delete that was moved to the background
+    cascade_delete = graphene.Field(
+        CascadeDeleteType,
+        id=graphene.Int(required=True),
+    )
+
+    job = graphene.Field(
+        JobType,
+        id=graphene.Int(required=True),
+    )
+
+    # without a cursor it returns everything, page by page
+    changes_since = graphene.Field(
+        ChangeSetType,
+        cursor=graphene.String(),
+        first=graphene.Int(),
+    )
+
+    jobs = graphene.List(
+        JobType,
+        status=graphene.String(),
+        kind=graphene.String(),
+        first=graphene.Int(),
+        skip=graphene.Int(),
+    )
+
+    # staff only, of the worker answering
+    entity_cache_stats = graphene.List(EntityCacheStatsType)
+
+    # staff only, newest first
+    audit_log = graphene.Field(
+        AuditLogType,
+        model=graphene.String(),
+        object_id=graphene.Int(),
+        user_id=graphene.Int(),
+        operation=graphene.String(),
+        cursor=graphene.String(),
+        first=graphene.Int(),
+    )
+
     @login_required
     def resolve_user(self, info, id, **kwargs):
         return get_object_or_404(get_user_model(), pk=id)
@@ -638,7 +1250,27 @@ class Query(graphene.ObjectType):
 
     @login_required
     def resolve_guardian(self, info, id, **kwargs):
-        return get_object_or_404(Guardian, pk=id)
+        return entities.get_or_404(Guardian, id)
+
+    @login_required
+    def resolve_duplicate_guardians(self,
+                                    info,
+                                    guardian=None,
+                                    first=None,
+                                    skip=None,
+                                    **kwargs):
+        qs = DuplicateGuardian.objects.filter(status=DuplicateGuardian.OPEN)
+        if guardian:
+            qs = qs.filter(Q(guardian_id=guardian) | Q(other_id=guardian))
+        qs = qs.order_by('-score', 'id')
+
+        if skip:
+            qs = qs[skip:]
+
+        if first:
+            qs = qs[:first]
+
+        return qs
 
     @login_required
     def resolve_guardians(self,
@@ -646,18 +1278,10 @@ class Query(graphene.ObjectType):
                           search=None,
                           first=None,
                           skip=None,
+                          filter=None,
+                          order_by=None,
                           **kwargs):
-        qs = Guardian.objects.all()
-        if search:
-            filter = (Q(full_name__icontains=search)
-                      | Q(phone__icontains=search)
-                      | Q(email__icontains=search)
-                      | Q(gender__icontains=search)
-                      | Q(id_number__icontains=search)
-                      | Q(profession__icontains=search)
-                      | Q(DOB__icontains=search))
-
-            qs = qs.filter(filter)
+        qs = _guardians(search, filter, order_by)
 
         if skip:
             qs = qs[skip:]
@@ -665,11 +1289,51 @@ class Query(graphene.ObjectType):
         if first:
             qs = qs[:first]
 
-        return qs
+        return projections.resolve(qs, info, GuardianType)
+
+    @login_required
+    def resolve_guardian_by_phone(self, info, phone, **kwargs):
+        key = normalize.phone(phone)
+        if key is None:
+            return []
+        return projections.resolve(
+            Guardian.objects.filter(phone_key=key).order_by('id'), info,
+            GuardianType)
+
+    @login_required
+    def resolve_teacher_by_phone(self, info, phone, **kwargs):
+        key = normalize.phone(phone)
+        if key is None:
+            return []
+        return projections.resolve(
+            Teacher.objects.filter(phone_key=key).order_by('id'), info,
+            TeacherType)
+
+    @login_required
+    def resolve_person_by_id_number(self, info, id_number, **kwargs):
+        key = normalize.id_number(id_number)
+        if key is None:
+            return None
+        guardian = Guardian.objects.filter(id_number_key=key).first()
+        teacher = Teacher.objects.filter(id_number_key=key).first()
+        if guardian is None and teacher is None:
+            return None
+        return PersonType(guardian=guardian, teacher=teacher)
+
+    @login_required
+    def resolve_guardians_count(self,
+                                info,
+                                search=None,
+                                filter=None,
+                                approximate=False,
+                                **kwargs):
+        total_count, is_estimate = counts.count(
+            _guardians(search, filter), approximate)
+        return CountType(total_count=total_count, is_estimate=is_estimate)
 
     @login_required
     def resolve_teacher(self, info, id, **kwargs):
-        return get_object_or_404(Teacher, pk=id)
+        return entities.get_or_404(Teacher, id)
 
     @login_required
     def resolve_teachers(self,
@@ -677,19 +1341,10 @@ class Query(graphene.ObjectType):
                          search=None,
                          first=None,
                          skip=None,
+                         filter=None,
+                         order_by=None,
                          **kwargs):
-        qs = Teacher.objects.all()
-        if search:
-            filter = (Q(full_name__icontains=search)
-                      | Q(phone__icontains=search)
-                      | Q(email__icontains=search)
-                      | Q(gender__icontains=search)
-                      | Q(id_number__icontains=search)
-                      | Q(subjects__icontains=search)
-                      | Q(joined_at__icontains=search)
-                      | Q(DOB__icontains=search))
-
-            qs = qs.filter(filter)
+        qs = _teachers(search, filter, order_by)
 
         if skip:
             qs = qs[skip:]
@@ -697,11 +1352,22 @@ class Query(graphene.ObjectType):
         if first:
             qs = qs[:first]
 
-        return qs
+        return projections.resolve(qs, info, TeacherType)
+
+    @login_required
+    def resolve_teachers_count(self,
+                               info,
+                               search=None,
+                               filter=None,
+                               approximate=False,
+                               **kwargs):
+        total_count, is_estimate = counts.count(
+            _teachers(search, filter), approximate)
+        return CountType(total_count=total_count, is_estimate=is_estimate)
 
     @login_required
     def resolve_student(self, info, id, **kwargs):
-        return get_object_or_404(Student, pk=id)
+        return entities.get_or_404(Student, id)
 
     @login_required
     def resolve_students(self,
@@ -709,21 +1375,10 @@ class Query(graphene.ObjectType):
                          search=None,
                          first=None,
                          skip=None,
+                         filter=None,
+                         order_by=None,
                          **kwargs):
-        qs = Student.objects.all()
-        if search:
-            filter = (Q(full_name__icontains=search)
-                      | Q(phone__icontains=search)
-                      | Q(email__icontains=search)
-                      | Q(registration_number__icontains=search)
-                      | Q(class_room__icontains=search)
-                      | Q(gender__icontains=search)
-                      | Q(guardians__full_name__icontains=search)
-                      | Q(guardians__id_number__icontains=search)
-                      | Q(joined_at__icontains=search)
-                      | Q(DOB__icontains=search))
-
-            qs = qs.filter(filter)
+        qs = _students(search, filter, order_by)
 
         if skip:
             qs = qs[skip:]
@@ -731,11 +1386,22 @@ class Query(graphene.ObjectType):
         if first:
             qs = qs[:first]
 
-        return qs
+        return projections.resolve(qs, info, StudentType)
+
+    @login_required
+    def resolve_students_count(self,
+                               info,
+                               search=None,
+                               filter=None,
+                               approximate=False,
+                               **kwargs):
+        total_count, is_estimate = counts.count(
+            _students(search, filter), approximate)
+        return CountType(total_count=total_count, is_estimate=is_estimate)
 
     @login_required
     def resolve_subject(self, info, id, **kwargs):
-        return get_object_or_404(Subject, pk=id)
+        return entities.get_or_404(Subject, id)
 
     @login_required
     def resolve_subjects(self,
@@ -760,7 +1426,7 @@ class Query(graphene.ObjectType):
 
     @login_required
     def resolve_class_room(self, info, id, **kwargs):
-        return get_object_or_404(ClassRoom, pk=id)
+        return entities.get_or_404(ClassRoom, id)
 
     @login_required
     def resolve_class_rooms(self,
@@ -772,7 +1438,7 @@ class Query(graphene.ObjectType):
         qs = ClassRoom.objects.all()
         if search:
             filter = (Q(name__icontains=search)
-                      | Q(class_teacher__full_name__icontainss=search))
+                      | Q(class_teacher__full_name__icontains=search))
 
             qs = qs.filter(filter)
 
@@ -784,15 +1450,85 @@ class Query(graphene.ObjectType):
 
         return qs
 
+    @login_required
+    def resolve_class_roster(self, info, id, **kwargs):
+        document = roster.roster(id)
+        if document is None:
+            raise GraphQLError("Error! No such class room")
+        return document
+
+    @login_required
+    def resolve_cascade_delete(self, info, id, **kwargs):
+        return get_object_or_404(CascadeDelete, pk=id)
+
+    @login_required
+    def resolve_changes_since(self, info, cursor=None, first=None, **kwargs):
+        try:
+            changes, cursor, has_more = sync.changes_since(cursor, first)
+        except Exception as err:
+            raise GraphQLError(f"Error! {str(err)}")
+
+        return ChangeSetType(cursor=cursor, has_more=has_more, **changes)
+
+    @login_required
+    def resolve_job(self, info, id, **kwargs):
+        return get_object_or_404(_jobs_for(info.context.user), pk=id)
+
+    @login_required
+    def resolve_jobs(self,
+                     info,
+                     status=None,
+                     kind=None,
+                     first=None,
+                     skip=None,
+                     **kwargs):
+        qs = _jobs_for(info.context.user).order_by('-created_at')
+        if status:
+            qs = qs.filter(status=status)
+
+        if kind:
+            qs = qs.filter(kind=kind)
+
+        if skip:
+            qs = qs[skip:]
+
+        if first:
+            qs = qs[:first]
+
+        return qs
+
+    @login_required
+    def resolve_entity_cache_stats(self, info, **kwargs):
+        if not info.context.user.is_staff:
+            raise GraphQLError("Error! Only staff can read cache stats")
+
+        return [EntityCacheStatsType(**row) for row in entities.stats()]
+
+    @login_required
+    def resolve_audit_log(self, info, cursor=None, first=None, **kwargs):
+        if not info.context.user.is_staff:
+            raise GraphQLError("Error! Only staff can read the audit log")
+
+        try:
+            entries, cursor, has_more = audit.history(
+                cursor=cursor, first=first, **kwargs)
+        except Exception as err:
+            raise GraphQLError(f"Error! {str(err)}")
+
+        return AuditLogType(entries=entries, cursor=cursor, has_more=has_more)
+
 
 class Mutation(graphene.ObjectType):
     create_user = CreateUser.Field()
+    bulk_create_users = BulkCreateUsers.Field()
     update_user = UpdateUser.Field()
     delete_user = DeleteUser.Field()
 
     create_guardian = CreateGuardian.Field()
     update_guardian = UpdateGuardian.Field()
     delete_guardian = DeleteGuardian.Field()
+    merge_guardians = MergeGuardians.Field()
+    dismiss_duplicate_guardian = DismissDuplicateGuardian.Field()
 
     create_teacher = CreateTeacher.Field()
     update_teacher = UpdateTeacher.Field()
@@ -809,3 +1545,8 @@ class Mutation(graphene.ObjectType):
     create_class_room = CreateClassRoom.Field()
     update_class_room = UpdateClassRoom.Field()
     delete_class_room = DeleteClassRoom.Field()
+
+    promote_classes = PromoteClasses.Field()
+
+    enqueue_job = EnqueueJob.Field()
+    cancel_job = CancelJob.Field()
@@ -0,0 +1,74 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import dedup, entities, normalize
+from .models import Guardian, Teacher, Student, Subject, ClassRoom, Tombstone
+
+SYNCED = (Guardian, Teacher, Student, Subject, ClassRoom)
+
+
+def touch(model, pks):
+    # bump updated_at of rows whose relations changed, bypassing save()
+    pks = list(pks)
+    model.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+    entities.bump(model, pks)
+
+
+@receiver(pre_save, sender=Guardian)
+@receiver(pre_save, sender=Teacher)
+def set_lookup_keys(sender, instance, **kwargs):
+    for key, value in normalize.lookup_keys(vars(instance)).items():
+        setattr(instance, key, value)
+
+
+def bump_saved(sender, instance, **kwargs):
+    entities.bump(sender, [instance.pk])
+
+
+@receiver(post_save, sender=Guardian)
+def check_duplicates(sender, instance, **kwargs):
+    dedup.schedule([instance.pk])
+
+
+def leave_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model=sender.__name__, object_id=instance.pk)
+    entities.bump(sender, [instance.pk])
+
+
+# connected per model: receivers without a sender would run on every save
+# of every model, and stop Django from fast-deleting the rows of any
+for model in SYNCED:
+    post_save.connect(bump_saved, sender=model)
+    post_delete.connect(leave_tombstone, sender=model)
+
+
+@receiver(pre_delete, sender=Guardian)
+def touch_guardian_students(sender, instance, **kwargs):
+    touch(Student, instance.student_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Subject)
+def touch_subject_teachers(sender, instance, **kwargs):
+    touch(Teacher, instance.teacher_set.values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=Student.guardians.through)
+@receiver(m2m_changed, sender=Teacher.subjects.through)
+def touch_m2m_owner(sender, instance, action, reverse, model, pk_set,
+                    **kwargs):
+    if not action.startswith('post_'):
+        return
+
+    # students own their guardians, teachers their subjects
+    owner = Student if sender is Student.guardians.through else Teacher
+    if not reverse:
+        touch(owner, [instance.pk])
+    elif pk_set:
+        touch(owner, pk_set)
+    # the cached rows of the other side are bumped too
+    if reverse:
+        entities.bump(type(instance), [instance.pk])
+    elif pk_set:
+        entities.bump(model, pk_set)
@@ -0,0 +1,116 @@
+import logging
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.backends.signals import connection_created
+
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+# ANALYZE runs the statement again, so only plain reads are explained
+re_select = re.compile(r'^\s*(SELECT|WITH)\b', re.IGNORECASE)
+re_writes = re.compile(r'\b(INSERT|UPDATE|DELETE|FOR\s+UPDATE)\b',
+                       re.IGNORECASE)
+
+_local = threading.local()
+
+
+class ResolverPathMiddleware:
+    # remembers the operation and the resolver running in this thread, for
+    # the queries it issues. Not restored on the way out: a list resolver
+    # returns a queryset that is only evaluated after it returns.
+    # It runs for every field, so names are only worked out when recording.
+    def resolve(self, next, root, info, **args):
+        _local.operation = info.operation
+        _local.path = info.path
+        return next(root, info, **args)
+
+
+def clear_context(**kwargs):
+    _local.operation = _local.path = None
+
+
+def _explain(connection, sql, params):
+    # in a savepoint: an error would otherwise abort the transaction of
+    # the request on PostgreSQL
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+
+def _save(entry, using):
+    _local.recording = True
+    try:
+        entry.save(using=using)
+        # keeps the table a ring of the newest SLOW_QUERY_KEEP entries
+        SlowQuery.objects.using(using).filter(
+            pk__lte=entry.pk - settings.SLOW_QUERY_KEEP).delete()
+    except Exception:
+        logger.exception('Could not record a slow query')
+    finally:
+        _local.recording = False
+
+
+def record(connection, sql, params, duration_ms):
+    plan = None
+    if (connection.vendor == 'postgresql' and re_select.match(sql)
+            and not re_writes.search(sql)
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE):
+        try:
+            plan = _explain(connection, sql, params)
+        except Exception:
+            logger.exception('Could not explain a slow query')
+
+    operation = getattr(_local, 'operation', None)
+    path = getattr(_local, 'path', None)
+    entry = SlowQuery(
+        duration_ms=duration_ms,
+        sql=sql[:settings.SLOW_QUERY_MAX_LENGTH],
+        params=repr(params)[:settings.SLOW_QUERY_MAX_LENGTH],
+        operation=(operation.name.value
+                   if operation is not None and operation.name else None),
+        path='.'.join(str(key) for key in path)[:255] if path else None,
+        plan=plan)
+    logger.warning('Slow query (%.0f ms) in %s %s', duration_ms,
+                   entry.operation, entry.path)
+
+    # written to the database of the statement once its transaction is
+    # committed, outside of it; if it rolls back the entry is dropped with
+    # it and only the warning above is left
+    transaction.on_commit(lambda: _save(entry, connection.alias),
+                          using=connection.alias)
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    if getattr(_local, 'recording', False):
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration_ms = (time.perf_counter() - start) * 1000
+
+    if duration_ms >= settings.SLOW_QUERY_MS and not many:
+        _local.recording = True
+        try:
+            record(context['connection'], sql, params, duration_ms)
+        finally:
+            _local.recording = False
+
+    return result
+
+
+def install(sender, connection, **kwargs):
+    if (settings.SLOW_QUERY_ENABLED
+            and execute_wrapper not in connection.execute_wrappers):
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+connection_created.connect(install)
+request_started.connect(clear_context)
@@ -0,0 +1,84 @@
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cursors import decode_cursor, encode_cursor
+from .models import Guardian, Teacher, Student, Subject, ClassRoom, Tombstone
+
+# name in the change set -> (queryset, timestamp field)
+SOURCES = OrderedDict([
+    ('guardians', (Guardian.objects.all(), 'updated_at')),
+    ('subjects', (Subject.objects.all(), 'updated_at')),
+    ('teachers', (Teacher.objects.prefetch_related('subjects'),
+                  'updated_at')),
+    ('class_rooms', (ClassRoom.objects.all(), 'updated_at')),
+    ('students', (Student.objects.prefetch_related('guardians'),
+                  'updated_at')),
+    ('deleted', (Tombstone.objects.all(), 'deleted_at')),
+])
+
+
+class CursorExpired(Exception):
+    pass
+
+
+def _after(field, position):
+    # keyset condition: strictly after (timestamp, id). An id of None
+    # means every row at that timestamp was already sent.
+    timestamp, pk = parse_datetime(position[0]), position[1]
+    if pk is None:
+        return Q(**{f'{field}__gt': timestamp})
+    return (Q(**{f'{field}__gt': timestamp})
+            | Q(**{field: timestamp, 'pk__gt': pk}))
+
+
+def changes_since(cursor=None, first=None):
+    # rows created, updated or deleted since `cursor`, up to `first` of
+    # each kind, plus the cursor to continue from. Changes are read in
+    # windows ending SYNC_SETTLE_SECONDS ago, so rows of transactions that
+    # were still in flight (with updated_at already set) aren't skipped.
+    first = min(first or settings.SYNC_PAGE_SIZE, settings.SYNC_MAX_PAGE_SIZE)
+    now = timezone.now()
+    state = decode_cursor(cursor) if cursor else {'until': None, 'after': {}}
+
+    oldest = [parse_datetime(p[0]) for p in state['after'].values()]
+    retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    if oldest and min(oldest) < now - retention:
+        # deletes that old may have been pruned already
+        raise CursorExpired('Cursor expired, sync from scratch')
+
+    until = state['until']
+    if until is None:
+        until = (now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS))
+        until = until.isoformat()
+        if not cursor:
+            # a fresh client has nothing to delete
+            state['after']['deleted'] = [until, None]
+
+    changes = {}
+    has_more = False
+    for name, (qs, field) in SOURCES.items():
+        qs = qs.filter(**{f'{field}__lte': parse_datetime(until)})
+        position = state['after'].get(name)
+        if position:
+            qs = qs.filter(_after(field, position))
+
+        rows = list(qs.order_by(field, 'pk')[:first + 1])
+        if len(rows) > first:
+            rows = rows[:first]
+            has_more = True
+            last = rows[-1]
+            state['after'][name] = [getattr(last, field).isoformat(), last.pk]
+        else:
+            state['after'][name] = [until, None]
+
+        changes[name] = rows
+
+    # once every kind is drained the next call opens a new window
+    state['until'] = until if has_more else None
+
+    return changes, encode_cursor(state), has_more
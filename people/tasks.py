@@ -0,0 +1,7 @@
+from . import cascade
+from .jobs import job
+
+
+@job('cascade_delete')
+def cascade_delete(job, cascade_delete):
+    cascade.run(cascade_delete, job=job)
@@ -1,3 +1,414 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from graphql_jwt.shortcuts import get_token
+
+from . import dedup, jobs, normalize, sync
+from .models import (CascadeDelete, ClassRoom, DuplicateGuardian, Guardian,
+                     Job, Student, Subject, Teacher, Tombstone)
+
+calls = []
+
+
+@jobs.job('test_ok')
+def ok(job, value=None):
+    calls.append(job.pk)
+    return {'value': value}
+
+
+@jobs.job('test_fail')
+def fail(job):
+    calls.append(job.pk)
+    raise RuntimeError('boom')
+
+
+class JobTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claim_takes_due_jobs_in_order(self):
+        later = jobs.enqueue('test_ok',
+                             run_at=timezone.now() + timedelta(hours=1))
+        second = jobs.enqueue('test_ok')
+        first = jobs.enqueue('test_ok',
+                             run_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(jobs.claim('w').pk, first.pk)
+        self.assertEqual(jobs.claim('w').pk, second.pk)
+        self.assertIsNone(jobs.claim('w'))
+        later.refresh_from_db()
+        self.assertEqual(later.status, Job.QUEUED)
+
+    def test_claim_marks_the_job_running(self):
+        queued = jobs.enqueue('test_ok', {'value': 1})
+        job = jobs.claim('worker-1')
+
+        self.assertEqual(job.pk, queued.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.worker, 'worker-1')
+        self.assertIsNotNone(job.heartbeat_at)
+
+    def test_run_stores_the_result(self):
+        jobs.enqueue('test_ok', {'value': 1})
+        job = jobs.claim('w')
+        jobs.run(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result, {'value': 1})
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failed_job_is_retried_later(self):
+        queued = jobs.enqueue('test_fail', max_attempts=2)
+        jobs.run(jobs.claim('w'))
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.QUEUED)
+        self.assertIn('boom', queued.error)
+        self.assertGreater(queued.run_at, timezone.now())
+        # backing off
+        self.assertIsNone(jobs.claim('w'))
+
+        Job.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        jobs.run(jobs.claim('w'))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.FAILED)
+        self.assertEqual(queued.attempts, 2)
+        self.assertEqual(calls, [queued.pk, queued.pk])
+
+    def _stale(self, max_attempts):
+        queued = jobs.enqueue('test_ok', max_attempts=max_attempts)
+        jobs.claim('dead')
+        Job.objects.filter(pk=queued.pk).update(
+            heartbeat_at=timezone.now() - timedelta(
+                seconds=settings.JOB_STALE_AFTER + 1))
+        return queued
+
+    def test_stale_job_with_attempts_left_is_reclaimed(self):
+        queued = self._stale(max_attempts=2)
+
+        job = jobs.claim('alive')
+        self.assertEqual(job.pk, queued.pk)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(job.worker, 'alive')
+
+    def test_stale_job_without_attempts_left_fails(self):
+        queued = self._stale(max_attempts=1)
+
+        self.assertIsNone(jobs.claim('alive'))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.FAILED)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIsNotNone(queued.finished_at)
+
+    def test_stale_cascade_job_fails_its_delete(self):
+        queued = self._stale(max_attempts=1)
+        cascade_delete = CascadeDelete.objects.create(
+            target=CascadeDelete.CLASS_ROOM, target_id=1, target_name='1',
+            batch_size=10, job=queued, status=CascadeDelete.RUNNING)
+        finished = CascadeDelete.objects.create(
+            target=CascadeDelete.CLASS_ROOM, target_id=2, target_name='2',
+            batch_size=10, job=queued, status=CascadeDelete.DONE)
+
+        self.assertIsNone(jobs.claim('alive'))
+        cascade_delete.refresh_from_db()
+        self.assertEqual(cascade_delete.status, CascadeDelete.FAILED)
+        self.assertIn('heartbeat', cascade_delete.error)
+        self.assertIsNotNone(cascade_delete.finished_at)
+        finished.refresh_from_db()
+        self.assertEqual(finished.status, CascadeDelete.DONE)
+
+    def test_running_job_with_heartbeat_is_left_alone(self):
+        queued = jobs.enqueue('test_ok', max_attempts=3)
+        jobs.claim('busy')
+        jobs.set_progress(queued, 5, total=10)
+
+        self.assertIsNone(jobs.claim('other'))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.RUNNING)
+        self.assertEqual((queued.progress, queued.total), (5, 10))
+
+    def test_cancelling_a_cascade_job_cancels_the_delete(self):
+        user = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        job = jobs.enqueue('cascade_delete', {'cascade_delete': 0})
+        cascade_delete = CascadeDelete.objects.create(
+            target=CascadeDelete.CLASS_ROOM, target_id=1, target_name='1',
+            batch_size=10, job=job)
+
+        response = self.client.post(
+            '/graphql/',
+            {'query': 'mutation { cancelJob(id: %d) { job { status } } }'
+                      % job.pk},
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'JWT {get_token(user)}')
+
+        self.assertEqual(response.json()['data']['cancelJob']['job'],
+                         {'status': Job.CANCELLED})
+        cascade_delete.refresh_from_db()
+        self.assertEqual(cascade_delete.status, CascadeDelete.CANCELLED)
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class ChangesSinceTests(TestCase):
+    def setUp(self):
+        self.at = timezone.now() - timedelta(hours=1)
+
+    def _subjects(self, count):
+        subjects = [Subject.objects.create(name=f'Subject {i}')
+                    for i in range(count)]
+        # all changed at the same moment
+        Subject.objects.update(updated_at=self.at)
+        return [subject.pk for subject in subjects]
+
+    def _drain(self, cursor=None, first=None):
+        # pages until has_more is false: ([changes, ...], cursor)
+        pages = []
+        while True:
+            changes, cursor, has_more = sync.changes_since(cursor, first)
+            pages.append(changes)
+            if not has_more:
+                return pages, cursor
+
+    def test_rows_with_the_same_timestamp_are_paged_by_id(self):
+        pks = self._subjects(5)
+
+        pages, _ = self._drain(first=2)
+
+        self.assertEqual(
+            [[subject.pk for subject in page['subjects']] for page in pages],
+            [pks[0:2], pks[2:4], pks[4:5]])
+
+    def test_page_boundary_neither_repeats_nor_skips(self):
+        pks = self._subjects(4)
+
+        pages, _ = self._drain(first=2)
+
+        # a full last page ends the window, no empty page follows
+        seen = [subject.pk for page in pages for subject in page['subjects']]
+        self.assertEqual(seen, pks)
+        self.assertEqual(len(pages), 2)
+
+    def test_next_window_brings_only_later_changes(self):
+        pks = self._subjects(3)
+        _, cursor = self._drain(first=2)
+
+        Subject.objects.filter(pk=pks[1]).update(name='Renamed',
+                                                 updated_at=timezone.now())
+        pages, cursor = self._drain(cursor, first=2)
+
+        self.assertEqual(
+            [subject.name for page in pages for subject in page['subjects']],
+            ['Renamed'])
+        changes, _, has_more = sync.changes_since(cursor)
+        self.assertEqual(changes['subjects'], [])
+        self.assertFalse(has_more)
+
+    def test_deletes_come_as_tombstones(self):
+        pks = self._subjects(2)
+        _, cursor = self._drain()
+
+        Subject.objects.get(pk=pks[0]).delete()
+        pages, _ = self._drain(cursor)
+
+        deleted = [(tombstone.model, tombstone.object_id)
+                   for page in pages for tombstone in page['deleted']]
+        self.assertEqual(deleted, [('Subject', pks[0])])
+
+    def test_fresh_sync_gets_no_tombstones(self):
+        pks = self._subjects(2)
+        Subject.objects.get(pk=pks[0]).delete()
+        Tombstone.objects.update(deleted_at=self.at)
+
+        pages, _ = self._drain()
+
+        self.assertEqual([page['deleted'] for page in pages], [[]])
+        self.assertEqual(
+            [subject.pk for page in pages for subject in page['subjects']],
+            [pks[1]])
+
+
+@override_settings(PHONE_COUNTRY_CODE='254')
+class NormalizeTests(TestCase):
+    def test_phone(self):
+        for value in ('0712 345 678', '+254712345678', '00254 712-345-678',
+                      712345678, '254712345678'):
+            self.assertEqual(normalize.phone(value), '712345678')
+        self.assertIsNone(normalize.phone('12'))
+        self.assertIsNone(normalize.phone(None))
+
+    def test_short_number_keeps_country_code_lookalike(self):
+        # too short to be the country code plus a national number
+        self.assertEqual(normalize.phone('2541234'), '2541234')
+
+    def test_id_number(self):
+        self.assertEqual(normalize.id_number(' 00a12-3 '), 'A123')
+        self.assertEqual(normalize.id_number(12345), '12345')
+        self.assertIsNone(normalize.id_number('000'))
+
+    def test_name(self):
+        self.assertEqual(normalize.name('KAMAU, Mary'),
+                         normalize.name('Mary Kamau'))
+        self.assertEqual(normalize.name('Zoë  Njoki'), 'njoki zoe')
+        self.assertIsNone(normalize.name(''))
+
+    def test_soundex(self):
+        for word, code in (('Robert', 'R163'), ('Rupert', 'R163'),
+                           ('Ashcraft', 'A261'), ('Tymczak', 'T522'),
+                           ('Pfister', 'P236'), ('Lee', 'L000')):
+            self.assertEqual(normalize.soundex(word), code)
+
+    def test_name_code_ignores_order_and_middle_names(self):
+        self.assertEqual(normalize.name_code('Mary Wanjiru Kamau'),
+                         normalize.name_code('KAMAU, Mary'))
+        self.assertIsNone(normalize.name_code('J.'))
+
+    def test_email(self):
+        self.assertEqual(normalize.email(' Mary@Example.COM '),
+                         'mary@example.com')
+        self.assertIsNone(normalize.email('not an email'))
+        self.assertEqual(normalize.email_local('Mary.Kamau+school@x.com'),
+                         'marykamau')
+
+    def test_lookup_keys(self):
+        self.assertEqual(
+            normalize.lookup_keys({'phone': 712345678, 'full_name': 'M'}),
+            {'phone_key': '712345678'})
+
+
+def _record(full_name='Mary Kamau', phone=None, email=None, id_number=None):
+    return dedup._record({'full_name': full_name, 'phone': phone,
+                          'email': email, 'id_number': id_number})
+
+
+class ScoreTests(TestCase):
+    def test_same_id_number_and_name(self):
+        value, reasons = dedup.score(_record(id_number='123'),
+                                     _record(id_number='0123'))
+        self.assertEqual(value, 1)
+        self.assertEqual(reasons, ['same id number', 'same name'])
+
+    def test_different_id_numbers_never_match(self):
+        value, reasons = dedup.score(
+            _record(id_number='1', phone='0712345678'),
+            _record(id_number='2', phone='712345678'))
+        self.assertEqual((value, reasons), (0, []))
+
+    def test_phone_and_similar_name(self):
+        value, reasons = dedup.score(
+            _record('Mary Kamau', phone='0712 345 678'),
+            _record('KAMAU, Mary W.', phone='+254712345678'))
+        self.assertGreaterEqual(value, settings.DEDUP_THRESHOLD)
+        self.assertEqual(reasons, ['same phone', 'similar name'])
+
+    def test_email_local_part_counts_less(self):
+        same, _ = dedup.score(_record(email='mary@a.com'),
+                              _record(email='MARY@a.com'))
+        similar, reasons = dedup.score(_record(email='mary@a.com'),
+                                       _record(email='m.a.r.y@b.com'))
+        self.assertAlmostEqual(same - similar, 0.15)
+        self.assertIn('similar email', reasons)
+
+    def test_name_alone_is_not_enough(self):
+        value, _ = dedup.score(_record(), _record())
+        self.assertLess(value, settings.DEDUP_THRESHOLD)
+
+
+class DedupTests(TestCase):
+    def setUp(self):
+        teacher = Teacher.objects.create(full_name='Teacher')
+        self.class_room = ClassRoom.objects.create(name='1A',
+                                                   class_teacher=teacher)
+
+    def _student(self, *guardians):
+        student = Student.objects.create(full_name='Student',
+                                         class_room=self.class_room)
+        student.guardians.add(*guardians)
+        return student
+
+    def test_check_finds_the_guardians_sharing_a_key(self):
+        kept = Guardian.objects.create(full_name='Mary Kamau',
+                                       phone='0712345678')
+        other = Guardian.objects.create(full_name='Kamau Mary',
+                                        phone='+254712345678')
+        Guardian.objects.create(full_name='John Otieno',
+                                phone='0700000000')
+
+        # as each is saved
+        self.assertEqual(dedup.check([kept.pk]), 0)
+        self.assertEqual(dedup.check([other.pk]), 1)
+        duplicate = DuplicateGuardian.objects.get()
+        self.assertEqual((duplicate.guardian_id, duplicate.other_id),
+                         (kept.pk, other.pk))
+
+    def test_dismissed_pairs_are_not_brought_back(self):
+        kept = Guardian.objects.create(full_name='Mary Kamau',
+                                       phone='0712345678')
+        other = Guardian.objects.create(full_name='Mary Kamau',
+                                        phone='0712345678')
+        dedup.find_duplicates()
+        DuplicateGuardian.objects.update(status=DuplicateGuardian.DISMISSED)
+
+        self.assertEqual(dedup.check([kept.pk]), 0)
+        self.assertEqual(dedup.find_duplicates(), 0)
+        self.assertEqual(
+            list(DuplicateGuardian.objects.values_list(
+                'guardian_id', 'other_id', 'status')),
+            [(kept.pk, other.pk, DuplicateGuardian.DISMISSED)])
+
+    def test_pair_stored_by_a_concurrent_check_is_kept(self):
+        kept = Guardian.objects.create(full_name='Mary Kamau',
+                                       phone='0712345678')
+        other = Guardian.objects.create(full_name='Mary Kamau',
+                                        phone='0712345678')
+        DuplicateGuardian.objects.create(guardian=kept, other=other,
+                                         score=1, reasons='')
+        records = dedup._records([kept.pk, other.pk])
+
+        # nothing replaced, as if the other check committed in between
+        dedup._save_pairs({(kept.pk, other.pk)}, records, Q(pk__in=[]))
+
+        self.assertEqual(DuplicateGuardian.objects.count(), 1)
+
+    def test_merge_moves_links_and_fills_blanks(self):
+        kept = Guardian.objects.create(full_name='Mary Kamau',
+                                       phone='0712345678')
+        merged = Guardian.objects.create(full_name='Mary W. Kamau',
+                                         phone='0799999999',
+                                         email='mary@example.com',
+                                         id_number='123')
+        shared = self._student(kept, merged)
+        moved = self._student(merged)
+        untouched = self._student(kept)
+        DuplicateGuardian.objects.create(guardian=kept, other=merged,
+                                         score=1, reasons='')
+
+        guardian, students_moved = dedup.merge(kept.pk, [merged.pk])
+
+        self.assertEqual(students_moved, 1)
+        self.assertFalse(Guardian.objects.filter(pk=merged.pk).exists())
+        for student in (shared, moved, untouched):
+            self.assertEqual(
+                list(student.guardians.values_list('pk', flat=True)),
+                [kept.pk])
+        guardian.refresh_from_db()
+        # blanks filled, what the kept guardian had stays
+        self.assertEqual(guardian.phone, '0712345678')
+        self.assertEqual(guardian.email, 'mary@example.com')
+        # unique, so only set once the merged row is gone
+        self.assertEqual(guardian.id_number, '123')
+        self.assertFalse(DuplicateGuardian.objects.exists())
+
+    def test_merge_refuses_nothing_and_unknown_guardians(self):
+        kept = Guardian.objects.create(full_name='Mary Kamau')
+
+        with self.assertRaises(ValueError):
+            dedup.merge(kept.pk, [kept.pk])
+        with self.assertRaises(ValueError):
+            dedup.merge(kept.pk, [kept.pk + 1])
@@ -0,0 +1,41 @@
+import json
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def default(data):
+    # what graphene_django does out of the box
+    return json.dumps(data, separators=(',', ':'))
+
+
+def compact(data):
+    # non-ascii names go out as utf-8 rather than \uXXXX escapes
+    return json.dumps(
+        data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def fast(data):
+    # orjson when it is installed, which is several times quicker on big
+    # lists; it refuses a few types json copes with, so fall back then
+    if orjson is None:
+        return compact(data)
+    try:
+        return orjson.dumps(data)
+    except TypeError:
+        return compact(data)
+
+
+_encoder = None
+
+
+def get_encoder():
+    global _encoder
+    if _encoder is None:
+        _encoder = import_string(settings.GRAPHQL_JSON_ENCODER)
+    return _encoder
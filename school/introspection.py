@@ -0,0 +1,90 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from graphql.language import ast
+
+# the answer to a query that only asks about the schema (__schema,
+# __type, __typename) only changes with a deploy, so the encoded body is
+# kept per process and served without executing anything
+
+SCHEMA_FIELDS = {'__schema', '__type', '__typename'}
+
+_responses = OrderedDict()
+_lock = threading.Lock()
+_sdl = None
+
+
+class CachedResponse:
+    def __init__(self, body):
+        self.body = body
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.etag = quote_etag(hashlib.sha1(body).hexdigest())
+
+
+def is_schema_only(document_ast):
+    for definition in document_ast.definitions:
+        if not isinstance(definition, ast.OperationDefinition):
+            continue
+        if definition.operation != 'query':
+            return False
+        for selection in definition.selection_set.selections:
+            if not (isinstance(selection, ast.Field)
+                    and selection.name.value in SCHEMA_FIELDS):
+                return False
+    return True
+
+
+def _key(query, variables, operation_name, pretty):
+    return (query, repr(sorted((variables or {}).items())),
+            operation_name, pretty)
+
+
+def get(query, variables, operation_name, pretty):
+    if not query:
+        return None
+    return _responses.get(_key(query, variables, operation_name, pretty))
+
+
+def store(query, variables, operation_name, pretty, body):
+    response = CachedResponse(body)
+    with _lock:
+        _responses[_key(query, variables, operation_name, pretty)] = response
+        while len(_responses) > settings.GRAPHQL_INTROSPECTION_CACHE_SIZE:
+            _responses.popitem(last=False)
+    return response
+
+
+def sdl():
+    # the schema in SDL: the file written by `manage.py graphql_sdl` at
+    # build time when GRAPHQL_SCHEMA_FILE points at one, printed otherwise
+    global _sdl
+    if _sdl is None:
+        path = settings.GRAPHQL_SCHEMA_FILE
+        if path and os.path.exists(path):
+            with open(path) as f:
+                _sdl = CachedResponse(f.read())
+        else:
+            _sdl = CachedResponse(print_sdl())
+    return _sdl
+
+
+def print_sdl():
+    from graphene_django.settings import graphene_settings
+    return str(graphene_settings.SCHEMA) + '\n'
+
+
+def sdl_view(request):
+    schema = sdl()
+    response = HttpResponse(schema.body,
+                            content_type='text/plain; charset=utf-8')
+    response['ETag'] = schema.etag
+    response['Cache-Control'] = settings.GRAPHQL_CACHE_CONTROL['default']
+    return get_conditional_response(request, etag=schema.etag,
+                                    response=response)
@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+# Under gunicorn every worker writes its samples to files in
+# PROMETHEUS_MULTIPROC_DIR (set up by gunicorn.conf.py) and /metrics adds
+# them up, whichever worker serves it. Without prometheus_client
+# installed everything here is a no-op and /metrics is a 404.
+
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+_local = threading.local()
+_operations = set()
+_operations_lock = threading.Lock()
+
+if prometheus_client is not None:
+    OPERATION_SECONDS = Histogram(
+        'graphql_operation_seconds',
+        'Time to execute a GraphQL operation.',
+        ['operation'])
+    RESOLVER_SECONDS = Histogram(
+        'graphql_resolver_seconds',
+        'Time spent in root field resolvers.',
+        ['field'])
+    SQL_QUERIES = Histogram(
+        'graphql_sql_queries',
+        'SQL statements run by one GraphQL request.',
+        ['operation'], buckets=SQL_COUNT_BUCKETS)
+    SQL_SECONDS = Histogram(
+        'graphql_sql_seconds',
+        'Time spent in SQL by one GraphQL request.',
+        ['operation'])
+    CACHE_REQUESTS = Counter(
+        'school_cache_requests_total',
+        'Lookups in the caches of the app, by cache and result.',
+        ['cache', 'result'])
+    THROTTLED = Counter(
+        'graphql_throttled_total',
+        'Root fields refused by the rate limiter.',
+        ['scope', 'field'])
+    DB_CONNECTIONS = Gauge(
+        'db_connections_open',
+        'Open database connections, summed over live workers.',
+        ['alias'], multiprocess_mode='livesum')
+    REQUESTS_IN_PROGRESS = Gauge(
+        'graphql_requests_in_progress',
+        'GraphQL requests being executed, summed over live workers.',
+        multiprocess_mode='livesum')
+
+
+def enabled():
+    return prometheus_client is not None and settings.METRICS_ENABLED
+
+
+def _operation_label(operation_name):
+    # operation names come from clients, so only the first
+    # METRICS_MAX_OPERATIONS of them get a series of their own
+    if not operation_name:
+        return 'anonymous'
+    if operation_name in _operations:
+        return operation_name
+    with _operations_lock:
+        if len(_operations) < settings.METRICS_MAX_OPERATIONS:
+            _operations.add(operation_name)
+            return operation_name
+    return 'other'
+
+
+class track_operation:
+    # around the execution of one GraphQL request: its latency, and the
+    # number and time of the SQL statements it ran
+    def __init__(self, operation_name):
+        self.operation_name = operation_name
+
+    def __enter__(self):
+        if enabled():
+            _local.sql_count = 0
+            _local.sql_seconds = 0.0
+            REQUESTS_IN_PROGRESS.inc()
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not enabled():
+            return
+        elapsed = time.perf_counter() - self.start
+        REQUESTS_IN_PROGRESS.dec()
+
+        operation = _operation_label(self.operation_name)
+        OPERATION_SECONDS.labels(operation).observe(elapsed)
+        SQL_QUERIES.labels(operation).observe(_local.sql_count)
+        SQL_SECONDS.labels(operation).observe(_local.sql_seconds)
+        _local.sql_count = None
+
+
+class MetricsMiddleware:
+    # times root fields only; nested fields are mostly attribute lookups,
+    # see school.profiling for those
+    def resolve(self, next, root, info, **args):
+        if len(info.path) != 1 or not enabled():
+            return next(root, info, **args)
+
+        start = time.perf_counter()
+        try:
+            return next(root, info, **args)
+        finally:
+            RESOLVER_SECONDS.labels(
+                f'{info.parent_type.name}.{info.field_name}').observe(
+                    time.perf_counter() - start)
+
+
+def count_cache(cache, hit, count=1):
+    if enabled():
+        CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc(count)
+
+
+def count_throttled(scope, field):
+    if enabled():
+        THROTTLED.labels(scope, field).inc()
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    # only counts inside track_operation
+    if getattr(_local, 'sql_count', None) is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        _local.sql_count += 1
+        _local.sql_seconds += time.perf_counter() - start
+
+
+def install(sender, connection, **kwargs):
+    if enabled() and execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def update_connections(**kwargs):
+    if enabled():
+        for alias in connections:
+            # only looks, never opens one
+            open_ = connections[alias].connection is not None
+            DB_CONNECTIONS.labels(alias).set(1 if open_ else 0)
+
+
+connection_created.connect(install)
+connection_created.connect(update_connections)
+request_finished.connect(update_connections)
+
+
+def _registry():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prometheus_client.REGISTRY
+
+
+def metrics_view(request):
+    if not enabled():
+        return HttpResponse(status=404)
+
+    # scrapers send METRICS_TOKEN as a bearer token, when one is set
+    token = settings.METRICS_TOKEN
+    if token and (request.META.get('HTTP_AUTHORIZATION')
+                  != f'Bearer {token}'):
+        return HttpResponseForbidden()
+
+    return HttpResponse(prometheus_client.generate_latest(_registry()),
+                        content_type=prometheus_client.CONTENT_TYPE_LATEST)
@@ -0,0 +1,54 @@
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+re_accepts_br = re.compile(r'\bbr\b')
+re_accepts_gzip = re.compile(r'\bgzip\b')
+
+COMPRESSIBLE = ('application/json', 'application/javascript', 'text/')
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    # django's GZipMiddleware, plus brotli (when installed) and a minimum
+    # size below which compressing isn't worth the cpu
+    def process_response(self, request, response):
+        if (response.streaming or response.has_header('Content-Encoding')
+                or len(response.content) < settings.COMPRESSION_MIN_SIZE
+                or not response.get('Content-Type', '').startswith(
+                    COMPRESSIBLE)):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding', ))
+
+        accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and re_accepts_br.search(accept):
+            encoding = 'br'
+            content = brotli.compress(
+                response.content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        elif re_accepts_gzip.search(accept):
+            encoding = 'gzip'
+            content = compress_string(response.content)
+        else:
+            return response
+
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+
+        # the compressed body isn't byte for byte what the etag was made
+        # from, so it can only be a weak match from here on
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^"', 'W/"', response['ETag'])
+
+        return response
@@ -0,0 +1,204 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseForbidden, JsonResponse)
+from graphql_jwt.exceptions import JSONWebTokenError
+
+# only one cProfile profiler can be active per process
+_lock = threading.Lock()
+
+
+def _is_staff(request):
+    # the JWT middleware only authenticates inside graphene, later than
+    # we need to know
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            user = authenticate(request=request)
+        except JSONWebTokenError:
+            user = None
+        if user is not None:
+            request.user = request._cached_user = user
+    return user is not None and user.is_staff
+
+
+def should_profile(request):
+    # staff can ask for a profile with an `X-Profile: 1` header, and
+    # GRAPHQL_PROFILE_SAMPLE_RATE of all requests are profiled anyway
+    if request.META.get('HTTP_X_PROFILE'):
+        return _is_staff(request)
+    rate = settings.GRAPHQL_PROFILE_SAMPLE_RATE
+    return bool(rate) and random.random() < rate
+
+
+class ResolverTimer:
+    # graphene middleware added to profiled requests only: time and calls
+    # per resolver, e.g. Query.students or StudentType.guardians
+    def __init__(self):
+        self.calls = defaultdict(int)
+        self.seconds = defaultdict(float)
+
+    def resolve(self, next, root, info, **args):
+        name = f'{info.parent_type.name}.{info.field_name}'
+        start = time.perf_counter()
+        try:
+            return next(root, info, **args)
+        finally:
+            self.calls[name] += 1
+            self.seconds[name] += time.perf_counter() - start
+
+    def summary(self):
+        return sorted(({'resolver': name,
+                        'calls': self.calls[name],
+                        'ms': round(self.seconds[name] * 1000, 3)}
+                       for name in self.calls),
+                      key=lambda row: row['ms'], reverse=True)
+
+
+def _resolver_names(timer):
+    # resolve_students -> Query.students, to annotate the cProfile rows
+    names = {}
+    for name in timer.calls:
+        field = name.split('.', 1)[1]
+        snake = ''.join(f'_{c.lower()}' if c.isupper() else c for c in field)
+        names[f'resolve_{snake}'] = name
+    return names
+
+
+def _functions(stats, timer, limit):
+    names = _resolver_names(timer)
+    rows = []
+    for (path, line, function), (_, calls, tottime, cumtime, _) in (
+            stats.stats.items()):
+        row = {'function': function,
+               'file': f'{path}:{line}',
+               'calls': calls,
+               'tottime_ms': round(tottime * 1000, 3),
+               'cumtime_ms': round(cumtime * 1000, 3)}
+        if function in names:
+            row['resolver'] = names[function]
+        rows.append(row)
+    rows.sort(key=lambda row: row['cumtime_ms'], reverse=True)
+    # resolvers are listed even when they are too cheap to make the cut
+    return rows[:limit] + [row for row in rows[limit:] if 'resolver' in row]
+
+
+def _prune(directory):
+    # keeps the newest GRAPHQL_PROFILE_KEEP profiles
+    profiles = sorted(
+        (entry for entry in os.scandir(directory)
+         if entry.name.endswith('.prof')),
+        key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in profiles[settings.GRAPHQL_PROFILE_KEEP:]:
+        os.remove(entry.path)
+        summary = entry.path[:-len('.prof')] + '.json'
+        if os.path.exists(summary):
+            os.remove(summary)
+
+
+def run(request, execute, query, operation_name):
+    # runs `execute` under cProfile and stores the profile next to a json
+    # summary; returns execute's result. Requests that come in while
+    # another one is being profiled just run unprofiled.
+    if not _lock.acquire(blocking=False):
+        return execute()
+
+    timer = request.graphql_profile = ResolverTimer()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            return execute()
+        finally:
+            profiler.disable()
+    finally:
+        _lock.release()
+        elapsed = time.perf_counter() - start
+
+        directory = settings.GRAPHQL_PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        profile_id = time.strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:8]
+        path = os.path.join(directory, profile_id)
+        profiler.dump_stats(path + '.prof')
+
+        user = getattr(request, 'user', None)
+        with open(path + '.json', 'w') as f:
+            json.dump({
+                'id': profile_id,
+                'operation': operation_name,
+                'user': (user.get_username()
+                         if user is not None and user.is_authenticated
+                         else None),
+                'ms': round(elapsed * 1000, 3),
+                'query': query,
+                'resolvers': timer.summary(),
+                'functions': _functions(pstats.Stats(profiler), timer,
+                                        settings.GRAPHQL_PROFILE_TOP),
+            }, f, indent=2)
+
+        request.graphql_profile_id = profile_id
+        _prune(directory)
+
+
+def _profile_path(profile_id, extension):
+    # ids are generated above; anything else can't be a profile
+    if not all(c.isalnum() or c == '-' for c in profile_id):
+        raise Http404
+    path = os.path.join(settings.GRAPHQL_PROFILE_DIR, profile_id + extension)
+    if not os.path.exists(path):
+        raise Http404
+    return path
+
+
+def list_profiles(request):
+    if not _is_staff(request):
+        return HttpResponseForbidden()
+
+    profiles = []
+    directory = settings.GRAPHQL_PROFILE_DIR
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory), reverse=True):
+            if name.endswith('.json'):
+                with open(os.path.join(directory, name)) as f:
+                    summary = json.load(f)
+                profiles.append({key: summary[key] for key in
+                                 ('id', 'operation', 'user', 'ms')})
+    return JsonResponse({'profiles': profiles})
+
+
+def download_profile(request, profile_id):
+    # the raw cProfile dump (for pstats, snakeviz, ...) by default,
+    # ?format=json for the summary or ?format=text for a pstats listing
+    if not _is_staff(request):
+        return HttpResponseForbidden()
+
+    output = request.GET.get('format')
+    if output == 'json':
+        with open(_profile_path(profile_id, '.json')) as f:
+            return HttpResponse(f.read(), content_type='application/json')
+
+    path = _profile_path(profile_id, '.prof')
+    if output == 'text':
+        stream = io.StringIO()
+        stats = pstats.Stats(path, stream=stream)
+        stats.sort_stats('cumulative').print_stats(
+            settings.GRAPHQL_PROFILE_TOP)
+        return HttpResponse(stream.getvalue(), content_type='text/plain')
+
+    response = FileResponse(open(path, 'rb'),
+                            content_type='application/octet-stream')
+    response['Content-Disposition'] = (
+        f'attachment; filename="{profile_id}.prof"')
+    return response
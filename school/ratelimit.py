@@ -0,0 +1,197 @@
+import logging
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from graphql import GraphQLError
+from graphql.language import ast
+
+from . import metrics, tenancy
+
+logger = logging.getLogger(__name__)
+
+# throttled root fields since the worker started, by (scope, field); also
+# exported as graphql_throttled_total, see school.metrics
+throttled = Counter()
+_throttled_lock = threading.Lock()
+
+
+class RateLimited(GraphQLError):
+    def __init__(self, field, retry_after):
+        self.retry_after = retry_after
+        super().__init__(f"Error! Rate limit exceeded for {field}, "
+                         f"retry in {retry_after} seconds")
+
+
+def parse_rate(rate):
+    # "60/30": a bucket of 60 tokens, refilled in 30 seconds
+    tokens, seconds = rate.split('/')
+    return float(tokens), float(tokens) / float(seconds)
+
+
+class LocalBuckets:
+    # token buckets in this process. Fast, but every gunicorn worker
+    # counts on its own, so the effective limit is per worker.
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def take(self, key, cost, capacity, refill):
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated, _ = self.buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            wait = 0
+            if tokens < cost:
+                wait = (cost - tokens) / refill
+            else:
+                tokens = min(capacity, tokens - cost)
+
+            full_at = now + (capacity - tokens) / refill
+            self.buckets[key] = (tokens, now, full_at)
+            if len(self.buckets) > self.max_keys:
+                self.prune(now)
+            return wait
+
+    def prune(self, now):
+        # a bucket that has filled up again is the same as none
+        for key, (_, _, full_at) in list(self.buckets.items()):
+            if full_at <= now:
+                del self.buckets[key]
+
+
+class CacheBuckets:
+    # token buckets in the Django cache, shared by every worker. The
+    # read-modify-write isn't atomic, so concurrent requests of the same
+    # user may now and then slip through; good enough for throttling.
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def take(self, key, cost, capacity, refill):
+        now = time.time()
+        key = f'ratelimit:{key}'
+        tokens, updated = self.cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + max(0, now - updated) * refill)
+        wait = 0
+        if tokens < cost:
+            wait = (cost - tokens) / refill
+        else:
+            tokens = min(capacity, tokens - cost)
+
+        # expires once it would be full again anyway
+        timeout = math.ceil((capacity - tokens) / refill) + 1
+        self.cache.set(key, (tokens, now), timeout)
+        return wait
+
+
+_buckets = None
+
+
+def get_buckets():
+    global _buckets
+    if _buckets is None:
+        if settings.RATELIMIT_BACKEND == 'cache':
+            _buckets = CacheBuckets(settings.RATELIMIT_CACHE)
+        else:
+            _buckets = LocalBuckets(settings.RATELIMIT_LOCAL_MAX_KEYS)
+    return _buckets
+
+
+def _selections(selection_set, fragments):
+    # fields of a selection set, with fragments inlined
+    for selection in selection_set.selections:
+        if isinstance(selection, ast.Field):
+            yield selection
+        elif isinstance(selection, ast.InlineFragment):
+            yield from _selections(selection.selection_set, fragments)
+        elif isinstance(selection, ast.FragmentSpread):
+            fragment = fragments.get(selection.name.value)
+            if fragment is not None:
+                yield from _selections(fragment.selection_set, fragments)
+
+
+def _nested(field, fragments):
+    # object and list fields below this one, each of them typically a
+    # query or a prefetch of its own
+    if field.selection_set is None:
+        return 0
+    count = 0
+    for child in _selections(field.selection_set, fragments):
+        if child.selection_set is not None:
+            count += 1 + _nested(child, fragments)
+    return count
+
+
+def estimate_cost(info):
+    # weight of the root field, times one for the field itself and one
+    # per nested object it selects. A search on top costs extra.
+    name = info.field_name
+    field = info.field_asts[0]
+    cost = settings.RATELIMIT_COSTS.get(name, 1)
+    cost *= 1 + _nested(field, info.fragments)
+    if any(argument.name.value == 'search' for argument in field.arguments):
+        cost += settings.RATELIMIT_SEARCH_COST
+    return cost
+
+
+def _client(request):
+    # user ids are only unique within a school
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'{tenancy.current() or ""}:user:{user.pk}'
+    # the Heroku router appends the address it saw to X-Forwarded-For;
+    # anything before it is whatever the client sent, so only the last
+    # entry can be trusted
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        return 'ip:' + forwarded.split(',')[-1].strip()
+    return 'ip:' + request.META.get('REMOTE_ADDR', '')
+
+
+def _count(scope, field):
+    with _throttled_lock:
+        throttled[(scope, field)] += 1
+    metrics.count_throttled(scope, field)
+
+
+def check(request, field, cost):
+    # takes `cost` tokens from the client's bucket for this field and
+    # from its overall bucket, or raises RateLimited without taking any
+    buckets = get_buckets()
+    client = _client(request)
+
+    capacity, refill = parse_rate(settings.RATELIMIT_OPERATION_RATES.get(
+        field, settings.RATELIMIT_OPERATION_RATE))
+    cost = min(cost, capacity)
+    wait = buckets.take(f'{client}:{field}', cost, capacity, refill)
+    scope = 'operation'
+
+    if not wait:
+        user_capacity, user_refill = parse_rate(settings.RATELIMIT_USER_RATE)
+        wait = buckets.take(client, min(cost, user_capacity), user_capacity,
+                            user_refill)
+        scope = 'user'
+        if wait:
+            # give back what the field bucket was charged
+            buckets.take(f'{client}:{field}', -cost, capacity, refill)
+
+    if wait:
+        _count(scope, field)
+        logger.info('Throttled %s on %s (%s)', client, field, scope)
+        retry_after = math.ceil(wait)
+        request.graphql_retry_after = max(
+            retry_after, getattr(request, 'graphql_retry_after', 0))
+        raise RateLimited(field, retry_after)
+
+
+class RateLimitMiddleware:
+    # charges every root field of a request by its estimated cost
+    def resolve(self, next, root, info, **args):
+        if (settings.RATELIMIT_ENABLED and len(info.path) == 1
+                and not info.field_name.startswith('__')):
+            check(info.context, info.field_name, estimate_cost(info))
+        return next(root, info, **args)
@@ -1,14 +1,20 @@
 import graphene
 import graphql_jwt
 
+import attendance.schema
+import exams.schema
 import people.schema
+import timetable.schema
 
 
-class Query(people.schema.Query, graphene.ObjectType):
+class Query(people.schema.Query, attendance.schema.Query,
+            exams.schema.Query, timetable.schema.Query, graphene.ObjectType):
     pass
 
 
-class Mutation(people.schema.Mutation, graphene.ObjectType):
+class Mutation(people.schema.Mutation, attendance.schema.Mutation,
+               exams.schema.Mutation, timetable.schema.Mutation,
+               graphene.ObjectType):
     token_auth = graphql_jwt.ObtainJSONWebToken.Field()
     verify_token = graphql_jwt.Verify.Field()
     refresh_token = graphql_jwt.Refresh.Field()
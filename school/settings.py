@@ -11,8 +11,11 @@ https://docs.djangoproject.com/en/2.1/ref/settings/
 """
 
 import os
+import re
+import tempfile
 
 import django_heroku
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -39,11 +42,22 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'graphene_django',
     'corsheaders',
-    'django_extensions',
-    'people',
+    'people.apps.PeopleConfig',
+    'attendance.apps.AttendanceConfig',
+    'exams.apps.ExamsConfig',
+    'timetable.apps.TimetableConfig',
 ]
 
+# shell_plus and friends are for development, and not worth the import
+# time in every production worker
+if DEBUG == 'True':
+    INSTALLED_APPS.append('django_extensions')
+
 MIDDLEWARE = [
+    # first, so that it compresses what every other middleware returns
+    'school.middleware.CompressionMiddleware',
+    # picks the school every later middleware and view works with
+    'school.tenancy.TenantMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -131,17 +145,209 @@ STATIC_URL = '/static/'
 GRAPHENE = {
     'SCHEMA': 'school.schema.schema',
     'MIDDLEWARE': [
+        'people.slow_queries.ResolverPathMiddleware',
+        'school.metrics.MetricsMiddleware',
+        # runs inside the JWT middleware, which sets the user
+        'school.ratelimit.RateLimitMiddleware',
         'graphql_jwt.middleware.JSONWebTokenMiddleware',
     ],
 }
 
+# deletes of teachers/class rooms that would cascade to more rows than this
+# run in the background, CASCADE_DELETE_BATCH_SIZE students at a time
+CASCADE_DELETE_THRESHOLD = int(os.getenv('CASCADE_DELETE_THRESHOLD', 200))
+CASCADE_DELETE_BATCH_SIZE = int(os.getenv('CASCADE_DELETE_BATCH_SIZE', 100))
+
+# background jobs, see `manage.py run_workers`
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 2))
+# a running job that hasn't reported progress for this many seconds is
+# assumed to have lost its worker and is picked up again
+JOB_STALE_AFTER = int(os.getenv('JOB_STALE_AFTER', 3600))
+
+# delta sync (changesSince), see people.sync
+SYNC_PAGE_SIZE = int(os.getenv('SYNC_PAGE_SIZE', 500))
+SYNC_MAX_PAGE_SIZE = int(os.getenv('SYNC_MAX_PAGE_SIZE', 2000))
+SYNC_SETTLE_SECONDS = int(os.getenv('SYNC_SETTLE_SECONDS', 5))
+# tombstones older than this are pruned, and clients with an older cursor
+# have to sync from scratch
+SYNC_TOMBSTONE_RETENTION_DAYS = int(
+    os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', 90))
+
+# mutations are audited write-behind: entries are buffered per worker and
+# inserted in one batch once AUDIT_FLUSH_SIZE are waiting or
+# AUDIT_FLUSH_INTERVAL seconds after the first, see people.audit
+AUDIT_FLUSH_SIZE = int(os.getenv('AUDIT_FLUSH_SIZE', 100))
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', 2))
+AUDIT_PAGE_SIZE = int(os.getenv('AUDIT_PAGE_SIZE', 50))
+AUDIT_MAX_PAGE_SIZE = int(os.getenv('AUDIT_MAX_PAGE_SIZE', 500))
+
+# studentsCount(approximate: true) and friends answer from PostgreSQL's
+# planner statistics, unless those estimate fewer rows than this
+COUNT_ESTIMATE_THRESHOLD = int(os.getenv('COUNT_ESTIMATE_THRESHOLD', 10000))
+
+# students, teachers and guardians lists that only select columns are
+# resolved from values() rows streamed in chunks of this size, instead of
+# model instances, see people.projections
+GRAPHQL_PROJECTIONS = os.getenv('GRAPHQL_PROJECTIONS', 'True') == 'True'
+GRAPHQL_PROJECTION_CHUNK_SIZE = int(
+    os.getenv('GRAPHQL_PROJECTION_CHUNK_SIZE', 2000))
+
+# phones are compared without the country code, see people.normalize
+PHONE_COUNTRY_CODE = os.getenv('PHONE_COUNTRY_CODE', '254')
+
+# guardians are compared with the ones sharing a phone, a name sound or an
+# email, in blocks of at most DEDUP_MAX_BLOCK; pairs scoring at least
+# DEDUP_THRESHOLD (0 to 1) are offered for merging, see people.dedup
+DEDUP_ON_SAVE = os.getenv('DEDUP_ON_SAVE', 'True') == 'True'
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', 0.7))
+DEDUP_MAX_BLOCK = int(os.getenv('DEDUP_MAX_BLOCK', 50))
+
+# parsed and validated queries kept per worker, see school.warmup
+GRAPHQL_DOCUMENT_CACHE_SIZE = int(
+    os.getenv('GRAPHQL_DOCUMENT_CACHE_SIZE', 500))
+# a directory of .graphql files (one query each) to prime at startup
+GRAPHQL_WARMUP_DIR = os.getenv('GRAPHQL_WARMUP_DIR')
+
+# responses to queries about the schema alone (introspection) kept per
+# worker, see school.introspection
+GRAPHQL_INTROSPECTION_CACHE_SIZE = int(
+    os.getenv('GRAPHQL_INTROSPECTION_CACHE_SIZE', 20))
+# SDL written by `manage.py graphql_sdl` at build time, served at
+# /schema.graphql instead of printing the schema
+GRAPHQL_SCHEMA_FILE = os.getenv('GRAPHQL_SCHEMA_FILE')
+
+# encodes GraphQL responses, see school.encoders. `fast` uses orjson when
+# it's installed and falls back to the json module otherwise.
+GRAPHQL_JSON_ENCODER = os.getenv('GRAPHQL_JSON_ENCODER',
+                                 'school.encoders.fast')
+
+# Cache-Control for GET queries, by operation name. Responses also carry
+# an ETag, so `no-cache` still saves the body through a 304.
+GRAPHQL_CACHE_CONTROL = {
+    'default': 'private, no-cache',
+}
+
+# responses smaller than this (bytes) go out uncompressed. Brotli is used
+# instead of gzip when the brotli package is installed.
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 5))
+
+# staff get a cProfile of a request by sending `X-Profile: 1`, and this
+# fraction (0-1) of all requests is profiled too. Profiles are kept in
+# GRAPHQL_PROFILE_DIR and listed at /profiles/, see school.profiling.
+GRAPHQL_PROFILE_SAMPLE_RATE = float(
+    os.getenv('GRAPHQL_PROFILE_SAMPLE_RATE', 0))
+GRAPHQL_PROFILE_DIR = os.getenv(
+    'GRAPHQL_PROFILE_DIR',
+    os.path.join(tempfile.gettempdir(), 'school-profiles'))
+GRAPHQL_PROFILE_KEEP = int(os.getenv('GRAPHQL_PROFILE_KEEP', 100))
+GRAPHQL_PROFILE_TOP = 50
+
+# SQL statements slower than SLOW_QUERY_MS are recorded with the GraphQL
+# operation and resolver that ran them, SLOW_QUERY_EXPLAIN_RATE of the
+# slow SELECTs with their EXPLAIN (ANALYZE, BUFFERS) on PostgreSQL. See
+# people.slow_queries and `manage.py slow_queries`.
+SLOW_QUERY_ENABLED = os.getenv('SLOW_QUERY_ENABLED', 'True') == 'True'
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_RATE', 0.1))
+SLOW_QUERY_KEEP = int(os.getenv('SLOW_QUERY_KEEP', 1000))
+SLOW_QUERY_MAX_LENGTH = 10000
+
+# Prometheus metrics at /metrics, when prometheus_client is installed. Set
+# METRICS_TOKEN to require `Authorization: Bearer <token>` from scrapers.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+# distinct operation names with series of their own, the rest are `other`
+METRICS_MAX_OPERATIONS = int(os.getenv('METRICS_MAX_OPERATIONS', 100))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND',
+                             'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+        # keys are per school
+        'KEY_FUNCTION': 'school.tenancy.make_key',
+    }
+}
+
+# single rows read by id (student(id:), a student's classRoom, ...) are
+# cached in ENTITY_CACHE and invalidated through per-row versions, see
+# people.entities. Every worker must see the others' invalidations, so it
+# is only on by default with a shared cache backend, not locmem.
+ENTITY_CACHE = 'default'
+ENTITY_CACHE_ENABLED = os.getenv(
+    'ENTITY_CACHE_ENABLED',
+    str('locmem' not in CACHES[ENTITY_CACHE]['BACKEND'])) == 'True'
+ENTITY_CACHE_TIMEOUT = int(os.getenv('ENTITY_CACHE_TIMEOUT', 3600))
+
+# token buckets per client (user, or address when anonymous): one for all
+# root fields together and one per root field, as "tokens/seconds to
+# refill". A root field costs its RATELIMIT_COSTS weight (default 1) times
+# one plus the nested objects it selects, plus RATELIMIT_SEARCH_COST when
+# it searches. `local` buckets live in each worker, `cache` ones are shared
+# through RATELIMIT_CACHE (use a cache all workers see, not locmem).
+RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True') == 'True'
+RATELIMIT_BACKEND = os.getenv('RATELIMIT_BACKEND', 'local')
+RATELIMIT_CACHE = 'default'
+RATELIMIT_LOCAL_MAX_KEYS = 10000
+RATELIMIT_USER_RATE = os.getenv('RATELIMIT_USER_RATE', '600/60')
+RATELIMIT_OPERATION_RATE = os.getenv('RATELIMIT_OPERATION_RATE', '300/60')
+RATELIMIT_OPERATION_RATES = {
+    'students': '120/60',
+    'changesSince': '120/60',
+}
+RATELIMIT_COSTS = {
+    'students': 3,
+    'teachers': 2,
+    'guardians': 2,
+    'changesSince': 5,
+    'classRoster': 3,
+    'reportCards': 2,
+}
+RATELIMIT_SEARCH_COST = 10
+
+GRAPHQL_JWT = {
+    # tokens carry the school they were issued for
+    'JWT_PAYLOAD_HANDLER': 'school.tenancy.jwt_payload',
+}
+
 AUTHENTICATION_BACKENDS = [
     'graphql_jwt.backends.JSONWebTokenBackend',
     'django.contrib.auth.backends.ModelBackend',
 ]
 
+# bulkCreateUsers and `manage.py provision_users` hash passwords in a pool
+# of PASSWORD_HASH_WORKERS processes (0 is one per CPU), batches smaller
+# than PASSWORD_HASH_POOL_MIN are hashed inline. bulkCreateUsers takes at
+# most BULK_CREATE_USERS_MAX users a request.
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 0))
+PASSWORD_HASH_POOL_MIN = 8
+BULK_CREATE_USERS_MAX = int(os.getenv('BULK_CREATE_USERS_MAX', 500))
+
 # update this once you go live
 CORS_ORIGIN_ALLOW_ALL = True
 
 # Activate Django-Heroku.
 django_heroku.settings(locals())
+
+# One school per PostgreSQL schema, see school.tenancy. TENANTS is
+# "slug:host host,slug:host", e.g. "alliance:alliance.example.com". Every
+# school gets a database alias tenant_<slug> whose connections only see
+# the schema school_<slug>; `manage.py migrate_tenants` creates and
+# migrates them. Requests are routed by the JWT or the host; TENANT is the
+# fallback, e.g. for management commands.
+TENANTS = {}
+for tenant in filter(None, os.getenv('TENANTS', '').split(',')):
+    slug, _, hosts = tenant.partition(':')
+    if not re.match(r'^[a-z0-9_]+$', slug):
+        raise ImproperlyConfigured(f'Invalid school in TENANTS: {slug!r}')
+    TENANTS[slug] = hosts.lower().split()
+    # as school.tenancy.tenant_database, which can't be imported here
+    DATABASES[f'tenant_{slug}'] = dict(
+        DATABASES['default'],
+        OPTIONS=dict(DATABASES['default'].get('OPTIONS', {}),
+                     options=f'-c search_path=school_{slug}'))
+
+TENANT = os.getenv('TENANT')
+DATABASE_ROUTERS = ['school.tenancy.TenantRouter']
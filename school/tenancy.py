@@ -0,0 +1,155 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import JsonResponse
+from graphql_jwt import utils as jwt_utils
+from graphql_jwt.exceptions import JSONWebTokenError
+
+# Every school (tenant) lives in a PostgreSQL schema of its own,
+# school_<slug>, reached through the database alias tenant_<slug>, whose
+# connections have their search_path set to that schema only (see the end
+# of school/settings.py). The middleware works out the tenant of each
+# request and TenantRouter sends every query to its alias, so the code in
+# people/ is the same for one school or fifty. Without TENANTS everything
+# stays on `default`.
+
+_local = threading.local()
+
+
+class UnknownTenant(Exception):
+    pass
+
+
+def alias_for(slug):
+    return f'tenant_{slug}'
+
+
+def schema_for(slug):
+    return f'school_{slug}'
+
+
+def tenant_database(default, slug):
+    # the settings of the default database, seeing only the tenant's schema
+    options = dict(default.get('OPTIONS', {}))
+    options['options'] = f'-c search_path={schema_for(slug)}'
+    return dict(default, OPTIONS=options)
+
+
+def tenants():
+    return list(settings.TENANTS)
+
+
+def add_tenant(slug, hosts=()):
+    # at runtime, e.g. for benchmarks; normally tenants come from settings
+    settings.TENANTS[slug] = list(hosts)
+    connections.databases[alias_for(slug)] = tenant_database(
+        connections.databases[DEFAULT_DB_ALIAS], slug)
+    connections.ensure_defaults(alias_for(slug))
+
+
+def remove_tenant(slug):
+    settings.TENANTS.pop(slug, None)
+    connections[alias_for(slug)].close()
+    del connections.databases[alias_for(slug)]
+
+
+def current():
+    # TENANT is the fallback for management commands and workers, e.g.
+    # `TENANT=alliance python manage.py slow_queries`
+    return getattr(_local, 'slug', None) or settings.TENANT
+
+
+def db_alias():
+    slug = current()
+    return alias_for(slug) if slug else DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def use(slug):
+    previous = getattr(_local, 'slug', None)
+    _local.slug = slug
+    try:
+        yield
+    finally:
+        _local.slug = previous
+
+
+class TenantRouter:
+    def db_for_read(self, model, **hints):
+        slug = current()
+        return alias_for(slug) if slug else None
+
+    db_for_write = db_for_read
+
+
+def _host_tenant(request):
+    host = request.get_host().split(':')[0].lower()
+    for slug, hosts in settings.TENANTS.items():
+        if host in hosts:
+            return slug
+    return None
+
+
+def _token_tenant(request):
+    token = jwt_utils.get_credentials(request)
+    if token is None:
+        return None
+    try:
+        payload = jwt_utils.get_payload(token)
+    except JSONWebTokenError:
+        # authentication reports it
+        return None
+    # tokens issued before schools were split name none and never expire;
+    # taken on any host they would log in the same username everywhere
+    if not payload.get('tenant'):
+        raise UnknownTenant('This token names no school, sign in again')
+    return payload['tenant']
+
+
+def resolve(request):
+    # the tenant in the token wins, but a token of one school is never
+    # accepted on the host of another
+    host_slug = _host_tenant(request)
+    token_slug = _token_tenant(request)
+    if token_slug and host_slug and token_slug != host_slug:
+        raise UnknownTenant('This token belongs to another school')
+
+    slug = token_slug or host_slug or settings.TENANT
+    if slug not in settings.TENANTS:
+        raise UnknownTenant('Unknown school')
+    return slug
+
+
+class TenantMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.TENANTS:
+            return self.get_response(request)
+
+        try:
+            slug = resolve(request)
+        except UnknownTenant as err:
+            return JsonResponse({'errors': [{'message': str(err)}]},
+                                status=404)
+
+        request.tenant = slug
+        with use(slug):
+            return self.get_response(request)
+
+
+def jwt_payload(user, context=None):
+    # tokens name their school, see resolve()
+    payload = jwt_utils.jwt_payload(user, context)
+    slug = current()
+    if slug:
+        payload['tenant'] = slug
+    return payload
+
+
+def make_key(key, key_prefix, version):
+    # cache keys of one school never collide with another's
+    return f'{key_prefix}:{version}:{current() or ""}:{key}'
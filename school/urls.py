@@ -1,7 +1,11 @@
 from django.contrib import admin
 from django.urls import path
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView
+
+from people import views as people_views
+
+from . import introspection, metrics, profiling
+from .views import SchoolGraphQLView
 
 
 admin.site.site_header = 'SCHOOL MANAGEMENT'
@@ -9,5 +13,11 @@ admin.site.site_title = 'SCHOOL MANAGEMENT'
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('graphql/', csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path('graphql/', csrf_exempt(SchoolGraphQLView.as_view(graphiql=True))),
+    path('profiles/', profiling.list_profiles),
+    path('profiles/<slug:profile_id>/', profiling.download_profile),
+    path('metrics', metrics.metrics_view),
+    path('schema.graphql', introspection.sdl_view),
+    path('class-rooms/<int:class_room_id>/roster.json',
+         people_views.class_roster),
 ]
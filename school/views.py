@@ -0,0 +1,121 @@
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from graphene_django.views import GraphQLView
+
+from . import introspection, metrics, profiling
+from .encoders import get_encoder
+from .ratelimit import RateLimited
+
+
+class SchoolGraphQLView(GraphQLView):
+    def execute_graphql_request(self, request, data, query, variables,
+                                operation_name, show_graphiql=False):
+        def execute():
+            return super(SchoolGraphQLView, self).execute_graphql_request(
+                request, data, query, variables, operation_name,
+                show_graphiql)
+
+        with metrics.track_operation(operation_name):
+            if (query and not show_graphiql
+                    and profiling.should_profile(request)):
+                result = profiling.run(request, execute, query,
+                                       operation_name)
+            else:
+                result = execute()
+
+        # only a clean result of a GET query is worth caching; graphene
+        # already refuses mutations over GET
+        request.graphql_cacheable = bool(
+            request.method == 'GET' and result and not result.errors)
+        request.graphql_operation = operation_name
+        # the response to a schema-only query is kept, see get_response
+        request.graphql_schema_only = bool(
+            query and '__' in query and result and not result.errors
+            and introspection.is_schema_only(self.backend.document_from_string(
+                self.schema, query).document_ast))
+
+        return result
+
+    def get_response(self, request, data, show_graphiql=False):
+        if show_graphiql:
+            return super().get_response(request, data, show_graphiql)
+
+        query, variables, operation_name, _ = self.get_graphql_params(
+            request, data)
+        pretty = bool(self.pretty or request.GET.get('pretty'))
+        cached = introspection.get(query, variables, operation_name, pretty)
+        if cached is None:
+            body, status_code = super().get_response(request, data)
+            if not getattr(request, 'graphql_schema_only', False):
+                return body, status_code
+            # only schema-only queries count, as misses or as hits below
+            metrics.count_cache('introspection', False)
+            cached = introspection.store(
+                query, variables, operation_name, pretty, body)
+        else:
+            metrics.count_cache('introspection', True)
+
+        request.graphql_cacheable = request.method == 'GET'
+        request.graphql_operation = operation_name
+        request.graphql_etag = cached.etag
+        return cached.body, 200
+
+    def get_middleware(self, request):
+        # the resolver timer only slows down the requests being profiled
+        timer = getattr(request, 'graphql_profile', None)
+        if timer is not None:
+            return [timer] + self.middleware
+        return self.middleware
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        profile_id = getattr(request, 'graphql_profile_id', None)
+        if profile_id:
+            response['X-Profile-Id'] = profile_id
+
+        # some root field was throttled, see school.ratelimit
+        retry_after = getattr(request, 'graphql_retry_after', None)
+        if retry_after:
+            response['Retry-After'] = str(retry_after)
+            return response
+
+        if (getattr(request, 'graphql_cacheable', False)
+                and response.status_code == 200
+                and response['Content-Type'] == 'application/json'):
+            return self.cacheable_response(request, response)
+        return response
+
+    def cacheable_response(self, request, response):
+        cache_control = settings.GRAPHQL_CACHE_CONTROL
+        response['Cache-Control'] = cache_control.get(
+            request.graphql_operation, cache_control['default'])
+        # results depend on who is asking
+        patch_vary_headers(response, ('Authorization', 'Cookie'))
+
+        etag = getattr(request, 'graphql_etag', None) or quote_etag(
+            hashlib.sha1(response.content).hexdigest())
+        response['ETag'] = etag
+
+        # a 304 with the same headers when the client already has it
+        response = get_conditional_response(
+            request, etag=etag, response=response)
+        metrics.count_cache('etag', response.status_code == 304)
+        return response
+
+    @staticmethod
+    def format_error(error):
+        formatted = GraphQLView.format_error(error)
+        original = getattr(error, 'original_error', error)
+        if isinstance(original, RateLimited):
+            formatted['extensions'] = {'code': 'RATE_LIMITED',
+                                       'retryAfter': original.retry_after}
+        return formatted
+
+    def json_encode(self, request, d, pretty=False):
+        # graphiql and ?pretty keep the indented, sorted output
+        if self.pretty or pretty or request.GET.get('pretty'):
+            return super().json_encode(request, d, pretty=True)
+        return get_encoder()(d)
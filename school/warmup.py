@@ -0,0 +1,101 @@
+import glob
+import os
+import threading
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from graphql import execute, parse, validate
+from graphql.backend import (GraphQLBackend, GraphQLDocument,
+                             get_default_backend, set_default_backend)
+from graphql.execution import ExecutionResult
+from graphql.utils.introspection_query import introspection_query
+
+from . import introspection, metrics
+from .encoders import get_encoder
+
+
+def _execute_validated(schema, document_ast, errors, *args, **kwargs):
+    if errors:
+        return ExecutionResult(errors=errors, invalid=True)
+    return execute(schema, document_ast, *args, **kwargs)
+
+
+class DocumentCache(GraphQLBackend):
+    # parses and validates every distinct query string once per process,
+    # the default backend does both again on every request
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.documents = OrderedDict()
+        self.lock = threading.Lock()
+
+    def document_from_string(self, schema, document_string):
+        key = (id(schema), document_string)
+        with self.lock:
+            document = self.documents.get(key)
+            if document is not None:
+                self.documents.move_to_end(key)
+        metrics.count_cache('document', document is not None)
+        if document is not None:
+            return document
+
+        # syntax errors raise here and are never cached
+        document_ast = parse(document_string)
+        document = GraphQLDocument(
+            schema=schema,
+            document_string=document_string,
+            document_ast=document_ast,
+            execute=partial(_execute_validated, schema, document_ast,
+                            validate(schema, document_ast)))
+
+        with self.lock:
+            self.documents[key] = document
+            while len(self.documents) > self.max_size:
+                self.documents.popitem(last=False)
+
+        return document
+
+
+def install_backend():
+    if not isinstance(get_default_backend(), DocumentCache):
+        set_default_backend(
+            DocumentCache(settings.GRAPHQL_DOCUMENT_CACHE_SIZE))
+    return get_default_backend()
+
+
+def warmup_queries():
+    yield introspection_query
+
+    # one query per file, e.g. the ones the front end sends most
+    if settings.GRAPHQL_WARMUP_DIR:
+        pattern = os.path.join(settings.GRAPHQL_WARMUP_DIR, '*.graphql')
+        for path in sorted(glob.glob(pattern)):
+            with open(path) as f:
+                yield f.read()
+
+
+def warm_up():
+    # everything the first request would otherwise pay for. With
+    # `preload_app` this runs once in the gunicorn master and the workers
+    # inherit the result when they fork.
+    from django.urls import get_resolver
+    from graphene_django.settings import graphene_settings
+
+    get_resolver().url_patterns
+    schema = graphene_settings.SCHEMA
+    graphene_settings.MIDDLEWARE
+
+    backend = install_backend()
+    for query in warmup_queries():
+        backend.document_from_string(schema, query)
+
+    # resolving the introspection query touches every lazily built part of
+    # the type map, and needs neither a user nor the database. The answer
+    # is kept for the view too, with the SDL for /schema.graphql.
+    document = backend.document_from_string(schema, introspection_query)
+    result = document.execute()
+    body = get_encoder()({'data': result.data})
+    for operation_name in (None, 'IntrospectionQuery'):
+        introspection.store(introspection_query, None, operation_name, False,
+                            body)
+    introspection.sdl()
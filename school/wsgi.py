@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'school.settings')
 
 application = get_wsgi_application()
+
+# build the schema and prime the query caches before the first request
+# (or, with gunicorn's preload_app, before forking the workers)
+from school.warmup import warm_up  # noqa E402
+
+warm_up()
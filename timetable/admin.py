@@ -0,0 +1,27 @@
+from django.contrib import admin
+
+from .models import Lesson, LessonRequirement, Timetable
+
+
+class LessonRequirementModel(admin.ModelAdmin):
+    list_display = ('class_room', 'subject', 'teacher', 'lessons_per_week')
+    list_filter = ('class_room', 'subject')
+
+
+class TimetableModel(admin.ModelAdmin):
+    # filled by `generate_timetable` jobs, see timetable.scheduling
+    list_display = ('name', 'status', 'lessons_placed', 'lessons_unplaced',
+                    'created_at', 'solved_at')
+    readonly_fields = ('status', 'error', 'lessons_placed',
+                       'lessons_unplaced', 'solved_at')
+
+
+class LessonModel(admin.ModelAdmin):
+    list_display = ('timetable', 'class_room', 'day', 'period', 'subject',
+                    'teacher')
+    list_filter = ('timetable', 'class_room', 'teacher')
+
+
+admin.site.register(LessonRequirement, LessonRequirementModel)
+admin.site.register(Timetable, TimetableModel)
+admin.site.register(Lesson, LessonModel)
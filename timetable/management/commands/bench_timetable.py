@@ -0,0 +1,72 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from timetable import solver
+
+DAYS = 5
+PERIODS = 8
+# lessons per week of each subject, a full week in all
+WEEK = [6, 6, 5, 5, 4, 3, 3, 2, 2, 2, 1, 1]
+
+
+def school(class_rooms, load, seed):
+    # made up lessons of a school, as (class room, teacher, subject).
+    # Teachers are kept `load` busy, a new one is hired when every teacher
+    # of a subject is. Now and then a class gets a teacher of the next
+    # subject, so some teachers teach two subjects.
+    rng = random.Random(seed)
+    capacity = int(DAYS * PERIODS * load)
+    teachers = {subject: [] for subject in range(len(WEEK))}
+    busy = []
+
+    def hire(subject):
+        busy.append(0)
+        teachers[subject].append(len(busy) - 1)
+        return len(busy) - 1
+
+    lessons = []
+    for class_room in range(class_rooms):
+        for subject, count in enumerate(WEEK):
+            pool = teachers[subject]
+            if rng.random() < 0.1:
+                pool = teachers[(subject + 1) % len(WEEK)]
+            free = [t for t in pool if busy[t] + count <= capacity]
+            teacher = free[0] if free else hire(subject)
+            busy[teacher] += count
+            lessons += [(class_room, teacher, subject)] * count
+    return lessons
+
+
+class Command(BaseCommand):
+    help = ('Times the timetable solver (timetable.solver) on made up '
+            'schools of increasing size, every class room with a full week '
+            'of lessons. Nothing is read from or written to the database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,20,40,60,120',
+                            help='Class rooms per school, comma separated.')
+        parser.add_argument('--load', type=float, default=0.9,
+                            help='How busy the teachers are, 1 is every '
+                                 'slot of the week.')
+        parser.add_argument('--seeds', type=int, default=3,
+                            help='Schools per size.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{DAYS} days of {PERIODS} periods, teachers '
+                          f'{options["load"]:.0%} busy')
+        for size in map(int, options['sizes'].split(',')):
+            timings, unplaced = [], []
+            for seed in range(options['seeds']):
+                lessons = school(size, options['load'], seed)
+                start = time.perf_counter()
+                slots = solver.solve(DAYS, PERIODS, lessons, seed=seed)
+                timings.append((time.perf_counter() - start) * 1000)
+                unplaced.append(slots.count(None))
+
+            self.stdout.write(
+                f'{size:>4} class rooms {len(lessons):>6} lessons   median '
+                f'{statistics.median(timings):9.1f} ms   slowest '
+                f'{max(timings):9.1f} ms   unplaced {max(unplaced)}')
@@ -0,0 +1,70 @@
+# Generated by Django 2.1.7 on 2026-10-19 18:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('people', '0009_classroom_level'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Lesson',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.PositiveSmallIntegerField()),
+                ('period', models.PositiveSmallIntegerField()),
+                ('class_room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='people.ClassRoom')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='people.Subject')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='people.Teacher')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LessonRequirement',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lessons_per_week', models.PositiveSmallIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='people.ClassRoom')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='people.Subject')),
+                ('teacher', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='people.Teacher')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Timetable',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('days', models.PositiveSmallIntegerField(default=5)),
+                ('periods_per_day', models.PositiveSmallIntegerField(default=8)),
+                ('status', models.CharField(choices=[('QUEUED', 'QUEUED'), ('SOLVED', 'SOLVED'), ('PARTIAL', 'PARTIAL'), ('FAILED', 'FAILED')], default='QUEUED', max_length=255)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('lessons_placed', models.PositiveIntegerField(default=0)),
+                ('lessons_unplaced', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('solved_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='timetable',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='timetable.Timetable'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='lessonrequirement',
+            unique_together={('class_room', 'subject')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='lesson',
+            unique_together={('timetable', 'teacher', 'day', 'period'), ('timetable', 'class_room', 'day', 'period')},
+        ),
+    ]
@@ -0,0 +1,73 @@
+from django.db import models
+
+from people.models import ClassRoom, Subject, Teacher
+
+
+class LessonRequirement(models.Model):
+    # how many lessons of a subject a class room has every week
+    class_room = models.ForeignKey(ClassRoom, on_delete=models.CASCADE)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+    # empty lets the timetable pick one of the teachers of the subject
+    teacher = models.ForeignKey(Teacher, on_delete=models.SET_NULL,
+                                null=True, blank=True)
+    lessons_per_week = models.PositiveSmallIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('class_room', 'subject')
+
+    def __str__(self):
+        return f'{self.class_room_id} {self.subject_id}'
+
+
+class Timetable(models.Model):
+    # one generated week of lessons, see timetable.scheduling
+    QUEUED = 'QUEUED'
+    SOLVED = 'SOLVED'
+    # some lessons could not be placed
+    PARTIAL = 'PARTIAL'
+    FAILED = 'FAILED'
+    STATUSES = (
+        (QUEUED, QUEUED),
+        (SOLVED, SOLVED),
+        (PARTIAL, PARTIAL),
+        (FAILED, FAILED),
+    )
+
+    name = models.CharField(max_length=255)
+    days = models.PositiveSmallIntegerField(default=5)
+    periods_per_day = models.PositiveSmallIntegerField(default=8)
+    status = models.CharField(max_length=255, choices=STATUSES,
+                              default=QUEUED)
+    error = models.TextField(null=True, blank=True)
+    lessons_placed = models.PositiveIntegerField(default=0)
+    lessons_unplaced = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    solved_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.name}'
+
+
+class Lesson(models.Model):
+    # a class room's lesson of a subject with a teacher, in one slot
+    timetable = models.ForeignKey(Timetable, on_delete=models.CASCADE)
+    class_room = models.ForeignKey(ClassRoom, on_delete=models.CASCADE)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
+    # 0 based, Monday is 0
+    day = models.PositiveSmallIntegerField()
+    period = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = (
+            ('timetable', 'class_room', 'day', 'period'),
+            ('timetable', 'teacher', 'day', 'period'),
+        )
+
+    def __str__(self):
+        return f'{self.class_room_id} {self.day} {self.period}'
@@ -0,0 +1,111 @@
+from django.db import transaction
+from django.utils import timezone
+
+from people import jobs
+from people.models import Teacher
+from school import tenancy
+
+from . import solver
+from .models import Lesson, LessonRequirement, Timetable
+
+
+def assign_teachers(requirements, slots):
+    # {requirement id: teacher id}. Requirements without a teacher get the
+    # class teacher if they teach the subject, otherwise the least busy
+    # active teacher of the subject who still has room for the lessons.
+    load = {}
+    for requirement in requirements:
+        if requirement.teacher_id:
+            load[requirement.teacher_id] = (
+                load.get(requirement.teacher_id, 0)
+                + requirement.lessons_per_week)
+
+    qualified = {}
+    for subject, teacher in (
+            Teacher.subjects.through.objects
+            .filter(teacher__active=True,
+                    subject_id__in={r.subject_id for r in requirements})
+            .values_list('subject_id', 'teacher_id')
+            .order_by('teacher_id')):
+        qualified.setdefault(subject, []).append(teacher)
+
+    teachers = {r.pk: r.teacher_id for r in requirements if r.teacher_id}
+    # the biggest requirements first, while most teachers have room
+    for requirement in sorted(requirements,
+                              key=lambda r: -r.lessons_per_week):
+        if requirement.teacher_id:
+            continue
+        lessons = requirement.lessons_per_week
+        free = [teacher for teacher in qualified.get(requirement.subject_id,
+                                                     [])
+                if load.get(teacher, 0) + lessons <= slots]
+        if not free:
+            raise ValueError(
+                f'No teacher of subject {requirement.subject_id} has room '
+                f'for class room {requirement.class_room_id}')
+
+        class_teacher = requirement.class_room.class_teacher_id
+        if class_teacher in free:
+            teacher = class_teacher
+        else:
+            teacher = min(free, key=lambda t: load.get(t, 0))
+        teachers[requirement.pk] = teacher
+        load[teacher] = load.get(teacher, 0) + lessons
+
+    return teachers
+
+
+def generate(timetable_id, job=None):
+    # fills a timetable from the lesson requirements, returns the numbers
+    # of lessons placed and not placed
+    timetable = Timetable.objects.get(pk=timetable_id)
+    slots = timetable.days * timetable.periods_per_day
+    try:
+        requirements = list(
+            LessonRequirement.objects.select_related('class_room')
+            .filter(lessons_per_week__gt=0)
+            .order_by('id'))
+        teachers = assign_teachers(requirements, slots)
+        lessons = [(r.class_room_id, teachers[r.pk], r.subject_id)
+                   for r in requirements
+                   for _ in range(r.lessons_per_week)]
+
+        def report(placed, total):
+            jobs.set_progress(job, placed)
+
+        if job:
+            jobs.set_progress(job, 0, total=len(lessons))
+        placed = solver.solve(timetable.days, timetable.periods_per_day,
+                              lessons, seed=timetable.pk,
+                              progress=report if job else None)
+    except Exception as err:
+        Timetable.objects.filter(pk=timetable.pk).update(
+            status=Timetable.FAILED, error=str(err),
+            updated_at=timezone.now())
+        raise
+
+    unplaced = placed.count(None)
+    with transaction.atomic(using=tenancy.db_alias()):
+        Lesson.objects.filter(timetable=timetable).delete()
+        Lesson.objects.bulk_create([
+            Lesson(timetable=timetable,
+                   class_room_id=class_room,
+                   teacher_id=teacher,
+                   subject_id=subject,
+                   day=slot // timetable.periods_per_day,
+                   period=slot % timetable.periods_per_day)
+            for (class_room, teacher, subject), slot in zip(lessons, placed)
+            if slot is not None])
+        now = timezone.now()
+        Timetable.objects.filter(pk=timetable.pk).update(
+            status=Timetable.PARTIAL if unplaced else Timetable.SOLVED,
+            error=None,
+            lessons_placed=len(lessons) - unplaced,
+            lessons_unplaced=unplaced,
+            solved_at=now,
+            updated_at=now)
+
+    if job:
+        jobs.set_progress(job, len(lessons) - unplaced)
+
+    return len(lessons) - unplaced, unplaced
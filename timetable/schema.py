@@ -0,0 +1,162 @@
+import graphene
+from django.shortcuts import get_object_or_404
+from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+from graphql_jwt.decorators import login_required
+
+from people import audit, jobs
+from people.models import AuditEntry, Teacher
+from people.schema import JobType
+
+from .models import Lesson, LessonRequirement, Timetable
+
+
+# LessonRequirement
+class LessonRequirementType(DjangoObjectType):
+    class Meta:
+        model = LessonRequirement
+
+
+class SetLessonRequirement(graphene.Mutation):
+    # creates or changes a class room's weekly lessons of a subject, 0
+    # lessons removes it
+    lesson_requirement = graphene.Field(LessonRequirementType)
+
+    class Arguments:
+        class_room = graphene.Int(required=True)
+        subject = graphene.Int(required=True)
+        lessons_per_week = graphene.Int(required=True)
+        teacher = graphene.Int()
+
+    @login_required
+    def mutate(self, info, class_room, subject, lessons_per_week,
+               teacher=None):
+        if lessons_per_week < 0:
+            raise GraphQLError("Error! lessonsPerWeek can't be negative")
+        if teacher and not Teacher.objects.filter(
+                pk=teacher, subjects=subject).exists():
+            raise GraphQLError(
+                f"Error! Teacher {teacher} doesn't teach subject {subject}")
+
+        requirement = LessonRequirement.objects.filter(
+            class_room_id=class_room, subject_id=subject).first()
+        if not lessons_per_week:
+            if requirement:
+                before = audit.snapshot(requirement)
+                try:
+                    requirement.delete()
+                except Exception as err:
+                    raise GraphQLError(f"Error! {str(err)}")
+                audit.record(info, AuditEntry.DELETE, requirement, before)
+            return SetLessonRequirement(lesson_requirement=None)
+
+        before = audit.snapshot(requirement) if requirement else None
+        if requirement is None:
+            requirement = LessonRequirement(class_room_id=class_room,
+                                            subject_id=subject)
+        requirement.teacher_id = teacher
+        requirement.lessons_per_week = lessons_per_week
+        try:
+            requirement.save()
+        except Exception as err:
+            raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info,
+                     AuditEntry.UPDATE if before else AuditEntry.CREATE,
+                     requirement, before, audit.snapshot(requirement))
+
+        return SetLessonRequirement(lesson_requirement=requirement)
+
+
+# Timetable
+class LessonType(DjangoObjectType):
+    class Meta:
+        model = Lesson
+
+
+class TimetableType(DjangoObjectType):
+    class Meta:
+        model = Timetable
+
+
+class GenerateTimetable(graphene.Mutation):
+    # the timetable is filled by a `generate_timetable` job from the
+    # lesson requirements as they are now
+    timetable = graphene.Field(TimetableType)
+    job = graphene.Field(JobType)
+
+    class Arguments:
+        name = graphene.String(required=True)
+        days = graphene.Int()
+        periods_per_day = graphene.Int()
+
+    @login_required
+    def mutate(self, info, name, days=5, periods_per_day=8):
+        if days < 1 or periods_per_day < 1:
+            raise GraphQLError(
+                "Error! A timetable needs at least one day and period")
+
+        try:
+            timetable = Timetable.objects.create(
+                name=name, days=days, periods_per_day=periods_per_day)
+            job = jobs.enqueue('generate_timetable',
+                               {'timetable': timetable.pk},
+                               user=info.context.user)
+        except Exception as err:
+            raise GraphQLError(f"Error! {str(err)}")
+        audit.record(info, AuditEntry.CREATE, timetable,
+                     after=audit.snapshot(timetable))
+
+        return GenerateTimetable(timetable=timetable, job=job)
+
+
+class Query(graphene.ObjectType):
+    lesson_requirements = graphene.List(
+        LessonRequirementType,
+        class_room=graphene.Int(),
+    )
+
+    timetables = graphene.List(TimetableType)
+
+    timetable = graphene.Field(TimetableType, id=graphene.Int(required=True))
+
+    # a class room's or a teacher's week, in slot order
+    lessons = graphene.List(
+        LessonType,
+        timetable=graphene.Int(required=True),
+        class_room=graphene.Int(),
+        teacher=graphene.Int(),
+    )
+
+    @login_required
+    def resolve_lesson_requirements(self, info, class_room=None, **kwargs):
+        qs = LessonRequirement.objects.all()
+        if class_room:
+            qs = qs.filter(class_room_id=class_room)
+        return qs.order_by('class_room_id', 'subject_id')
+
+    @login_required
+    def resolve_timetables(self, info, **kwargs):
+        return Timetable.objects.all()
+
+    @login_required
+    def resolve_timetable(self, info, id, **kwargs):
+        return get_object_or_404(Timetable, pk=id)
+
+    @login_required
+    def resolve_lessons(self,
+                        info,
+                        timetable,
+                        class_room=None,
+                        teacher=None,
+                        **kwargs):
+        qs = Lesson.objects.filter(timetable_id=timetable)
+        if class_room:
+            qs = qs.filter(class_room_id=class_room)
+        if teacher:
+            qs = qs.filter(teacher_id=teacher)
+        return qs.order_by('day', 'period', 'class_room_id')
+
+
+class Mutation(graphene.ObjectType):
+    set_lesson_requirement = SetLessonRequirement.Field()
+    generate_timetable = GenerateTimetable.Field()
@@ -0,0 +1,169 @@
+import random
+
+# Places weekly lessons into slots (day * periods_per_day + period) so
+# that no class room and no teacher has two lessons in the same slot. The
+# busy slots of every class room and teacher are kept as bits of an int,
+# so the free slots of a lesson are one `~(class | teacher)`. Lessons are
+# placed greedily, hardest first, and whatever doesn't fit is then placed
+# by ejection: it takes the slot that bumps the fewest other lessons, and
+# those go back in the queue. Recently moved lessons are tabu for a few
+# steps so that two lessons don't keep swapping places.
+#
+# Lessons of a subject are spread over the week where possible, a class
+# gets a second lesson of a subject on a day only if no other day is free.
+
+TABU_TENURE = 8
+
+
+def bits(mask):
+    # positions of the set bits, lowest first
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Solver:
+
+    def __init__(self, days, periods, lessons, seed=0):
+        # lessons is a list of (class room, teacher, subject), one entry
+        # per lesson to place
+        self.days = days
+        self.periods = periods
+        self.slots = days * periods
+        self.full = (1 << self.slots) - 1
+        self.day_masks = [((1 << periods) - 1) << (day * periods)
+                          for day in range(days)]
+        self.lessons = lessons
+        self.random = random.Random(seed)
+
+        self.slot_of = [None] * len(lessons)
+        self.class_busy = dict.fromkeys((c for c, t, s in lessons), 0)
+        self.teacher_busy = dict.fromkeys((t for c, t, s in lessons), 0)
+        # (class room or teacher, slot) -> lesson
+        self.class_at = {}
+        self.teacher_at = {}
+        # (class room, subject) -> lessons on each day
+        self.subject_days = {(c, s): [0] * days for c, t, s in lessons}
+        self.tabu_until = [0] * len(lessons)
+
+    def check(self):
+        # nobody can be in more lessons than there are slots
+        for key, name in ((0, 'Class room'), (1, 'Teacher')):
+            load = {}
+            for lesson in self.lessons:
+                load[lesson[key]] = load.get(lesson[key], 0) + 1
+            for owner, count in load.items():
+                if count > self.slots:
+                    raise ValueError(
+                        f'{name} {owner} has {count} lessons for '
+                        f'{self.slots} slots')
+
+    def place(self, lesson, slot):
+        class_room, teacher, subject = self.lessons[lesson]
+        bit = 1 << slot
+        self.slot_of[lesson] = slot
+        self.class_busy[class_room] |= bit
+        self.teacher_busy[teacher] |= bit
+        self.class_at[(class_room, slot)] = lesson
+        self.teacher_at[(teacher, slot)] = lesson
+        self.subject_days[(class_room, subject)][slot // self.periods] += 1
+
+    def remove(self, lesson):
+        class_room, teacher, subject = self.lessons[lesson]
+        slot = self.slot_of[lesson]
+        bit = 1 << slot
+        self.slot_of[lesson] = None
+        self.class_busy[class_room] &= ~bit
+        self.teacher_busy[teacher] &= ~bit
+        del self.class_at[(class_room, slot)]
+        del self.teacher_at[(teacher, slot)]
+        self.subject_days[(class_room, subject)][slot // self.periods] -= 1
+
+    def _spread(self, lesson, mask):
+        # the slots of `mask` on days without this subject yet, if any
+        class_room, teacher, subject = self.lessons[lesson]
+        taken = 0
+        for day, count in enumerate(self.subject_days[(class_room,
+                                                       subject)]):
+            if count:
+                taken |= self.day_masks[day]
+        return mask & ~taken or mask
+
+    def _pick(self, mask):
+        return self.random.choice(list(bits(mask)))
+
+    def free(self, lesson):
+        class_room, teacher, subject = self.lessons[lesson]
+        return self.full & ~(self.class_busy[class_room]
+                             | self.teacher_busy[teacher])
+
+    def _eject(self, lesson, step):
+        # the slots that bump the fewest lessons, preferring ones that
+        # aren't tabu
+        class_room, teacher, subject = self.lessons[lesson]
+        best, best_cost = 0, None
+        for slot in range(self.slots):
+            bumped = {self.class_at.get((class_room, slot)),
+                      self.teacher_at.get((teacher, slot))}
+            bumped.discard(None)
+            cost = len(bumped) + 10 * sum(
+                self.tabu_until[other] > step for other in bumped)
+            if best_cost is None or cost < best_cost:
+                best, best_cost = 1 << slot, cost
+            elif cost == best_cost:
+                best |= 1 << slot
+
+        slot = self._pick(self._spread(lesson, best))
+        bumped = {self.class_at.get((class_room, slot)),
+                  self.teacher_at.get((teacher, slot))}
+        bumped.discard(None)
+        for other in bumped:
+            self.remove(other)
+        self.place(lesson, slot)
+        self.tabu_until[lesson] = step + TABU_TENURE
+        return list(bumped)
+
+    def solve(self, max_steps=None, progress=None):
+        # returns the slot of every lesson, None for the ones that could
+        # not be placed within max_steps ejections
+        self.check()
+        if max_steps is None:
+            max_steps = 50 * len(self.lessons)
+
+        # hardest first: the busiest teachers, then the busiest classes
+        teacher_load, class_load = {}, {}
+        for class_room, teacher, subject in self.lessons:
+            teacher_load[teacher] = teacher_load.get(teacher, 0) + 1
+            class_load[class_room] = class_load.get(class_room, 0) + 1
+        order = list(range(len(self.lessons)))
+        self.random.shuffle(order)
+        order.sort(key=lambda lesson: (
+            -teacher_load[self.lessons[lesson][1]],
+            -class_load[self.lessons[lesson][0]]))
+
+        queue = []
+        for lesson in order:
+            mask = self.free(lesson)
+            if mask:
+                self.place(lesson, self._pick(self._spread(lesson, mask)))
+            else:
+                queue.append(lesson)
+
+        step = 0
+        while queue and step < max_steps:
+            lesson = queue.pop(self.random.randrange(len(queue)))
+            mask = self.free(lesson)
+            if mask:
+                self.place(lesson, self._pick(self._spread(lesson, mask)))
+            else:
+                queue.extend(self._eject(lesson, step))
+            step += 1
+            if progress and step % 1000 == 0:
+                progress(len(self.lessons) - len(queue), len(self.lessons))
+
+        return list(self.slot_of)
+
+
+def solve(days, periods, lessons, seed=0, max_steps=None, progress=None):
+    return Solver(days, periods, lessons, seed).solve(max_steps, progress)
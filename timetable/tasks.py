@@ -0,0 +1,9 @@
+from people.jobs import job
+
+from . import scheduling
+
+
+@job('generate_timetable')
+def generate_timetable(job, timetable):
+    placed, unplaced = scheduling.generate(timetable, job=job)
+    return {'placed': placed, 'unplaced': unplaced}